@@ -0,0 +1,117 @@
+"""
+Cost estimates for /api/convert admission control.
+
+Each upload gets a cost in abstract units from its size, format and a cheap
+byte-level pre-scan of its path and operation counts. ``CostModel`` turns
+units into estimated worker-seconds from an EWMA of the per-stage timings of
+recently finished jobs, so the queue can be admitted against a budget of
+worker-seconds and a full queue can tell clients how long to back off.
+"""
+
+import math
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+CONVERSION_COST_EWMA_ALPHA = float(os.getenv("CONVERSION_COST_EWMA_ALPHA", "0.2"))
+# Worker-seconds per cost unit assumed until the first job finishes.
+CONVERSION_COST_SECONDS_PER_UNIT = float(os.getenv("CONVERSION_COST_SECONDS_PER_UNIT", "0.1"))
+
+COST_UNIT_BYTES = 64 * 1024
+COST_UNIT_OPERATIONS = 20
+RETRY_AFTER_MIN_SECONDS = 1
+RETRY_AFTER_MAX_SECONDS = 300
+
+# Relative conversion cost per format for the same size and operation count.
+FORMAT_COST_WEIGHTS = {
+    "graphql": 0.5,
+    "wsdl": 1.5,
+}
+
+# Stages (job timing keys) the EWMA tracks.
+COST_STAGES = ("init_ms", "convert_ms", "token_ms", "store_ms", "db_ms")
+
+_YAML_PATH_RE = re.compile(rb"(?m)^[ \t]*[\"']?/[^\s\"':]*[\"']?[ \t]*:")
+_JSON_PATH_RE = re.compile(rb"\"/[^\"]*\"\s*:\s*\{")
+_YAML_OPERATION_RE = re.compile(
+    rb"(?m)^[ \t]*[\"']?(?:get|put|post|delete|patch|head|options|trace)[\"']?[ \t]*:"
+)
+_JSON_OPERATION_RE = re.compile(rb"\"(?:get|put|post|delete|patch|head|options|trace)\"\s*:\s*\{")
+_APIB_OPERATION_RE = re.compile(rb"(?m)^#+ .*\[(?:GET|PUT|POST|DELETE|PATCH|HEAD|OPTIONS)")
+_WSDL_OPERATION_RE = re.compile(rb"<(?:\w+:)?operation\b")
+_GRAPHQL_TYPE_RE = re.compile(rb"(?m)^\s*(?:type|input|interface|enum|union)\s+\w+")
+_GRAPHQL_FIELD_RE = re.compile(rb"(?m)^\s+\w+\s*(?:\([^)]*\))?\s*:")
+
+
+def prescan_spec(path: str, original_format: str) -> Dict[str, int]:
+    """Count paths and operations with a few byte regexes, without parsing."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if original_format == "graphql":
+        return {
+            "paths": len(_GRAPHQL_TYPE_RE.findall(data)),
+            "operations": len(_GRAPHQL_FIELD_RE.findall(data)),
+        }
+    if original_format == "wsdl":
+        return {"paths": 0, "operations": len(_WSDL_OPERATION_RE.findall(data))}
+    if original_format == "apib":
+        operations = len(_APIB_OPERATION_RE.findall(data))
+        return {"paths": operations, "operations": operations}
+    return {
+        "paths": max(len(_YAML_PATH_RE.findall(data)), len(_JSON_PATH_RE.findall(data))),
+        "operations": max(len(_YAML_OPERATION_RE.findall(data)), len(_JSON_OPERATION_RE.findall(data))),
+    }
+
+
+def estimate_cost_units(file_size: int, original_format: str, scan: Dict[str, int]) -> float:
+    """Cost of converting an upload, in units of roughly one small spec."""
+    units = 1 + file_size / COST_UNIT_BYTES + scan.get("operations", 0) / COST_UNIT_OPERATIONS
+    return round(units * FORMAT_COST_WEIGHTS.get(original_format, 1.0), 3)
+
+
+class CostModel:
+    """EWMA of per-stage milliseconds per cost unit, learned from finished jobs."""
+
+    def __init__(
+        self,
+        alpha: float = CONVERSION_COST_EWMA_ALPHA,
+        default_seconds_per_unit: float = CONVERSION_COST_SECONDS_PER_UNIT,
+    ):
+        self.alpha = alpha
+        self.default_seconds_per_unit = default_seconds_per_unit
+        self._stage_ms_per_unit: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, units: Optional[float], timings: Dict[str, int]) -> None:
+        """Fold a finished job's stage timings into the averages."""
+        if not units or units <= 0:
+            return
+        with self._lock:
+            for stage in COST_STAGES:
+                if stage not in timings:
+                    continue
+                sample = timings[stage] / units
+                previous = self._stage_ms_per_unit.get(stage)
+                self._stage_ms_per_unit[stage] = (
+                    sample if previous is None else previous + self.alpha * (sample - previous)
+                )
+
+    def seconds_per_unit(self) -> float:
+        with self._lock:
+            if not self._stage_ms_per_unit:
+                return self.default_seconds_per_unit
+            return sum(self._stage_ms_per_unit.values()) / 1000
+
+    def estimate_seconds(self, units: float) -> float:
+        return round(units * self.seconds_per_unit(), 3)
+
+    def stage_rates(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._stage_ms_per_unit)
+
+
+def retry_after_seconds(excess_seconds: float, workers: int) -> int:
+    """Seconds until ``excess_seconds`` of queued work drains across ``workers``."""
+    seconds = math.ceil(max(excess_seconds, 0) / max(workers, 1))
+    return min(max(seconds, RETRY_AFTER_MIN_SECONDS), RETRY_AFTER_MAX_SECONDS)
@@ -0,0 +1,128 @@
+"""
+Zip helpers for /api/convert/batch: unpack uploaded spec archives into temp
+files and stream result archives without building them in memory.
+"""
+
+import hashlib
+import io
+import os
+import tempfile
+import zipfile
+from pathlib import Path, PurePosixPath
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+from result_store import RESULT_CHUNK_SIZE
+
+
+def extract_spec_archive(
+    archive_path: str,
+    allowed_extensions: Iterable[str],
+    max_items: int,
+    max_item_bytes: int,
+    max_total_bytes: int,
+) -> Tuple[List[Dict[str, object]], List[Dict[str, str]]]:
+    """
+    Unpack spec files from a zip into temp files.
+
+    Returns ``(items, rejected)``: items carry ``file_name``, ``path``,
+    ``size`` and ``content_hash``; rejected entries carry ``file_name`` and
+    ``error``. Directories and hidden/metadata files are skipped. Sizes are
+    enforced on the bytes actually read, not on the sizes the archive claims.
+    The caller owns (and must delete) the returned temp files.
+    """
+    allowed = {ext.lower() for ext in allowed_extensions}
+    items: List[Dict[str, object]] = []
+    rejected: List[Dict[str, str]] = []
+    total_bytes = 0
+    tmp_dir = os.getenv("TMPDIR") or None
+
+    try:
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                name = PurePosixPath(info.filename).name
+                if info.is_dir() or not name or name.startswith(".") or "__MACOSX" in info.filename:
+                    continue
+                suffix = PurePosixPath(name).suffix.lower()
+                if suffix not in allowed:
+                    rejected.append({"file_name": name, "error": "Unsupported file type"})
+                    continue
+                if len(items) >= max_items:
+                    rejected.append({"file_name": name, "error": f"Batch limit of {max_items} specs reached"})
+                    continue
+
+                hasher = hashlib.sha256()
+                size = 0
+                too_large = False
+                with archive.open(info) as source, tempfile.NamedTemporaryFile(
+                    mode="wb", suffix=suffix, delete=False, dir=tmp_dir
+                ) as target:
+                    items.append({"file_name": name, "path": target.name, "size": 0, "content_hash": ""})
+                    while True:
+                        chunk = source.read(RESULT_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        size += len(chunk)
+                        if size > max_item_bytes or total_bytes + size > max_total_bytes:
+                            too_large = True
+                            break
+                        hasher.update(chunk)
+                        target.write(chunk)
+                if too_large:
+                    Path(items.pop()["path"]).unlink(missing_ok=True)
+                    rejected.append({"file_name": name, "error": "File too large"})
+                    continue
+                total_bytes += size
+                items[-1].update(size=size, content_hash=hasher.hexdigest())
+    except Exception:
+        for item in items:
+            Path(str(item["path"])).unlink(missing_ok=True)
+        raise
+    return items, rejected
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable sink that collects what zipfile writes until drained."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """Stream a deflated zip of ``(name, chunks)`` entries as it is written."""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in entries:
+            with archive.open(name, "w", force_zip64=True) as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def unique_name(name: str, used: set) -> str:
+    """``name``, or ``name`` with a ``-2``/``-3``... suffix if already used."""
+    candidate = name
+    stem, suffix = os.path.splitext(name)
+    counter = 2
+    while candidate in used:
+        candidate = f"{stem}-{counter}{suffix}"
+        counter += 1
+    used.add(candidate)
+    return candidate
@@ -0,0 +1,173 @@
+"""
+Token-budgeted chunks of a converted spec.
+
+``convert_chunked`` emits one chunk per tag, endpoint and schema whatever
+their size, so a giant tag or schema can blow any agent's context budget.
+``budget_chunks`` repacks that output so every chunk fits ``max_tokens``:
+consecutive endpoint blocks (and schema blocks) are packed together while
+they fit, and a tag summary or block over the budget is split into parts.
+
+Splits happen at line starts that begin with a non-space character, which
+are pre-tokenizer boundaries for the cl100k/o200k encodings (see
+token_counter), so counting each piece once and adding up gives every
+chunk's exact token count without encoding it again. Only a single line
+over the budget is cut elsewhere (at line ends, then in halves); such
+pieces are never joined across those cuts, so their counts stay exact too.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from token_counter import split_at_line_starts
+
+CountTokens = Callable[[Sequence[str]], List[int]]
+
+# Smallest budget accepted: every character must fit in a chunk on its own.
+MIN_CHUNK_TOKENS = 16
+
+# (chunk_type, chunked section, whether consecutive entries may share a chunk)
+_SECTIONS = (("tag", "tags", False), ("endpoint", "endpoints", True), ("schema", "schemas", True))
+
+
+def _split_lines(text: str) -> List[str]:
+    return text.splitlines(keepends=True)
+
+
+def _split_halves(text: str) -> List[str]:
+    middle = len(text) // 2
+    cut = text.rfind(" ", 0, middle) + 1 or middle
+    return [text[:cut], text[cut:]]
+
+
+def _split_line_starts(text: str) -> List[str]:
+    return split_at_line_starts(text, max_chars=1)
+
+
+# Finer and finer ways to cut a piece; only the first one keeps counts additive.
+_SPLITTERS = (_split_line_starts, _split_lines, _split_halves)
+
+
+def _pieces(
+    text: str,
+    tokens: int,
+    max_tokens: int,
+    count_tokens: CountTokens,
+    level: int = 0,
+) -> List[Tuple[str, int, bool]]:
+    """
+    Cut ``text`` into ``(piece, tokens, joinable)`` pieces of at most
+    ``max_tokens`` each; ``joinable`` says whether the piece may share a
+    chunk with the one before it without changing their summed count.
+    """
+    if tokens <= max_tokens:
+        return [(text, tokens, True)]
+    parts = [part for part in _SPLITTERS[level](text) if part]
+    if len(parts) == 1:
+        return _pieces(text, tokens, max_tokens, count_tokens, level + 1)
+    pieces: List[Tuple[str, int, bool]] = []
+    for index, (part, part_tokens) in enumerate(zip(parts, count_tokens(parts))):
+        finer = _pieces(part, part_tokens, max_tokens, count_tokens, min(level + 1, len(_SPLITTERS) - 1))
+        if index and level > 0:
+            first, first_tokens, _ = finer[0]
+            finer[0] = (first, first_tokens, False)
+        pieces.extend(finer)
+    return pieces
+
+
+def _group(
+    items: Sequence[Tuple[Any, int, bool]],
+    max_tokens: int,
+) -> List[List[Tuple[Any, int, bool]]]:
+    """Greedily group consecutive joinable items while their counts fit the budget."""
+    groups: List[List[Tuple[Any, int, bool]]] = []
+    total = 0
+    for item in items:
+        _, tokens, joinable = item
+        if groups and joinable and total + tokens <= max_tokens:
+            groups[-1].append(item)
+            total += tokens
+        else:
+            groups.append([item])
+            total = tokens
+    return groups
+
+
+def budget_chunks(
+    chunked: Dict[str, Any],
+    max_tokens: int,
+    count_tokens: CountTokens,
+) -> Dict[str, Any]:
+    """
+    Repack ``convert_chunked`` output into chunks of at most ``max_tokens``.
+
+    ``count_tokens`` counts a batch of texts (e.g. ``utils.estimate_token_counts``).
+    Returns the manifest, the budget and a list of chunks in document order,
+    each with its ``chunk_type`` (tag, endpoint or schema), a ``chunk_key``
+    unique within that type, the ``keys`` of the tags, operations or schemas
+    it holds, ``part``/``parts`` for an entry split over several chunks, its
+    ``token_count`` and its ``content``.
+    """
+    if max_tokens < MIN_CHUNK_TOKENS:
+        raise ValueError(f"max_tokens must be at least {MIN_CHUNK_TOKENS}")
+
+    units: List[Tuple[str, bool, str, str]] = []
+    for chunk_type, section, packable in _SECTIONS:
+        for key, text in chunked.get(section, {}).items():
+            if text and not text.endswith("\n"):
+                text += "\n"
+            units.append((chunk_type, packable, key, text))
+    counts = count_tokens([text for _, _, _, text in units])
+
+    chunks: List[Dict[str, Any]] = []
+
+    def add_chunks(chunk_type: str, groups: List[List[Tuple[Any, int, bool]]], split_key: Optional[str]) -> None:
+        """Add one chunk per group: a pack of whole entries, or the parts of entry ``split_key``."""
+        for part, group in enumerate(groups, start=1):
+            if split_key is None:
+                keys = [key for (key, _), _, _ in group]
+                chunk_key, texts = keys[0], [text for (_, text), _, _ in group]
+                part, parts = 1, 1
+            else:
+                keys = [split_key]
+                chunk_key = split_key if part == 1 else f"{split_key}#{part}"
+                texts, parts = [text for text, _, _ in group], len(groups)
+            chunks.append({
+                "chunk_type": chunk_type,
+                "chunk_key": chunk_key,
+                "keys": keys,
+                "part": part,
+                "parts": parts,
+                "token_count": sum(tokens for _, tokens, _ in group),
+                "content": "".join(texts),
+            })
+
+    pack: List[Tuple[Tuple[str, str], int, bool]] = []
+    pack_type = ""
+    for (chunk_type, packable, key, text), tokens in zip(units, counts):
+        if pack and (chunk_type != pack_type or not packable or tokens > max_tokens):
+            add_chunks(pack_type, _group(pack, max_tokens), None)
+            pack = []
+        if packable and tokens <= max_tokens:
+            pack.append(((key, text), tokens, True))
+            pack_type = chunk_type
+        else:
+            add_chunks(chunk_type, _group(_pieces(text, tokens, max_tokens, count_tokens), max_tokens), key)
+    if pack:
+        add_chunks(pack_type, _group(pack, max_tokens), None)
+
+    return {"manifest": chunked["manifest"], "token_budget": max_tokens, "chunks": chunks}
+
+
+def find_chunk(budgeted: Dict[str, Any], chunk_type: str, key: str) -> Optional[Dict[str, Any]]:
+    """
+    The budgeted chunk named ``key``, or else the first one holding the tag,
+    operation or schema ``key`` (its first part, if it was split).
+    """
+    holder = None
+    for chunk in budgeted["chunks"]:
+        if chunk["chunk_type"] != chunk_type:
+            continue
+        if chunk["chunk_key"] == key:
+            return chunk
+        if holder is None and key in chunk["keys"]:
+            holder = chunk
+    return holder
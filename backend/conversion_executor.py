@@ -0,0 +1,382 @@
+"""
+Pluggable executors for CPU-bound conversion work.
+
+Conversions are pure-Python CPU work, so running them in threads serializes
+on the GIL and starves the event loop. CONVERSION_EXECUTOR selects where they run:
+
+- ``thread`` (default): Starlette's threadpool, in-process.
+- ``process``: a pool of warm worker processes that pre-import yaml,
+  tiktoken and the converter, so throughput scales with cores.
+
+``run`` takes an optional timeout. The process executor kills the worker
+running a call that times out or is cancelled and starts a replacement
+right away, and caps each worker's memory at CONVERSION_JOB_MEMORY_MB.
+Threads can't be killed: the thread executor stops waiting on timeout but
+the call runs on, and ``run`` hands it to the caller's ``on_abandon`` so
+its worker slot stays taken and its late result is dropped.
+
+Work functions in this module are top-level so they can be pickled into a
+worker process, and return compact results (markdown as UTF-8 bytes plus
+small metadata) instead of converter objects.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+OnAbandon = Callable[["asyncio.Future[Any]"], None]
+
+from starlette.concurrency import run_in_threadpool
+
+from result_store import ResultStore
+
+logger = logging.getLogger(__name__)
+
+CONVERSION_EXECUTOR = os.getenv("CONVERSION_EXECUTOR", "thread")
+CONVERSION_PROCESS_WORKERS = int(
+    os.getenv("CONVERSION_PROCESS_WORKERS", os.getenv("CONVERSION_MAX_CONCURRENT", "1"))
+)
+# Address-space limit per worker process in MB (0: unlimited).
+CONVERSION_JOB_MEMORY_MB = int(os.getenv("CONVERSION_JOB_MEMORY_MB", "0"))
+
+
+class ConversionTimeoutError(Exception):
+    """An executor call ran past its timeout."""
+
+
+def convert_spec_file(
+    path: str, results: ResultStore, job_id: str, render_workers: int = 1
+) -> Dict[str, Any]:
+    """
+    Parse, convert and tokenize a spec file, streaming the markdown into
+    ``results`` as ``job_id`` while it is generated. ``render_workers`` > 1
+    lets a large spec's endpoints render in that many processes.
+
+    Returns the token count, the result's raw and compressed sizes, the
+    spec's info fields and tag names needed for saving, and per-stage
+    timings in ms plus how many endpoint blocks came from the render cache.
+    The whole document is never held in memory.
+    """
+    from transformation import OpenAPIToMarkdown
+    from utils import extract_tag_names, token_count_stream
+
+    init_started = time.perf_counter()
+    converter = OpenAPIToMarkdown(path)
+    convert_started = time.perf_counter()
+    counter = token_count_stream()
+    token_seconds = 0.0
+    store_seconds = 0.0
+    result_bytes = 0
+    with results.writer(job_id) as out:
+        for piece in converter.iter_convert(workers=render_workers):
+            token_started = time.perf_counter()
+            counter.feed(piece)
+            store_started = time.perf_counter()
+            data = piece.encode("utf-8")
+            out.write(data)
+            result_bytes += len(data)
+            store_finished = time.perf_counter()
+            token_seconds += store_started - token_started
+            store_seconds += store_finished - store_started
+        token_started = time.perf_counter()
+        token_count = counter.finish()
+        token_seconds += time.perf_counter() - token_started
+    finished = time.perf_counter()
+
+    info = converter.spec.get("info", {})
+    return {
+        "token_count": token_count,
+        "result_bytes": result_bytes,
+        "result_compressed_bytes": results.size(job_id),
+        "info": {
+            key: info[key]
+            for key in ("title", "version", "x-providerName", "contact")
+            if key in info
+        },
+        "tags": extract_tag_names(converter.spec),
+        "timings": {
+            "init_ms": int((convert_started - init_started) * 1000),
+            "convert_ms": int((finished - convert_started - token_seconds - store_seconds) * 1000),
+            "token_ms": int(token_seconds * 1000),
+            "store_ms": int(store_seconds * 1000),
+            "endpoint_blocks": converter.endpoint_blocks,
+            "render_cache_hit_ratio": (
+                round(converter.endpoint_cache_hits / converter.endpoint_blocks, 3)
+                if converter.endpoint_blocks else 0.0
+            ),
+        },
+    }
+
+
+def build_spec_file_artifacts(path: str) -> Tuple[str, str]:
+    """Build the stored (chunks_json, tools_json) artifacts for a spec file."""
+    from transformation import OpenAPIToMarkdown
+    from utils import build_spec_artifacts
+
+    return build_spec_artifacts(OpenAPIToMarkdown(path))
+
+
+def build_spec_content_artifacts(content: str, spec_format: str) -> Tuple[str, str]:
+    """Build the stored (chunks_json, tools_json) artifacts for in-memory spec content."""
+    from transformation import OpenAPIToMarkdown
+    from utils import build_spec_artifacts
+
+    return build_spec_artifacts(OpenAPIToMarkdown.from_content(content, spec_format))
+
+
+def _warm_worker() -> None:
+    """Process initializer: import the heavy modules and load the tokenizer once."""
+    import yaml  # noqa: F401
+    import transformation  # noqa: F401
+    import token_counter
+
+    try:
+        token_counter.warm_up()
+    except Exception as e:  # tokenizer download can fail offline; retried per job
+        logger.warning("Tokenizer warm-up failed in conversion worker: %s", e)
+
+
+def _ping() -> int:
+    return os.getpid()
+
+
+def _worker_main(conn, memory_limit_mb: int) -> None:
+    """Worker process loop: run ``(fn, args)`` calls from ``conn`` and send back the outcome."""
+    _warm_worker()
+    if memory_limit_mb > 0:
+        try:
+            import resource
+
+            limit = memory_limit_mb * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError) as e:
+            logger.warning("Could not cap conversion worker memory: %s", e)
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        fn, args = task
+        try:
+            outcome = (True, fn(*args))
+        except BaseException as e:
+            outcome = (False, e)
+        try:
+            conn.send(outcome)
+        except Exception as e:
+            # Unpicklable result or exception: report it as text.
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class ThreadConversionExecutor:
+    """Run conversion work in the in-process threadpool."""
+
+    name = "thread"
+
+    def start(self) -> None:
+        pass
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        on_abandon: Optional[OnAbandon] = None,
+    ) -> Any:
+        """
+        Run ``fn(*args)`` in a thread. If the wait times out or is cancelled
+        the thread runs on: ``on_abandon`` gets a future that finishes with it.
+        """
+        call = asyncio.ensure_future(run_in_threadpool(fn, *args))
+        try:
+            return await asyncio.wait_for(asyncio.shield(call), timeout)
+        except asyncio.TimeoutError:
+            self._abandon(call, on_abandon)
+            raise ConversionTimeoutError(f"{getattr(fn, '__name__', fn)} timed out after {timeout:g}s")
+        except asyncio.CancelledError:
+            self._abandon(call, on_abandon)
+            raise
+
+    @staticmethod
+    def _abandon(call: "asyncio.Future[Any]", on_abandon: Optional[OnAbandon]) -> None:
+        # Nobody awaits the call any more: retrieve its outcome so it isn't logged as lost.
+        call.add_done_callback(lambda done: done.cancelled() or done.exception())
+        if on_abandon is not None:
+            on_abandon(call)
+
+    def shutdown(self) -> None:
+        pass
+
+
+class _Worker:
+    """One warm worker process and the parent's end of its pipe."""
+
+    def __init__(self, ctx, memory_limit_mb: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class _Call:
+    """A submitted call; ``worker`` is set once it has one, ``abandoned`` once nobody waits."""
+
+    def __init__(self):
+        self.worker: Optional[_Worker] = None
+        self.abandoned = False
+
+
+class ProcessConversionExecutor:
+    """Run conversion work in a warm pool of killable worker processes."""
+
+    name = "process"
+
+    def __init__(self, workers: int, memory_limit_mb: int = CONVERSION_JOB_MEMORY_MB):
+        self.workers = max(1, workers)
+        self.memory_limit_mb = memory_limit_mb
+        # spawn: never fork a process that is running an event loop and threads.
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._live: Set[_Worker] = set()
+        self._lock = threading.Lock()
+
+    def _spawn(self) -> None:
+        worker = _Worker(self._ctx, self.memory_limit_mb)
+        with self._lock:
+            self._live.add(worker)
+        self._idle.put(worker)
+
+    def _replace(self, worker: _Worker) -> None:
+        """Kill ``worker`` and start a warm replacement in its place."""
+        with self._lock:
+            retired = self._retire(worker)
+        if retired:
+            self._respawn(worker)
+
+    def _retire(self, worker: _Worker) -> bool:
+        """Take ``worker`` out of the pool unless it already was (hold the lock)."""
+        if worker not in self._live:
+            return False
+        self._live.discard(worker)
+        return True
+
+    def _respawn(self, worker: _Worker) -> None:
+        """Start a replacement for the retired ``worker`` and kill it in the background."""
+        self._spawn()
+        threading.Thread(target=worker.kill, daemon=True).start()
+
+    def _release(self, worker: _Worker) -> None:
+        """Return a worker to the idle queue unless it was replaced meanwhile (hold the lock)."""
+        if worker in self._live:
+            self._idle.put(worker)
+
+    def _ensure_workers(self) -> None:
+        with self._lock:
+            missing = self.workers - len(self._live)
+        for _ in range(missing):
+            self._spawn()
+
+    def start(self) -> None:
+        """Start every worker now instead of on the first job."""
+        self._ensure_workers()
+
+    def _call(self, call: _Call, fn: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        """Blocking: check out a worker, run the call there and return the worker."""
+        worker = self._idle.get()
+        with self._lock:
+            if call.abandoned:
+                self._release(worker)
+                raise asyncio.CancelledError()
+            call.worker = worker
+        try:
+            worker.conn.send((fn, args))
+            ok, value = worker.conn.recv()
+        except (EOFError, OSError):
+            if call.abandoned:
+                raise asyncio.CancelledError()
+            # The worker died (e.g. OOM-killed).
+            logger.error("Conversion worker pid=%s died; replacing it", worker.process.pid)
+            self._replace(worker)
+            raise BrokenProcessPool("conversion worker process died")
+        if not ok and isinstance(value, MemoryError):
+            # Don't reuse a worker that just ran out of memory.
+            self._replace(worker)
+            raise MemoryError(
+                f"conversion exceeded the worker memory limit of {self.memory_limit_mb} MB"
+            )
+        with self._lock:
+            # Done with the worker: an abandon from now on must not kill it.
+            call.worker = None
+            self._release(worker)
+        if not ok:
+            raise value
+        return value
+
+    def _abandon(self, call: _Call) -> None:
+        # Retire the worker under the same lock _call releases it with, so a
+        # worker that has just finished is either reused or killed, never both.
+        with self._lock:
+            call.abandoned = True
+            worker = call.worker
+            retired = worker is not None and self._retire(worker)
+        if retired:
+            self._respawn(worker)
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        timeout: Optional[float] = None,
+        on_abandon: Optional[OnAbandon] = None,
+    ) -> Any:
+        """
+        Run ``fn(*args)`` in a worker process, killed if the wait times out or
+        is cancelled (so ``on_abandon`` is never called: nothing runs on).
+        """
+        self._ensure_workers()
+        call = _Call()
+        future = asyncio.get_running_loop().run_in_executor(None, self._call, call, fn, args)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            self._abandon(call)
+            raise ConversionTimeoutError(f"{getattr(fn, '__name__', fn)} timed out after {timeout:g}s")
+        except asyncio.CancelledError:
+            self._abandon(call)
+            raise
+
+    def shutdown(self) -> None:
+        with self._lock:
+            workers = list(self._live)
+            self._live.clear()
+        for worker in workers:
+            worker.kill()
+
+
+def create_conversion_executor(
+    kind: Optional[str] = None,
+    workers: Optional[int] = None,
+):
+    """Build the executor named by ``kind`` (default: CONVERSION_EXECUTOR)."""
+    kind = (kind or CONVERSION_EXECUTOR).strip().lower()
+    if kind == "process":
+        return ProcessConversionExecutor(workers or CONVERSION_PROCESS_WORKERS)
+    if kind != "thread":
+        logger.warning("Unknown CONVERSION_EXECUTOR=%r; using the threadpool", kind)
+    return ThreadConversionExecutor()
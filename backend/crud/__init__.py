@@ -7,6 +7,13 @@ from .specs import (
     search_specs,
     filter_by_tag,
     get_versions,
+    set_spec_artifacts,
+    list_spec_ids_missing_artifacts,
+    content_hash_of,
+    MARKDOWN_FROM_CONVERTER,
+    MARKDOWN_FROM_CLIENT,
+    get_spec_by_content_hash,
+    backfill_content_hashes,
     delete_spec,
     get_or_create_tag,
     add_tags_to_spec,
@@ -21,6 +28,13 @@ __all__ = [
     "search_specs",
     "filter_by_tag",
     "get_versions",
+    "set_spec_artifacts",
+    "list_spec_ids_missing_artifacts",
+    "content_hash_of",
+    "MARKDOWN_FROM_CONVERTER",
+    "MARKDOWN_FROM_CLIENT",
+    "get_spec_by_content_hash",
+    "backfill_content_hashes",
     "delete_spec",
     "get_or_create_tag",
     "add_tags_to_spec",
@@ -2,12 +2,23 @@
 CRUD operations for API specifications and tags.
 """
 
+import hashlib
+
 from sqlalchemy.orm import Session
 from sqlalchemy import func, or_, text
 from typing import List, Optional, Tuple
 from models.api_spec import ApiSpec, Tag
 from schemas.api_spec import SpecCreate
 
+# Values of ApiSpec.markdown_source.
+MARKDOWN_FROM_CONVERTER = "converter"
+MARKDOWN_FROM_CLIENT = "client"
+
+
+def content_hash_of(content: str) -> str:
+    """sha256 hex digest of spec content as UTF-8, matching the hash of an upload."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
 
 def create_spec(
     db: Session,
@@ -36,6 +47,10 @@ def create_spec(
         original_content=spec_data.original_content,
         markdown_content=spec_data.markdown_content,
         token_count=spec_data.token_count,
+        chunks_json=spec_data.chunks_json,
+        tools_json=spec_data.tools_json,
+        content_hash=spec_data.content_hash or content_hash_of(spec_data.original_content),
+        markdown_source=spec_data.markdown_source,
         uploaded_by=spec_data.uploaded_by,
         file_size_bytes=spec_data.file_size_bytes,
     )
@@ -216,6 +231,93 @@ def get_versions(
     ).order_by(ApiSpec.version.desc()).all()
 
 
+def set_spec_artifacts(
+    db: Session,
+    spec: ApiSpec,
+    chunks_json: str,
+    tools_json: str
+) -> ApiSpec:
+    """
+    Store precomputed chunk and tool-schema artifacts on an existing spec.
+    
+    Args:
+        db: Database session
+        spec: Spec to update
+        chunks_json: Serialized chunks (with per-chunk token_counts)
+        tools_json: Serialized tool schemas
+    
+    Returns:
+        Updated ApiSpec instance
+    """
+    spec.chunks_json = chunks_json
+    spec.tools_json = tools_json
+    db.commit()
+    return spec
+
+
+def list_spec_ids_missing_artifacts(db: Session, limit: int = 20) -> List[int]:
+    """
+    List IDs of specs stored before chunk/tool artifacts were precomputed.
+    
+    Args:
+        db: Database session
+        limit: Maximum number of IDs to return
+    
+    Returns:
+        Spec IDs, oldest first
+    """
+    rows = db.query(ApiSpec.id).filter(
+        or_(ApiSpec.chunks_json.is_(None), ApiSpec.tools_json.is_(None))
+    ).order_by(ApiSpec.id).limit(limit).all()
+    return [row[0] for row in rows]
+
+
+def get_spec_by_content_hash(
+    db: Session,
+    content_hash: str,
+    original_format: Optional[str] = None,
+    markdown_source: Optional[str] = None,
+) -> Optional[ApiSpec]:
+    """
+    Get the most recent spec whose original content has the given sha256.
+    
+    Args:
+        db: Database session
+        content_hash: sha256 hex digest of the original content
+        original_format: If given, only match specs stored in this format
+        markdown_source: If given, only match specs whose markdown came from there
+    
+    Returns:
+        ApiSpec instance or None if not found
+    """
+    query = db.query(ApiSpec).filter(ApiSpec.content_hash == content_hash)
+    if original_format:
+        query = query.filter(ApiSpec.original_format == original_format)
+    if markdown_source:
+        query = query.filter(ApiSpec.markdown_source == markdown_source)
+    return query.order_by(ApiSpec.id.desc()).first()
+
+
+def backfill_content_hashes(db: Session, limit: int = 20) -> int:
+    """
+    Compute content hashes for a batch of specs stored before they were recorded.
+    
+    Args:
+        db: Database session
+        limit: Maximum number of specs to update
+    
+    Returns:
+        Number of specs updated
+    """
+    specs = db.query(ApiSpec).filter(
+        ApiSpec.content_hash.is_(None)
+    ).order_by(ApiSpec.id).limit(limit).all()
+    for spec in specs:
+        spec.content_hash = content_hash_of(spec.original_content)
+    db.commit()
+    return len(specs)
+
+
 def delete_spec(db: Session, spec_id: int) -> bool:
     """
     Delete an API spec by ID.
@@ -0,0 +1,692 @@
+"""
+Stores for /api/convert jobs.
+
+CONVERSION_JOB_STORE selects where jobs live:
+
+- ``memory`` (default): a dict in this process. Status and download polls
+  must reach the process that accepted the upload.
+- ``sql``: the ``conversion_jobs`` table in the app database, so every API
+  process (``uvicorn --workers N`` or replicas behind a load balancer) can
+  enqueue, claim, update and read the same jobs.
+
+Both stores hand out copies of jobs; callers change a job only through
+``update``, ``update_active`` and ``claim``. Jobs hold metadata only: results live in the
+result store (see result_store.py), and ``cleanup`` returns the ids it
+dropped so their results can be deleted too. Every change made through a
+store is also published on its ``events`` to subscribers in this process.
+Jobs carrying a ``content_hash`` can be found again with ``find_by_hash``
+so duplicate uploads attach to an existing job instead of converting.
+Jobs carrying a ``batch_id`` are admitted together by ``enqueue_batch``
+against a limit on active batches, and don't count toward the single-job
+queue limit. Single jobs carrying an ``owner`` can also be capped per owner
+so one user can't fill the whole queue, and single jobs carrying
+``estimated_seconds`` can be admitted against a budget of queued work.
+"""
+
+import asyncio
+import bisect
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from starlette.concurrency import run_in_threadpool
+
+import models.database as database
+from models.conversion_job import ConversionJob
+
+logger = logging.getLogger(__name__)
+
+CONVERSION_JOB_STORE = os.getenv("CONVERSION_JOB_STORE", "memory")
+
+ACTIVE_STATUSES = ("queued", "processing")
+FINISHED_STATUSES = ("completed", "failed")
+
+# SQLite runs on a single shared connection (StaticPool), so job-store
+# transactions from different threadpool workers must not interleave.
+_SQLITE_LOCK = threading.Lock()
+
+
+def now_ts() -> float:
+    return time.time()
+
+
+def now_iso() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
+class QueueFullError(Exception):
+    """
+    Raised by ``enqueue`` when the active-job limit is already reached.
+
+    ``owner`` is set when the owner's own limit was hit, not the global one;
+    ``active_seconds`` is the estimated work already admitted.
+    """
+
+    def __init__(self, active: int, owner: Optional[str] = None, active_seconds: float = 0.0):
+        super().__init__(f"{active} conversion jobs active or queued")
+        self.active = active
+        self.owner = owner
+        self.active_seconds = active_seconds
+
+
+def _apply_fields(job: Dict[str, Any], fields: Dict[str, Any]) -> None:
+    """Apply an update to a job: ``timings`` is merged, everything else replaced."""
+    fields = dict(fields)
+    timings = fields.pop("timings", None)
+    job.update(fields)
+    if timings:
+        job["timings"] = {**job.get("timings", {}), **timings}
+    job["updated_at"] = now_iso()
+    job["updated_at_ts"] = now_ts()
+
+
+def _copy_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    copy = dict(job)
+    copy["timings"] = dict(job.get("timings", {}))
+    return copy
+
+
+class JobSubscription:
+    """Latest published state of one job, for a single event-stream reader."""
+
+    __slots__ = ("latest", "_changed")
+
+    def __init__(self):
+        self.latest: Optional[Dict[str, Any]] = None
+        self._changed = asyncio.Event()
+
+    def _push(self, job: Dict[str, Any]) -> None:
+        self.latest = job
+        self._changed.set()
+
+    async def wait(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Return the job once it changes, or None if ``timeout`` passes first."""
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self._changed.clear()
+        return self.latest
+
+
+class JobEvents:
+    """In-process fan-out of job changes to subscribers, keyed by job id.
+
+    Intermediate states collapse: a slow reader only sees the latest one.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[JobSubscription]] = {}
+
+    def publish(self, job: Optional[Dict[str, Any]]) -> None:
+        if job is None:
+            return
+        for subscription in self._subscribers.get(job["job_id"], ()):
+            subscription._push(_copy_job(job))
+
+    @contextmanager
+    def subscribe(self, job_id: str) -> Iterator[JobSubscription]:
+        subscription = JobSubscription()
+        self._subscribers.setdefault(job_id, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[job_id]
+
+
+class InMemoryJobStore:
+    """
+    Jobs in a process-local dict guarded by an asyncio lock.
+
+    Bookkeeping keeps every operation cheap as the queue and job cap grow:
+    per-status counters of single jobs, active single jobs per owner, their
+    summed estimated seconds and active-item counts per batch for admission,
+    the enqueue sequence numbers of
+    active jobs (ascending, so queue position is a bisect) and a min-heap of
+    finished jobs by ``updated_at_ts`` for TTL and overflow expiry. Heap
+    entries are invalidated lazily when a job changes or goes away.
+    """
+
+    name = "memory"
+
+    def __init__(self, ttl_seconds: int, max_items: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._lock = asyncio.Lock()
+        self.events = JobEvents()
+        self._status_counts: Dict[str, int] = {}
+        self._next_seq = 0
+        self._seq: Dict[str, int] = {}
+        self._active_seqs: List[int] = []
+        self._finished_heap: List[Tuple[float, str]] = []
+        self._by_hash: Dict[str, str] = {}
+        self._batches: Dict[str, List[str]] = {}
+        self._batch_active: Dict[str, int] = {}
+        self._owner_active: Dict[str, int] = {}
+        self._active_seconds = 0.0
+
+    async def enqueue(
+        self,
+        job: Dict[str, Any],
+        max_active: Optional[int],
+        max_active_per_owner: Optional[int] = None,
+        max_active_seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Add a job; ``max_active=None`` skips admission (for already finished jobs).
+
+        With ``max_active_seconds`` the job is refused if it would take the
+        estimated work of active single jobs over that budget, unless the
+        queue is empty.
+        """
+        async with self._lock:
+            if max_active is not None:
+                active = self._active_count()
+                if active >= max_active:
+                    raise QueueFullError(active, active_seconds=self._active_seconds)
+                if (
+                    max_active_seconds is not None
+                    and active
+                    and self._active_seconds + (job.get("estimated_seconds") or 0) > max_active_seconds
+                ):
+                    raise QueueFullError(active, active_seconds=self._active_seconds)
+                owner = job.get("owner")
+                if owner and max_active_per_owner is not None:
+                    owner_active = self._owner_active.get(owner, 0)
+                    if owner_active >= max_active_per_owner:
+                        raise QueueFullError(owner_active, owner)
+            self._add(job)
+
+    async def enqueue_batch(self, jobs: List[Dict[str, Any]], max_active_batches: int) -> None:
+        """Add all jobs of one batch, or none if ``max_active_batches`` are still running."""
+        async with self._lock:
+            active = len(self._batch_active)
+            if active >= max_active_batches:
+                raise QueueFullError(active)
+            for job in jobs:
+                self._add(job)
+
+    async def list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """The batch's remaining jobs in enqueue order."""
+        async with self._lock:
+            return [_copy_job(self._jobs[job_id]) for job_id in self._batches.get(batch_id, ())]
+
+    async def find_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """The newest job for this content that has not failed."""
+        async with self._lock:
+            job = self._jobs.get(self._by_hash.get(content_hash, ""))
+            return _copy_job(job) if job is not None else None
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            job = self._jobs.get(job_id)
+            return _copy_job(job) if job is not None else None
+
+    async def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        async with self._lock:
+            return self._change(job_id, fields, None)
+
+    async def update_active(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """``update`` only while the job is queued or processing; None otherwise (e.g. cancelled)."""
+        async with self._lock:
+            return self._change(job_id, fields, ACTIVE_STATUSES)
+
+    async def claim(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Move a queued job to ``processing``; None if it is gone or already claimed."""
+        async with self._lock:
+            return self._change(job_id, {**fields, "status": "processing"}, ("queued",))
+
+    async def pending_ahead(self, job: Dict[str, Any]) -> int:
+        """Active jobs enqueued before ``job``."""
+        async with self._lock:
+            seq = self._seq.get(job["job_id"])
+            if seq is None:
+                return 0
+            return bisect.bisect_left(self._active_seqs, seq)
+
+    async def cleanup(self) -> List[str]:
+        async with self._lock:
+            return self._cleanup()
+
+    def _change(
+        self,
+        job_id: str,
+        fields: Dict[str, Any],
+        from_statuses: Optional[Tuple[str, ...]],
+    ) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        previous_status = job.get("status")
+        if from_statuses is not None and previous_status not in from_statuses:
+            return None
+        _apply_fields(job, fields)
+        self._track(job_id, job, previous_status)
+        self.events.publish(job)
+        return _copy_job(job)
+
+    def _add(self, job: Dict[str, Any]) -> None:
+        job = _copy_job(job)
+        job_id = job["job_id"]
+        self._jobs[job_id] = job
+        self._seq[job_id] = self._next_seq
+        self._next_seq += 1
+        if job.get("content_hash"):
+            self._by_hash[job["content_hash"]] = job_id
+        if job.get("batch_id"):
+            self._batches.setdefault(job["batch_id"], []).append(job_id)
+        self._track(job_id, job, None)
+
+    def _active_count(self) -> int:
+        """Active single (non-batch) jobs."""
+        return sum(self._status_counts.get(status, 0) for status in ACTIVE_STATUSES)
+
+    @staticmethod
+    def _count(counts: Dict[str, int], key: str, delta: int) -> None:
+        count = counts.get(key, 0) + delta
+        if count > 0:
+            counts[key] = count
+        else:
+            counts.pop(key, None)
+
+    def _count_active_single(self, job: Dict[str, Any], delta: int) -> None:
+        if job.get("owner"):
+            self._count(self._owner_active, job["owner"], delta)
+        if self._active_count():
+            self._active_seconds += delta * (job.get("estimated_seconds") or 0)
+        else:
+            self._active_seconds = 0.0
+
+    def _track(self, job_id: str, job: Dict[str, Any], previous_status: Optional[str]) -> None:
+        """Update counters and indexes after a job was added or changed."""
+        status = job.get("status")
+        if status != previous_status:
+            was_active = previous_status in ACTIVE_STATUSES
+            is_active = status in ACTIVE_STATUSES
+            batch_id = job.get("batch_id")
+            if batch_id:
+                if was_active != is_active:
+                    self._count(self._batch_active, batch_id, 1 if is_active else -1)
+            else:
+                if previous_status is not None:
+                    self._status_counts[previous_status] -= 1
+                self._status_counts[status] = self._status_counts.get(status, 0) + 1
+                if was_active != is_active:
+                    self._count_active_single(job, 1 if is_active else -1)
+
+            if is_active and not was_active:
+                bisect.insort(self._active_seqs, self._seq[job_id])
+            elif was_active and not is_active:
+                self._discard_active(job_id)
+
+        if status in FINISHED_STATUSES:
+            heapq.heappush(self._finished_heap, (job.get("updated_at_ts", 0), job_id))
+        if status == "failed":
+            self._forget_hash(job_id, job)
+
+    def _forget_hash(self, job_id: str, job: Dict[str, Any]) -> None:
+        content_hash = job.get("content_hash")
+        if content_hash and self._by_hash.get(content_hash) == job_id:
+            del self._by_hash[content_hash]
+
+    def _discard_active(self, job_id: str) -> None:
+        seq = self._seq[job_id]
+        index = bisect.bisect_left(self._active_seqs, seq)
+        if index < len(self._active_seqs) and self._active_seqs[index] == seq:
+            del self._active_seqs[index]
+
+    def _remove(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id)
+        status = job.get("status")
+        batch_id = job.get("batch_id")
+        if batch_id:
+            if status in ACTIVE_STATUSES:
+                self._count(self._batch_active, batch_id, -1)
+            members = self._batches.get(batch_id, [])
+            if job_id in members:
+                members.remove(job_id)
+            if not members:
+                self._batches.pop(batch_id, None)
+        else:
+            self._status_counts[status] -= 1
+            if status in ACTIVE_STATUSES:
+                self._count_active_single(job, -1)
+        if status in ACTIVE_STATUSES:
+            self._discard_active(job_id)
+        del self._seq[job_id]
+        self._forget_hash(job_id, job)
+
+    def _pop_oldest_finished(self, before: Optional[float] = None) -> Optional[str]:
+        """Pop the finished job with the oldest ``updated_at_ts`` (if older than ``before``)."""
+        heap = self._finished_heap
+        while heap:
+            updated_at_ts, job_id = heap[0]
+            job = self._jobs.get(job_id)
+            if (
+                job is None
+                or job.get("status") not in FINISHED_STATUSES
+                or job.get("updated_at_ts", 0) != updated_at_ts
+            ):
+                heapq.heappop(heap)  # stale entry
+                continue
+            if before is not None and updated_at_ts >= before:
+                return None
+            heapq.heappop(heap)
+            return job_id
+        return None
+
+    def _cleanup(self) -> List[str]:
+        """Drop finished jobs past their TTL, then the oldest finished ones over the cap."""
+        cutoff = now_ts() - self.ttl_seconds
+        removed = []
+        while True:
+            job_id = self._pop_oldest_finished(before=cutoff)
+            if job_id is None:
+                break
+            self._remove(job_id)
+            removed.append(job_id)
+
+        while len(self._jobs) > self.max_items:
+            job_id = self._pop_oldest_finished()
+            if job_id is None:
+                break
+            self._remove(job_id)
+            removed.append(job_id)
+
+        # Stale entries only leave the heap when they reach the top; rebuild
+        # once they dominate so long-lived jobs can't grow it without bound.
+        if len(self._finished_heap) > 2 * len(self._jobs) + 64:
+            self._finished_heap = [
+                (job.get("updated_at_ts", 0), job_id)
+                for job_id, job in self._jobs.items()
+                if job.get("status") in FINISHED_STATUSES
+            ]
+            heapq.heapify(self._finished_heap)
+        return removed
+
+
+class SQLJobStore:
+    """Jobs in the ``conversion_jobs`` table, shared by every API process."""
+
+    name = "sql"
+
+    _COLUMNS = (
+        "job_id", "status", "stage", "content_hash", "batch_id", "owner", "estimated_seconds",
+        "created_at_ts", "updated_at_ts",
+    )
+
+    def __init__(self, ttl_seconds: int, max_items: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self.events = JobEvents()
+
+    async def enqueue(
+        self,
+        job: Dict[str, Any],
+        max_active: Optional[int],
+        max_active_per_owner: Optional[int] = None,
+        max_active_seconds: Optional[float] = None,
+    ) -> None:
+        """Add a job; see ``InMemoryJobStore.enqueue`` for the limits."""
+        await run_in_threadpool(self._enqueue, job, max_active, max_active_per_owner, max_active_seconds)
+
+    async def enqueue_batch(self, jobs: List[Dict[str, Any]], max_active_batches: int) -> None:
+        """Add all jobs of one batch, or none if ``max_active_batches`` are still running."""
+        await run_in_threadpool(self._enqueue_batch, jobs, max_active_batches)
+
+    async def list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        """The batch's remaining jobs in enqueue order."""
+        return await run_in_threadpool(self._list_batch, batch_id)
+
+    async def find_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        """The newest job for this content that has not failed."""
+        return await run_in_threadpool(self._find_by_hash, content_hash)
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await run_in_threadpool(self._get, job_id)
+
+    async def update(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        job = await run_in_threadpool(self._update, job_id, fields, None)
+        self.events.publish(job)
+        return job
+
+    async def update_active(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """``update`` only while the job is queued or processing; None otherwise (e.g. cancelled)."""
+        job = await run_in_threadpool(self._update, job_id, fields, ACTIVE_STATUSES)
+        self.events.publish(job)
+        return job
+
+    async def claim(self, job_id: str, **fields: Any) -> Optional[Dict[str, Any]]:
+        """Move a queued job to ``processing``; None if it is gone or already claimed."""
+        job = await run_in_threadpool(self._update, job_id, {**fields, "status": "processing"}, ("queued",))
+        self.events.publish(job)
+        return job
+
+    async def pending_ahead(self, job: Dict[str, Any]) -> int:
+        return await run_in_threadpool(self._pending_ahead, job.get("created_at_ts", 0))
+
+    async def cleanup(self) -> List[str]:
+        return await run_in_threadpool(self._run, self._cleanup)
+
+    # -- sync implementations, run in the threadpool --
+
+    def _run(self, fn, *args):
+        with _SQLITE_LOCK if database.IS_SQLITE else nullcontext():
+            db = database.SessionLocal()
+            try:
+                result = fn(db, *args)
+                db.commit()
+                return result
+            except Exception:
+                db.rollback()
+                raise
+            finally:
+                db.close()
+
+    def _enqueue(
+        self,
+        job: Dict[str, Any],
+        max_active: Optional[int],
+        max_active_per_owner: Optional[int],
+        max_active_seconds: Optional[float],
+    ) -> None:
+        owner = job.get("owner")
+
+        def enqueue(db):
+            if max_active is not None:
+                single_active = db.query(
+                    func.count(ConversionJob.job_id),
+                    func.coalesce(func.sum(ConversionJob.estimated_seconds), 0.0),
+                ).filter(
+                    ConversionJob.status.in_(ACTIVE_STATUSES),
+                    ConversionJob.batch_id.is_(None),
+                )
+                active, active_seconds = single_active.one()
+                if active >= max_active:
+                    return QueueFullError(active, active_seconds=active_seconds)
+                if (
+                    max_active_seconds is not None
+                    and active
+                    and active_seconds + (job.get("estimated_seconds") or 0) > max_active_seconds
+                ):
+                    return QueueFullError(active, active_seconds=active_seconds)
+                if owner and max_active_per_owner is not None:
+                    owner_active, _ = single_active.filter(ConversionJob.owner == owner).one()
+                    if owner_active >= max_active_per_owner:
+                        return QueueFullError(owner_active, owner)
+            row = ConversionJob(job_id=job["job_id"])
+            self._write_row(row, job)
+            db.add(row)
+            return None
+
+        error = self._run(enqueue)
+        if error is not None:
+            raise error
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        def get(db):
+            row = db.query(ConversionJob).filter(ConversionJob.job_id == job_id).first()
+            return self._read_row(row) if row is not None else None
+
+        return self._run(get)
+
+    def _enqueue_batch(self, jobs: List[Dict[str, Any]], max_active_batches: int) -> None:
+        def enqueue_batch(db):
+            active = db.query(func.count(func.distinct(ConversionJob.batch_id))).filter(
+                ConversionJob.status.in_(ACTIVE_STATUSES),
+                ConversionJob.batch_id.isnot(None),
+            ).scalar()
+            if active >= max_active_batches:
+                return active
+            for job in jobs:
+                row = ConversionJob(job_id=job["job_id"])
+                self._write_row(row, job)
+                db.add(row)
+            return None
+
+        active = self._run(enqueue_batch)
+        if active is not None:
+            raise QueueFullError(active)
+
+    def _list_batch(self, batch_id: str) -> List[Dict[str, Any]]:
+        def list_batch(db):
+            rows = db.query(ConversionJob).filter(
+                ConversionJob.batch_id == batch_id
+            ).order_by(ConversionJob.created_at_ts, ConversionJob.job_id).all()
+            return [self._read_row(row) for row in rows]
+
+        return self._run(list_batch)
+
+    def _find_by_hash(self, content_hash: str) -> Optional[Dict[str, Any]]:
+        def find_by_hash(db):
+            row = db.query(ConversionJob).filter(
+                ConversionJob.content_hash == content_hash,
+                ConversionJob.status != "failed",
+            ).order_by(ConversionJob.created_at_ts.desc()).first()
+            return self._read_row(row) if row is not None else None
+
+        return self._run(find_by_hash)
+
+    def _update(
+        self,
+        job_id: str,
+        fields: Dict[str, Any],
+        from_statuses: Optional[Tuple[str, ...]],
+    ) -> Optional[Dict[str, Any]]:
+        def update(db):
+            if from_statuses is not None:
+                # Conditional UPDATE so only one process can move a job out of
+                # ``from_statuses`` (claim it, cancel it, finish it).
+                values: Dict[str, Any] = {"updated_at_ts": now_ts()}
+                if "status" in fields:
+                    values["status"] = fields["status"]
+                matched = db.query(ConversionJob).filter(
+                    ConversionJob.job_id == job_id,
+                    ConversionJob.status.in_(from_statuses),
+                ).update(values, synchronize_session=False)
+                if not matched:
+                    return None
+            row = db.query(ConversionJob).filter(
+                ConversionJob.job_id == job_id
+            ).with_for_update().first()
+            if row is None:
+                return None
+            job = self._read_row(row)
+            _apply_fields(job, fields)
+            self._write_row(row, job)
+            return job
+
+        return self._run(update)
+
+    def _pending_ahead(self, created_at_ts: float) -> int:
+        def pending_ahead(db):
+            return db.query(func.count(ConversionJob.job_id)).filter(
+                ConversionJob.status.in_(ACTIVE_STATUSES),
+                ConversionJob.created_at_ts < created_at_ts,
+            ).scalar()
+
+        return self._run(pending_ahead)
+
+    def _cleanup(self, db) -> List[str]:
+        """Drop finished jobs past their TTL, then the oldest finished ones over the cap."""
+        cutoff = now_ts() - self.ttl_seconds
+        removed = [
+            job_id
+            for (job_id,) in db.query(ConversionJob.job_id).filter(
+                ConversionJob.status.in_(FINISHED_STATUSES),
+                ConversionJob.updated_at_ts < cutoff,
+            )
+        ]
+
+        overflow = db.query(func.count(ConversionJob.job_id)).scalar() - len(removed) - self.max_items
+        if overflow > 0:
+            removed += [
+                job_id
+                for (job_id,) in db.query(ConversionJob.job_id)
+                .filter(
+                    ConversionJob.status.in_(FINISHED_STATUSES),
+                    ConversionJob.updated_at_ts >= cutoff,
+                )
+                .order_by(ConversionJob.updated_at_ts)
+                .limit(overflow)
+            ]
+        if removed:
+            db.query(ConversionJob).filter(
+                ConversionJob.job_id.in_(removed)
+            ).delete(synchronize_session=False)
+        return removed
+
+    def _read_row(self, row: ConversionJob) -> Dict[str, Any]:
+        job = json.loads(row.payload or "{}")
+        job.update(
+            job_id=row.job_id,
+            status=row.status,
+            stage=row.stage,
+            content_hash=row.content_hash,
+            batch_id=row.batch_id,
+            owner=row.owner,
+            estimated_seconds=row.estimated_seconds,
+            created_at_ts=row.created_at_ts,
+            updated_at_ts=row.updated_at_ts,
+        )
+        job.setdefault("timings", {})
+        return job
+
+    def _write_row(self, row: ConversionJob, job: Dict[str, Any]) -> None:
+        row.status = job["status"]
+        row.stage = job.get("stage")
+        row.content_hash = job.get("content_hash")
+        row.batch_id = job.get("batch_id")
+        row.owner = job.get("owner")
+        row.estimated_seconds = job.get("estimated_seconds")
+        row.created_at_ts = job.get("created_at_ts", now_ts())
+        row.updated_at_ts = job.get("updated_at_ts", now_ts())
+        row.payload = json.dumps(
+            {key: value for key, value in job.items() if key not in self._COLUMNS},
+            separators=(",", ":"),
+        )
+
+
+def create_job_store(
+    ttl_seconds: int,
+    max_items: int,
+    kind: Optional[str] = None,
+):
+    """Build the job store named by ``kind`` (default: CONVERSION_JOB_STORE)."""
+    kind = (kind or CONVERSION_JOB_STORE).strip().lower()
+    if kind == "sql":
+        return SQLJobStore(ttl_seconds, max_items)
+    if kind != "memory":
+        logger.warning("Unknown CONVERSION_JOB_STORE=%r; keeping jobs in memory", kind)
+    return InMemoryJobStore(ttl_seconds, max_items)
@@ -9,28 +9,42 @@ from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse,
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from starlette.concurrency import run_in_threadpool
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from contextlib import asynccontextmanager
 import hashlib
-import io
 import os
 import re
 import secrets
 import tempfile
 import time
 import json
-import yaml
 import asyncio
+import zipfile
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator
+from urllib.parse import quote
 from uuid import uuid4
-from transformation import OpenAPIToMarkdown, normalize_raml, normalize_apib, normalize_wsdl, normalize_graphql, _safe_load_raml
+from transformation import parse_spec, YAML_BACKEND
 import httpx
 import jwt
 import logging
-from utils import estimate_token_count
+from utils import estimate_token_count, extract_tag_names
+from token_counter import warm_up as warm_up_token_counter
+from conversion_executor import (
+    ConversionTimeoutError,
+    build_spec_content_artifacts,
+    build_spec_file_artifacts,
+    convert_spec_file,
+    create_conversion_executor,
+)
+from job_store import ACTIVE_STATUSES, FINISHED_STATUSES, QueueFullError, create_job_store, now_iso, now_ts
+from batch_archive import extract_spec_archive, iter_zip, unique_name
+from scheduler import FairScheduler
+from admission import CostModel, estimate_cost_units, prescan_spec, retry_after_seconds
+from result_store import RESULT_CHUNK_SIZE, ResultStore, accepts_gzip
 
 # Import database models and CRUD operations
 from models.database import get_db, init_db, SessionLocal
@@ -55,6 +69,35 @@ JOB_TTL_SECONDS = int(os.getenv("CONVERSION_JOB_TTL_SECONDS", "3600"))
 JOB_MAX_ITEMS = int(os.getenv("CONVERSION_JOB_MAX_ITEMS", "200"))
 CONVERSION_MAX_CONCURRENT = int(os.getenv("CONVERSION_MAX_CONCURRENT", "1"))
 CONVERSION_MAX_QUEUE = int(os.getenv("CONVERSION_MAX_QUEUE", "20"))
+CONVERSION_MAX_QUEUE_PER_USER = int(
+    os.getenv("CONVERSION_MAX_QUEUE_PER_USER", str(max(CONVERSION_MAX_QUEUE // 2, 1)))
+)
+# Processes a large conversion may render endpoints with while it is the only
+# job (1: serial, 0: one per CPU). Only applies to CONVERSION_EXECUTOR=thread;
+# process workers can't start a pool of their own.
+CONVERSION_RENDER_WORKERS = int(os.getenv("CONVERSION_RENDER_WORKERS", "1"))
+# Wall-clock budget per job from claim to completion (0 disables).
+CONVERSION_JOB_TIMEOUT_SECONDS = float(os.getenv("CONVERSION_JOB_TIMEOUT_SECONDS", "120"))
+# Estimated worker-seconds of queued single uploads to admit (0 disables).
+CONVERSION_QUEUE_BUDGET_SECONDS = float(os.getenv("CONVERSION_QUEUE_BUDGET_SECONDS", "120"))
+CONVERSION_EVENTS_REFRESH_SECONDS = float(os.getenv("CONVERSION_EVENTS_REFRESH_SECONDS", "2"))
+CONVERSION_EVENTS_KEEPALIVE_SECONDS = 15.0
+# Uploads up to this size (and estimated to finish within the wait) are
+# answered with the markdown itself if their job finishes within
+# CONVERSION_INLINE_WAIT_SECONDS; otherwise the usual 202 (0 disables).
+CONVERSION_INLINE_MAX_BYTES = int(os.getenv("CONVERSION_INLINE_MAX_BYTES", str(64 * 1024)))
+CONVERSION_INLINE_WAIT_SECONDS = float(os.getenv("CONVERSION_INLINE_WAIT_SECONDS", "2"))
+# Batches are admitted as a whole against their own limit and run at most
+# CONVERSION_BATCH_CONCURRENCY items at a time, so single uploads keep
+# getting worker slots while a large batch drains.
+CONVERSION_MAX_BATCHES = int(os.getenv("CONVERSION_MAX_BATCHES", "2"))
+CONVERSION_BATCH_MAX_ITEMS = int(os.getenv("CONVERSION_BATCH_MAX_ITEMS", "50"))
+CONVERSION_BATCH_MAX_BYTES = int(os.getenv("CONVERSION_BATCH_MAX_BYTES", str(50 * 1024 * 1024)))
+CONVERSION_BATCH_CONCURRENCY = int(
+    os.getenv("CONVERSION_BATCH_CONCURRENCY", str(max(CONVERSION_MAX_CONCURRENT // 2, 1)))
+)
+# Specs per batch when backfilling stored chunk/tool artifacts at startup (0 disables).
+SPEC_ARTIFACT_BACKFILL_BATCH = int(os.getenv("SPEC_ARTIFACT_BACKFILL_BATCH", "20"))
 
 GITHUB_CLIENT_ID = os.getenv("GITHUB_CLIENT_ID", "")
 GITHUB_CLIENT_SECRET = os.getenv("GITHUB_CLIENT_SECRET", "")
@@ -81,19 +124,27 @@ FORMAT_TO_EXT = {
     "graphql": ".graphql",
 }
 
-conversion_jobs: Dict[str, Dict[str, Any]] = {}
-job_lock = asyncio.Lock()
-worker_semaphore = asyncio.Semaphore(max(CONVERSION_MAX_CONCURRENT, 1))
+job_store = create_job_store(JOB_TTL_SECONDS, JOB_MAX_ITEMS)
+result_store = ResultStore()
+# Worker slots, shared fairly between users with a lane for small files.
+worker_scheduler = FairScheduler(max(CONVERSION_MAX_CONCURRENT, 1))
+# Learns worker-seconds per unit of estimated job cost from finished jobs.
+cost_model = CostModel()
+# Tasks of jobs this process is running, so DELETE can cancel them.
+running_jobs: Dict[str, asyncio.Task] = {}
+# Thread or process pool for CPU-bound conversion work (CONVERSION_EXECUTOR).
+conversion_executor = create_conversion_executor()
 
 
 async def write_upload_to_temp(
     upload: UploadFile,
     suffix: str,
     max_bytes: int,
-) -> tuple[str, int, float, float]:
-    """Write an uploaded file to disk in chunks and return timings."""
+) -> tuple[str, int, float, float, str]:
+    """Write an uploaded file to disk in chunks; return its size, timings and sha256."""
     temp_input_path = ""
     total_bytes = 0
+    hasher = hashlib.sha256()
     read_seconds = 0.0
     write_seconds = 0.0
 
@@ -123,6 +174,7 @@ async def write_upload_to_temp(
                         detail=f"File too large. Max size is {max_bytes // (1024 * 1024)} MB.",
                     )
 
+                hasher.update(chunk)
                 write_start = time.perf_counter()
                 temp_input.write(chunk)
                 write_seconds += time.perf_counter() - write_start
@@ -132,59 +184,14 @@ async def write_upload_to_temp(
         raise
 
     await upload.seek(0)
-    return temp_input_path, total_bytes, read_seconds, write_seconds
+    return temp_input_path, total_bytes, read_seconds, write_seconds, hasher.hexdigest()
 
 
 def load_openapi_spec(path: str, file_extension: str) -> Dict[str, Any]:
     """Load API spec as dict from a file path. Best-effort for non-OpenAPI formats."""
     with open(path, "r", encoding="utf-8") as f:
         content = f.read()
-
-    if file_extension == ".raml":
-        raw = _safe_load_raml(content)
-        return normalize_raml(raw)
-
-    if file_extension == ".apib":
-        return normalize_apib(content)
-
-    if file_extension == ".wsdl":
-        return normalize_wsdl(content)
-
-    if file_extension in (".graphql", ".gql"):
-        return normalize_graphql(content)
-
-    if file_extension in (".yaml", ".yml"):
-        return yaml.safe_load(content) or {}
-
-    if file_extension == ".json":
-        return json.loads(content)
-
-    # Best-effort for unknown formats: try YAML, then JSON, then wrap raw content
-    try:
-        result = yaml.safe_load(content)
-        if isinstance(result, dict):
-            return result
-    except Exception:
-        pass
-    try:
-        result = json.loads(content)
-        if isinstance(result, dict):
-            return result
-    except Exception:
-        pass
-
-    return {
-        "info": {"title": Path(path).stem, "version": "1.0.0"},
-        "_raw_content": content,
-    }
-
-
-def now_ts() -> float:
-    return time.time()
-
-
-def now_iso() -> str:
-    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    return parse_spec(content, file_extension, Path(path).stem)
 
 
 def _job_snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
@@ -196,6 +203,7 @@ def _job_snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
         "file_size_bytes": job.get("file_size_bytes"),
         "save_to_db": job.get("save_to_db", False),
         "request_id": job.get("request_id"),
+        "batch_id": job.get("batch_id"),
         "created_at": job.get("created_at"),
         "updated_at": job.get("updated_at"),
         "timings": job.get("timings", {}),
@@ -203,34 +211,222 @@ def _job_snapshot(job: Dict[str, Any]) -> Dict[str, Any]:
         "marketplace_save_status": job.get("marketplace_save_status"),
         "marketplace_spec_id": job.get("marketplace_spec_id"),
         "provider": job.get("provider"),
+        "estimated_seconds": job.get("estimated_seconds"),
         "error": job.get("error"),
+        "failed_stage": job.get("failed_stage"),
     }
 
 
-async def cleanup_jobs_locked() -> None:
-    cutoff = now_ts() - JOB_TTL_SECONDS
+def _output_filename(api_name: str, api_version: str) -> str:
+    sanitized_name = re.sub(r'[^\w\s-]', '', api_name.lower())
+    sanitized_name = re.sub(r'[-\s]+', '-', sanitized_name).strip('-')
+    sanitized_version = re.sub(r'[^\w.-]', '', api_version)
+    return f"{sanitized_name}-v{sanitized_version}.md"
 
-    expired = [
-        job_id for job_id, job in conversion_jobs.items()
-        if job.get("status") in {"completed", "failed"} and job.get("updated_at_ts", 0) < cutoff
-    ]
-    for job_id in expired:
-        conversion_jobs.pop(job_id, None)
 
-    if len(conversion_jobs) <= JOB_MAX_ITEMS:
-        return
+def _new_job(
+    job_id: str,
+    request_id: str,
+    file_name: str,
+    file_size: int,
+    save_to_db: bool,
+    content_hash: str,
+    original_format: str,
+    read_seconds: float = 0.0,
+    write_seconds: float = 0.0,
+    owner: Optional[str] = None,
+    cost_units: float = 0.0,
+) -> Dict[str, Any]:
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "stage": "waiting_worker",
+        "request_id": request_id,
+        "owner": owner,
+        "cost_units": cost_units,
+        "estimated_seconds": cost_model.estimate_seconds(cost_units),
+        "file_name": file_name,
+        "file_size_bytes": file_size,
+        "save_to_db": save_to_db,
+        "content_hash": content_hash,
+        "original_format": original_format,
+        "timings": {
+            "read_ms": int(read_seconds * 1000),
+            "write_ms": int(write_seconds * 1000),
+            "init_ms": 0,
+            "convert_ms": 0,
+            "token_ms": 0,
+            "store_ms": 0,
+            "db_ms": 0,
+            "total_ms": 0,
+            "yaml_backend": YAML_BACKEND,
+            "executor": conversion_executor.name,
+            "job_store": job_store.name,
+        },
+        "token_count": None,
+        "marketplace_save_status": "skipped",
+        "marketplace_spec_id": "",
+        "error": None,
+        "result_bytes": None,
+        "result_compressed_bytes": None,
+        "provider": None,
+        "output_filename": "converted.md",
+        "created_at": now_iso(),
+        "created_at_ts": now_ts(),
+        "updated_at": now_iso(),
+        "updated_at_ts": now_ts(),
+    }
+
 
-    removable = sorted(
-        (
-            (job_id, job.get("updated_at_ts", 0))
-            for job_id, job in conversion_jobs.items()
-            if job.get("status") in {"completed", "failed"}
-        ),
-        key=lambda item: item[1],
+async def find_duplicate_job(
+    content_hash: str,
+    original_format: str,
+    save_to_db: bool,
+) -> Optional[Dict[str, Any]]:
+    """An in-flight or completed job for the same upload that this request can reuse."""
+    job = await job_store.find_by_hash(content_hash)
+    if not job or job.get("original_format") != original_format:
+        return None
+    # A job that skipped the marketplace save can't stand in for one that wants it.
+    if save_to_db and not job.get("save_to_db"):
+        return None
+    if job.get("status") == "completed" and not result_store.exists(job["job_id"]):
+        return None
+    return job
+
+
+async def complete_from_stored_spec(job: Dict[str, Any]) -> bool:
+    """
+    Complete the (not yet enqueued) ``job`` dict from a stored spec with the
+    same content, if any. The stored markdown becomes the job result; only
+    markdown this server converted is reused, never markdown a client shared.
+    """
+    db = SessionLocal()
+    try:
+        spec = crud.get_spec_by_content_hash(
+            db, job["content_hash"], job["original_format"], crud.MARKDOWN_FROM_CONVERTER
+        )
+        if spec is None:
+            return False
+        markdown = spec.markdown_content.encode("utf-8")
+        spec_id = str(spec.id)
+        token_count = spec.token_count
+        provider = spec.provider
+        output_filename = _output_filename(spec.name, spec.version)
+    finally:
+        db.close()
+
+    result_compressed_bytes = await run_in_threadpool(result_store.save, job["job_id"], markdown)
+    if token_count is None:
+        token_count = await run_in_threadpool(estimate_token_count, markdown.decode("utf-8"))
+    job.update(
+        status="completed",
+        stage="completed",
+        output_filename=output_filename,
+        provider=provider,
+        result_bytes=len(markdown),
+        result_compressed_bytes=result_compressed_bytes,
+        token_count=token_count,
+        marketplace_save_status="exists" if job["save_to_db"] else "skipped",
+        marketplace_spec_id=spec_id if job["save_to_db"] else "",
+        updated_at=now_iso(),
+        updated_at_ts=now_ts(),
     )
-    overflow = len(conversion_jobs) - JOB_MAX_ITEMS
-    for job_id, _ in removable[:max(overflow, 0)]:
-        conversion_jobs.pop(job_id, None)
+    return True
+
+
+async def enqueue_stored_spec_job(job: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Complete and enqueue ``job`` from a stored spec without converting, if one matches."""
+    if not await complete_from_stored_spec(job):
+        return None
+    await job_store.enqueue(job, None)
+    return job
+
+
+def _inline_eligible(job: Dict[str, Any], inline: bool) -> bool:
+    """Whether /api/convert should wait for ``job`` and answer with its result."""
+    return (
+        inline
+        and CONVERSION_INLINE_MAX_BYTES > 0
+        and job.get("file_size_bytes", 0) <= CONVERSION_INLINE_MAX_BYTES
+        and (job.get("estimated_seconds") or 0) <= CONVERSION_INLINE_WAIT_SECONDS
+    )
+
+
+async def wait_for_job(job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+    """The job once finished, or None if it is still active after ``timeout`` seconds."""
+    deadline = time.monotonic() + timeout
+    with job_store.events.subscribe(job_id) as subscription:
+        job = await job_store.get(job_id)
+        while job is not None and job.get("status") not in FINISHED_STATUSES:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            job = await subscription.wait(remaining) or job
+    return job
+
+
+def _result_response(job: Dict[str, Any], request: Request) -> Response:
+    """A completed job's markdown with its stage timings and save status as headers."""
+    job_id = job["job_id"]
+    timings = job.get("timings", {})
+    headers = {
+        "Content-Disposition": f"attachment; filename={job.get('output_filename') or 'converted.md'}",
+        "Vary": "Accept-Encoding",
+        "X-Job-Id": job_id,
+        "X-Request-ID": job.get("request_id", ""),
+        "X-Request-Duration-Ms": str(timings.get("total_ms", 0)),
+        "X-Stage-Timings": json.dumps(timings, separators=(",", ":")),
+        "X-Token-Count": str(job.get("token_count", 0)),
+        "X-Marketplace-Save-Status": job.get("marketplace_save_status", "skipped"),
+        "X-Marketplace-Spec-Id": job.get("marketplace_spec_id", ""),
+        "X-Provider": quote(job.get("provider") or ""),
+    }
+
+    # Send the stored gzip bytes as-is when the client can decode them.
+    if accepts_gzip(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        return FileResponse(result_store.path(job_id), media_type="text/markdown", headers=headers)
+
+    if job.get("result_bytes") is not None:
+        headers["Content-Length"] = str(job["result_bytes"])
+    return StreamingResponse(
+        result_store.iter_decompressed(job_id),
+        media_type="text/markdown",
+        headers=headers,
+    )
+
+
+def _queue_retry_after(error: QueueFullError, job: Dict[str, Any]) -> str:
+    """
+    Retry-After for a refused job: how long until enough estimated work
+    drains for it to fit, and at least until one job of its size is done.
+    """
+    job_seconds = job.get("estimated_seconds") or 0
+    if error.owner:
+        # One of the owner's own jobs has to finish first.
+        excess = error.active * job_seconds
+    else:
+        excess = error.active_seconds + job_seconds - max(CONVERSION_QUEUE_BUDGET_SECONDS, 0)
+    return str(retry_after_seconds(max(excess, job_seconds), CONVERSION_MAX_CONCURRENT))
+
+
+async def cleanup_jobs() -> None:
+    """Expire jobs in the job store and delete the stored results of those removed."""
+    removed = await job_store.cleanup()
+    if removed:
+        await run_in_threadpool(result_store.delete, removed)
+
+
+def _retain_original(job_id: str, temp_input_path: str) -> None:
+    result_store.save(job_id, Path(temp_input_path).read_bytes(), kind="src")
+
+
+def render_workers() -> int:
+    """Render processes for the job about to convert: more than one only if nothing else is queued."""
+    if CONVERSION_RENDER_WORKERS == 1 or worker_scheduler.waiting or len(running_jobs) > 1:
+        return 1
+    return CONVERSION_RENDER_WORKERS if CONVERSION_RENDER_WORKERS > 0 else os.cpu_count() or 1
 
 
 async def process_conversion_job(
@@ -241,84 +437,80 @@ async def process_conversion_job(
     file_size: int,
 ) -> None:
     started_at = time.perf_counter()
-    converter: Optional[OpenAPIToMarkdown] = None
+    stage = "waiting_worker"
+    deadline = None
+    running_jobs[job_id] = asyncio.current_task()
+
+    def time_left() -> Optional[float]:
+        """Seconds left of the job's wall-clock budget (None: unlimited)."""
+        if deadline is None:
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise ConversionTimeoutError("no time left")
+        return remaining
 
     try:
-        async with job_lock:
-            job = conversion_jobs.get(job_id)
-            if not job:
-                return
-            request_id = job["request_id"]
-            save_to_db = bool(job.get("save_to_db", False))
-
-        # Limit CPU-heavy conversion work to a strict number of workers.
-        async with worker_semaphore:
-            async with job_lock:
-                job = conversion_jobs.get(job_id)
-                if not job:
-                    return
-                job["status"] = "processing"
-                job["stage"] = "init"
-                job["updated_at"] = now_iso()
-                job["updated_at_ts"] = now_ts()
-
-            init_started = time.perf_counter()
-            converter = await run_in_threadpool(OpenAPIToMarkdown, temp_input_path)
-            init_ms = int((time.perf_counter() - init_started) * 1000)
-
-            async with job_lock:
-                job = conversion_jobs.get(job_id)
-                if not job:
-                    return
-                job["stage"] = "convert"
-                job["timings"]["init_ms"] = init_ms
-                job["updated_at"] = now_iso()
-                job["updated_at_ts"] = now_ts()
+        job = await job_store.get(job_id)
+        if not job:
+            return
+        request_id = job["request_id"]
+        save_to_db = bool(job.get("save_to_db", False))
+        content_hash = job.get("content_hash")
+
+        # Limit CPU-heavy conversion work to a strict number of workers,
+        # handed out fairly between users.
+        async with worker_scheduler.slot(job.get("owner") or "anonymous", file_size) as slot:
+
+            def abandoned(call: "asyncio.Future[Any]") -> None:
+                """A timed-out or cancelled thread runs on: keep its slot and drop its late result."""
+                slot.keep_until(call)
+                call.add_done_callback(
+                    lambda _: asyncio.create_task(run_in_threadpool(result_store.delete, [job_id]))
+                )
 
-            convert_started = time.perf_counter()
-            markdown_content = await run_in_threadpool(converter.convert)
-            convert_ms = int((time.perf_counter() - convert_started) * 1000)
+            stage = "convert"
+            if not await job_store.claim(job_id, stage=stage):
+                return
+            if CONVERSION_JOB_TIMEOUT_SECONDS > 0:
+                deadline = time.monotonic() + CONVERSION_JOB_TIMEOUT_SECONDS
+
+            # Parse, convert and tokenize in one executor call that streams the
+            # markdown into the result store, so a process worker only ships
+            # back compact results and no one holds the whole document.
+            result = await conversion_executor.run(
+                convert_spec_file, temp_input_path, result_store, job_id, render_workers(),
+                timeout=time_left(), on_abandon=abandoned,
+            )
+            token_count = result["token_count"]
+            spec_info = result["info"]
 
-            async with job_lock:
-                job = conversion_jobs.get(job_id)
-                if not job:
-                    return
-                job["stage"] = "tokenize"
-                job["timings"]["convert_ms"] = convert_ms
-                job["updated_at"] = now_iso()
-                job["updated_at_ts"] = now_ts()
+            # Stage changes go through update_active so a cancelled job stops here.
+            stage = "store_result"
+            if not await job_store.update_active(job_id, stage=stage, timings=result["timings"]):
+                await run_in_threadpool(result_store.delete, [job_id])
+                return
 
-            token_started = time.perf_counter()
-            token_count = await run_in_threadpool(estimate_token_count, markdown_content)
-            token_ms = int((time.perf_counter() - token_started) * 1000)
+            # Keep only metadata in the job; the original upload goes next to
+            # the markdown for share-by-job.
+            store_started = time.perf_counter()
+            await run_in_threadpool(_retain_original, job_id, temp_input_path)
+            store_ms = result["timings"]["store_ms"] + int((time.perf_counter() - store_started) * 1000)
 
             marketplace_save_status = "skipped"
             marketplace_spec_id = ""
             db_ms = 0
 
-            if save_to_db and converter is not None:
-                async with job_lock:
-                    job = conversion_jobs.get(job_id)
-                    if not job:
-                        return
-                    job["stage"] = "db_save"
-                    job["updated_at"] = now_iso()
-                    job["updated_at_ts"] = now_ts()
+            if save_to_db:
+                stage = "db_save"
+                if not await job_store.update_active(job_id, stage=stage):
+                    return
 
                 db_started = time.perf_counter()
                 db = SessionLocal()
                 try:
-                    spec_info = converter.spec.get("info", {})
-                    raw_tags = converter.spec.get("tags", [])
-                    tag_names = []
-                    if isinstance(raw_tags, list):
-                        for tag in raw_tags[:5]:
-                            if isinstance(tag, dict) and "name" in tag:
-                                tag_names.append(tag["name"])
-                            elif isinstance(tag, str):
-                                tag_names.append(tag)
-
                     original_content = Path(temp_input_path).read_text(encoding="utf-8")
+                    markdown = await run_in_threadpool(result_store.read, job_id)
                     spec_data = SpecCreate(
                         name=spec_info.get("title", "Untitled API"),
                         version=spec_info.get("version", "1.0.0"),
@@ -326,13 +518,19 @@ async def process_conversion_job(
                         original_filename=safe_filename,
                         original_format=FORMAT_MAP.get(file_extension, "yaml"),
                         original_content=original_content,
-                        markdown_content=markdown_content,
+                        markdown_content=markdown.decode("utf-8"),
                         token_count=token_count,
+                        content_hash=content_hash,
+                        markdown_source=crud.MARKDOWN_FROM_CONVERTER,
                         file_size_bytes=file_size,
-                        tags=tag_names,
+                        tags=result["tags"],
                     )
                     existing_spec = crud.get_spec_by_name_version(db, spec_data.name, spec_data.version)
                     if not existing_spec:
+                        spec_data.chunks_json, spec_data.tools_json = await conversion_executor.run(
+                            build_spec_file_artifacts, temp_input_path,
+                            timeout=time_left(), on_abandon=abandoned,
+                        )
                         db_spec = crud.create_spec(db, spec_data)
                         marketplace_save_status = "created"
                         marketplace_spec_id = str(db_spec.id)
@@ -341,6 +539,8 @@ async def process_conversion_job(
                         marketplace_spec_id = str(existing_spec.id)
                 except IntegrityError:
                     marketplace_save_status = "exists"
+                except ConversionTimeoutError:
+                    raise
                 except Exception as e:
                     logger.error("Error saving spec in job request_id=%s err=%s", request_id, e)
                     marketplace_save_status = "failed"
@@ -350,58 +550,128 @@ async def process_conversion_job(
 
             total_ms = int((time.perf_counter() - started_at) * 1000)
 
-            spec_info = converter.spec.get("info", {})
             provider = spec_info.get("x-providerName") or spec_info.get("contact", {}).get("name")
+            output_filename = _output_filename(
+                spec_info.get("title", "api"), spec_info.get("version", "1.0.0")
+            )
 
-            api_name = spec_info.get("title", "api")
-            api_version = spec_info.get("version", "1.0.0")
-            sanitized_name = re.sub(r'[^\w\s-]', '', api_name.lower())
-            sanitized_name = re.sub(r'[-\s]+', '-', sanitized_name).strip('-')
-            sanitized_version = re.sub(r'[^\w.-]', '', api_version)
-            output_filename = f"{sanitized_name}-v{sanitized_version}.md"
-
-        async with job_lock:
-            job = conversion_jobs.get(job_id)
-            if not job:
-                return
-            job["status"] = "completed"
-            job["stage"] = "completed"
-            job["output_filename"] = output_filename
-            job["provider"] = provider
-            job["markdown_content"] = markdown_content
-            job["token_count"] = token_count
-            job["marketplace_save_status"] = marketplace_save_status
-            job["marketplace_spec_id"] = marketplace_spec_id
-            job["timings"]["token_ms"] = token_ms
-            job["timings"]["db_ms"] = db_ms
-            job["timings"]["total_ms"] = total_ms
-            job["updated_at"] = now_iso()
-            job["updated_at_ts"] = now_ts()
-            await cleanup_jobs_locked()
+        job = await job_store.update_active(
+            job_id,
+            status="completed",
+            stage="completed",
+            output_filename=output_filename,
+            provider=provider,
+            result_bytes=result["result_bytes"],
+            result_compressed_bytes=result["result_compressed_bytes"],
+            token_count=token_count,
+            spec_name=spec_info.get("title", "Untitled API"),
+            spec_version=spec_info.get("version", "1.0.0"),
+            tags=result["tags"],
+            marketplace_save_status=marketplace_save_status,
+            marketplace_spec_id=marketplace_spec_id,
+            timings={"store_ms": store_ms, "db_ms": db_ms, "total_ms": total_ms},
+        )
+        await cleanup_jobs()
+        if not job:
+            # Cancelled meanwhile: drop the result nobody can download.
+            await run_in_threadpool(result_store.delete, [job_id])
+            return
+        cost_model.observe(job.get("cost_units"), job["timings"])
 
         logger.info(
             "Completed conversion job job_id=%s request_id=%s file=%s timings=%s",
             job_id,
             request_id,
             safe_filename,
-            conversion_jobs.get(job_id, {}).get("timings", {}),
+            job["timings"],
         )
     except Exception as e:
-        async with job_lock:
-            job = conversion_jobs.get(job_id)
-            if job:
-                job["status"] = "failed"
-                job["stage"] = "failed"
-                job["error"] = str(e)
-                job["updated_at"] = now_iso()
-                job["updated_at_ts"] = now_ts()
-                await cleanup_jobs_locked()
-        logger.error("Conversion job failed job_id=%s err=%s", job_id, e)
+        if isinstance(e, ConversionTimeoutError):
+            error = f"Conversion exceeded its {CONVERSION_JOB_TIMEOUT_SECONDS:g}s time budget in stage {stage}"
+        else:
+            error = str(e)
+        try:
+            await job_store.update_active(
+                job_id, status="failed", stage="failed", failed_stage=stage, error=error
+            )
+            await cleanup_jobs()
+        except Exception as store_error:
+            logger.error("Could not record job failure job_id=%s err=%s", job_id, store_error)
+        logger.error("Conversion job failed job_id=%s stage=%s err=%s", job_id, stage, error)
     finally:
+        running_jobs.pop(job_id, None)
         if temp_input_path and Path(temp_input_path).exists():
             Path(temp_input_path).unlink()
 
 
+async def process_conversion_batch(items: List[Dict[str, Any]]) -> None:
+    """Run a batch's jobs, at most CONVERSION_BATCH_CONCURRENCY at a time."""
+    batch_slots = asyncio.Semaphore(max(CONVERSION_BATCH_CONCURRENCY, 1))
+
+    async def run(item: Dict[str, Any]) -> None:
+        async with batch_slots:
+            await process_conversion_job(**item)
+
+    # A cancelled item must not stop the rest of the batch.
+    await asyncio.gather(*(run(item) for item in items), return_exceptions=True)
+
+
+async def store_spec_artifacts(db: Session, spec: ApiSpec) -> None:
+    """Compute and persist chunk/tool artifacts for a spec stored without them."""
+    chunks_json, tools_json = await conversion_executor.run(
+        build_spec_content_artifacts, spec.original_content, spec.original_format or "yaml"
+    )
+    crud.set_spec_artifacts(db, spec, chunks_json, tools_json)
+
+
+async def backfill_spec_artifacts() -> None:
+    """Populate stored artifacts for specs saved before they were precomputed."""
+    failed_ids: set = set()
+    while True:
+        db = SessionLocal()
+        try:
+            spec_ids = [
+                spec_id
+                for spec_id in crud.list_spec_ids_missing_artifacts(
+                    db, limit=SPEC_ARTIFACT_BACKFILL_BATCH + len(failed_ids)
+                )
+                if spec_id not in failed_ids
+            ]
+            if not spec_ids:
+                break
+            for spec_id in spec_ids:
+                spec = crud.get_spec(db, spec_id)
+                if spec is None:
+                    continue
+                try:
+                    await store_spec_artifacts(db, spec)
+                except Exception as e:
+                    db.rollback()
+                    failed_ids.add(spec_id)
+                    logger.warning("Artifact backfill failed spec_id=%s err=%s", spec_id, e)
+        finally:
+            db.close()
+    logger.info("Artifact backfill finished failed=%s", len(failed_ids))
+
+
+async def backfill_spec_content_hashes() -> None:
+    """Record content hashes for specs saved before duplicate detection existed."""
+    while True:
+        db = SessionLocal()
+        try:
+            updated = crud.backfill_content_hashes(db, limit=SPEC_ARTIFACT_BACKFILL_BATCH)
+        finally:
+            db.close()
+        if updated < SPEC_ARTIFACT_BACKFILL_BATCH:
+            break
+        await asyncio.sleep(0)
+
+
+async def backfill_specs() -> None:
+    await backfill_spec_content_hashes()
+    await backfill_spec_artifacts()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize database on startup and cleanup on shutdown."""
@@ -413,11 +683,25 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Database initialization failed: {e}")
         raise
+
+    conversion_executor.start()
+    try:
+        await run_in_threadpool(warm_up_token_counter)
+    except Exception as e:  # tokenizer download can fail offline; retried on first count
+        logger.warning("Tokenizer warm-up failed: %s", e)
+    await run_in_threadpool(result_store.sweep, JOB_TTL_SECONDS)
+
+    backfill_task = None
+    if SPEC_ARTIFACT_BACKFILL_BATCH > 0:
+        backfill_task = asyncio.create_task(backfill_specs())
     
     yield
     
-    # Shutdown (if needed in the future)
+    # Shutdown
     logger.info("Shutting down...")
+    if backfill_task is not None:
+        backfill_task.cancel()
+    conversion_executor.shutdown()
 
 
 app = FastAPI(
@@ -449,9 +733,18 @@ app.add_middleware(
         "X-Token-Count",
         "X-Marketplace-Save-Status",
         "X-Marketplace-Spec-Id",
+        "X-Job-Id",
+        "X-Provider",
     ],
 )
 
+# Proxies (comma-separated addresses or networks, "*" for any) whose
+# X-Forwarded-For gives the client address anonymous conversions are queued,
+# shared fairly and capped by. Set it to the deployment's proxy, or every
+# anonymous user behind it counts as one client.
+FORWARDED_ALLOW_IPS = os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1")
+app.add_middleware(ProxyHeadersMiddleware, trusted_hosts=FORWARDED_ALLOW_IPS)
+
 
 @app.get("/api")
 async def root():
@@ -543,6 +836,7 @@ async def convert_openapi(
     request: Request,
     file: UploadFile = File(...),
     save_to_db: bool = Query(True, description="Save conversion to database"),
+    inline: bool = Query(True, description="Return small results directly instead of a job id"),
 ):
     """
     Convert uploaded OpenAPI YAML/JSON file to markdown
@@ -550,10 +844,12 @@ async def convert_openapi(
     Args:
         file: Uploaded OpenAPI specification file (.yaml, .yml, or .json)
         save_to_db: Whether to save the conversion to database (default: True)
-        db: Database session
+        inline: Wait briefly for small uploads and return their markdown (default: True)
     
     Returns:
-        Markdown file as downloadable response
+        202 with a job id to poll, or for small uploads that finish within
+        CONVERSION_INLINE_WAIT_SECONDS, 200 with the markdown and the same
+        headers as /api/convert/{job_id}/download
     """
     request_id = request.headers.get("X-Request-ID", str(uuid4()))
     temp_input_path = ""
@@ -570,57 +866,80 @@ async def convert_openapi(
         )
 
     try:
-        temp_input_path, file_size, read_seconds, write_seconds = await write_upload_to_temp(
+        temp_input_path, file_size, read_seconds, write_seconds, content_hash = await write_upload_to_temp(
             file,
             file_extension,
             MAX_UPLOAD_BYTES,
         )
+        original_format = FORMAT_MAP.get(file_extension, "yaml")
+        await cleanup_jobs()
+
+        scan = await run_in_threadpool(prescan_spec, temp_input_path, original_format)
         job_id = str(uuid4())
-        async with job_lock:
-            await cleanup_jobs_locked()
-            active_or_queued_jobs = sum(
-                1
-                for existing_job in conversion_jobs.values()
-                if existing_job.get("status") in {"queued", "processing"}
+        job = _new_job(
+            job_id, request_id, safe_filename, file_size, save_to_db,
+            content_hash, original_format, read_seconds, write_seconds,
+            owner=_request_owner(request),
+            cost_units=estimate_cost_units(file_size, original_format, scan),
+        )
+
+        # Duplicate uploads cost one hash: attach to a job for the same bytes,
+        # or complete this job from a stored spec with the same content.
+        duplicate = (
+            await find_duplicate_job(content_hash, original_format, save_to_db)
+            or await enqueue_stored_spec_job(job)
+        )
+        if duplicate is not None:
+            logger.info(
+                "Deduplicated conversion request_id=%s job_id=%s status=%s",
+                request_id,
+                duplicate["job_id"],
+                duplicate["status"],
+            )
+            if _inline_eligible(job, inline):
+                finished = await wait_for_job(duplicate["job_id"], CONVERSION_INLINE_WAIT_SECONDS)
+                if finished and finished["status"] == "completed" and result_store.exists(finished["job_id"]):
+                    return _result_response(finished, request)
+                duplicate = finished or duplicate
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": duplicate["job_id"],
+                    "status": duplicate["status"],
+                    "stage": duplicate["stage"],
+                    "request_id": request_id,
+                    "deduplicated": True,
+                    "message": "Identical upload found. Poll /api/convert/{job_id} for status.",
+                },
+                headers={"X-Request-ID": request_id},
             )
-            if active_or_queued_jobs >= max(CONVERSION_MAX_QUEUE, 1):
+
+        try:
+            await job_store.enqueue(
+                job,
+                max(CONVERSION_MAX_QUEUE, 1),
+                max(CONVERSION_MAX_QUEUE_PER_USER, 1),
+                CONVERSION_QUEUE_BUDGET_SECONDS if CONVERSION_QUEUE_BUDGET_SECONDS > 0 else None,
+            )
+        except QueueFullError as e:
+            if e.owner:
                 raise HTTPException(
-                    status_code=503,
+                    status_code=429,
                     detail=(
-                        "Conversion queue is full. Please retry shortly. "
-                        f"active_or_queued={active_or_queued_jobs}, limit={CONVERSION_MAX_QUEUE}"
+                        "You have too many conversions queued. Please retry when one finishes. "
+                        f"active_or_queued={e.active}, limit={CONVERSION_MAX_QUEUE_PER_USER}"
                     ),
-                    headers={"Retry-After": "5"},
+                    headers={"Retry-After": _queue_retry_after(e, job)},
                 )
-            conversion_jobs[job_id] = {
-                "job_id": job_id,
-                "status": "queued",
-                "stage": "waiting_worker",
-                "request_id": request_id,
-                "file_name": safe_filename,
-                "file_size_bytes": file_size,
-                "save_to_db": save_to_db,
-                "timings": {
-                    "read_ms": int(read_seconds * 1000),
-                    "write_ms": int(write_seconds * 1000),
-                    "init_ms": 0,
-                    "convert_ms": 0,
-                    "token_ms": 0,
-                    "db_ms": 0,
-                    "total_ms": 0,
-                },
-                "token_count": None,
-                "marketplace_save_status": "skipped",
-                "marketplace_spec_id": "",
-                "error": None,
-                "markdown_content": None,
-                "provider": None,
-                "output_filename": "converted.md",
-                "created_at": now_iso(),
-                "created_at_ts": now_ts(),
-                "updated_at": now_iso(),
-                "updated_at_ts": now_ts(),
-            }
+            raise HTTPException(
+                status_code=503,
+                detail=(
+                    "Conversion queue is full. Please retry shortly. "
+                    f"active_or_queued={e.active}, limit={CONVERSION_MAX_QUEUE}, "
+                    f"queued_seconds={e.active_seconds:.1f}, budget_seconds={CONVERSION_QUEUE_BUDGET_SECONDS:g}"
+                ),
+                headers={"Retry-After": _queue_retry_after(e, job)},
+            )
 
         asyncio.create_task(
             process_conversion_job(
@@ -633,6 +952,12 @@ async def convert_openapi(
         )
         temp_input_path = ""
 
+        # Small uploads: wait briefly and answer with the result itself.
+        if _inline_eligible(job, inline):
+            finished = await wait_for_job(job_id, CONVERSION_INLINE_WAIT_SECONDS)
+            if finished and finished["status"] == "completed" and result_store.exists(job_id):
+                return _result_response(finished, request)
+
         return JSONResponse(
             status_code=202,
             content={
@@ -654,62 +979,446 @@ async def convert_openapi(
             Path(temp_input_path).unlink()
 
 
-@app.get("/api/convert/{job_id}")
-async def get_conversion_job_status(job_id: str):
-    async with job_lock:
-        await cleanup_jobs_locked()
-        job = conversion_jobs.get(job_id)
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
-        snapshot = _job_snapshot(job)
-        if job.get("status") == "queued":
-            this_created = job.get("created_at_ts", 0)
-            pending_ahead = sum(
-                1
-                for existing_job in conversion_jobs.values()
-                if existing_job.get("status") in {"queued", "processing"}
-                and existing_job.get("created_at_ts", 0) < this_created
+async def _read_batch_uploads(
+    files: List[UploadFile],
+) -> tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+    """
+    Write a batch upload to temp files: one zip archive of specs, or several
+    spec files. Returns ``(items, rejected)`` like ``extract_spec_archive``.
+    """
+    if len(files) == 1 and Path(files[0].filename or "").suffix.lower() == ".zip":
+        archive_path, _, _, _, _ = await write_upload_to_temp(files[0], ".zip", CONVERSION_BATCH_MAX_BYTES)
+        try:
+            return await run_in_threadpool(
+                extract_spec_archive,
+                archive_path,
+                ALLOWED_EXTENSIONS,
+                CONVERSION_BATCH_MAX_ITEMS,
+                MAX_UPLOAD_BYTES,
+                CONVERSION_BATCH_MAX_BYTES,
             )
-            snapshot["pending_ahead"] = pending_ahead
+        except zipfile.BadZipFile:
+            raise HTTPException(status_code=400, detail="Invalid zip archive")
+        finally:
+            Path(archive_path).unlink(missing_ok=True)
 
-    return snapshot
+    items: List[Dict[str, Any]] = []
+    rejected: List[Dict[str, str]] = []
+    total_bytes = 0
+    try:
+        for upload in files:
+            name = Path(upload.filename or "upload.json").name
+            suffix = Path(name).suffix.lower()
+            if suffix not in ALLOWED_EXTENSIONS:
+                rejected.append({"file_name": name, "error": "Unsupported file type"})
+                continue
+            if len(items) >= CONVERSION_BATCH_MAX_ITEMS:
+                rejected.append({"file_name": name, "error": f"Batch limit of {CONVERSION_BATCH_MAX_ITEMS} specs reached"})
+                continue
+            max_bytes = min(MAX_UPLOAD_BYTES, CONVERSION_BATCH_MAX_BYTES - total_bytes)
+            try:
+                path, size, _, _, content_hash = await write_upload_to_temp(upload, suffix, max_bytes)
+            except HTTPException as e:
+                if e.status_code != 413:
+                    raise
+                rejected.append({"file_name": name, "error": "File too large"})
+                continue
+            total_bytes += size
+            items.append({"file_name": name, "path": path, "size": size, "content_hash": content_hash})
+    except Exception:
+        for item in items:
+            Path(item["path"]).unlink(missing_ok=True)
+        raise
+    return items, rejected
 
 
-@app.get("/api/convert/{job_id}/download")
-async def download_conversion_job_result(job_id: str):
-    async with job_lock:
-        await cleanup_jobs_locked()
-        job = conversion_jobs.get(job_id)
-        if not job:
-            raise HTTPException(status_code=404, detail="Job not found")
-        if job.get("status") != "completed":
+def _batch_summary(batch_id: str, jobs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    A batch's jobs and status: processing or queued while any job is, then
+    completed if every job completed, failed (or cancelled) if none did, and
+    partial otherwise.
+    """
+    counts: Dict[str, int] = {}
+    for job in jobs:
+        counts[job["status"]] = counts.get(job["status"], 0) + 1
+    if any(job["status"] == "processing" for job in jobs):
+        status = "processing"
+    elif counts.get("queued"):
+        status = "queued"
+    elif not counts.get("completed"):
+        status = "failed"
+    elif counts.get("failed"):
+        status = "partial"
+    else:
+        status = "completed"
+    return {
+        "batch_id": batch_id,
+        "status": status,
+        "counts": counts,
+        "jobs": [_job_snapshot(job) for job in jobs],
+    }
+
+
+@app.post("/api/convert/batch")
+async def convert_openapi_batch(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    save_to_db: bool = Query(True, description="Save conversions to database"),
+):
+    """
+    Convert several specs in one request: a single .zip archive of specs, or
+    several spec files. Each spec becomes a job of the batch; poll
+    /api/convert/batch/{batch_id} and download all results as one zip.
+    """
+    request_id = request.headers.get("X-Request-ID", str(uuid4()))
+    logger.info("Received batch conversion request id=%s files=%s", request_id, len(files))
+
+    owner = _request_owner(request)
+    items, rejected = await _read_batch_uploads(files)
+    try:
+        if not items:
             raise HTTPException(
-                status_code=409,
-                detail=f"Job is {job.get('status')}. Result not available yet.",
+                status_code=400,
+                detail={"message": "No convertible specs in batch", "rejected": rejected},
             )
-        markdown_content = job.get("markdown_content") or ""
-        output_filename = job.get("output_filename") or "converted.md"
-        request_id = job.get("request_id", "")
-        timings = job.get("timings", {})
-        token_count = job.get("token_count", 0)
-        marketplace_save_status = job.get("marketplace_save_status", "skipped")
-        marketplace_spec_id = job.get("marketplace_spec_id", "")
-
-    return Response(
-        content=markdown_content,
-        media_type="text/markdown",
-        headers={
-            "Content-Disposition": f"attachment; filename={output_filename}",
-            "X-Request-ID": request_id,
-            "X-Request-Duration-Ms": str(timings.get("total_ms", 0)),
-            "X-Stage-Timings": json.dumps(timings, separators=(",", ":")),
-            "X-Token-Count": str(token_count),
-            "X-Marketplace-Save-Status": marketplace_save_status,
-            "X-Marketplace-Spec-Id": marketplace_spec_id,
-        },
+        await cleanup_jobs()
+
+        batch_id = str(uuid4())
+        jobs = []
+        pending = []
+        for item in items:
+            file_name = item["file_name"]
+            file_extension = Path(file_name).suffix.lower()
+            original_format = FORMAT_MAP.get(file_extension, "yaml")
+            scan = await run_in_threadpool(prescan_spec, item["path"], original_format)
+            job = _new_job(
+                str(uuid4()), request_id, file_name, item["size"], save_to_db,
+                item["content_hash"], original_format, owner=owner,
+                cost_units=estimate_cost_units(item["size"], original_format, scan),
+            )
+            job["batch_id"] = batch_id
+            jobs.append(job)
+            if not await complete_from_stored_spec(job):
+                pending.append({
+                    "job_id": job["job_id"],
+                    "temp_input_path": item["path"],
+                    "file_extension": file_extension,
+                    "safe_filename": file_name,
+                    "file_size": item["size"],
+                })
+
+        try:
+            await job_store.enqueue_batch(jobs, max(CONVERSION_MAX_BATCHES, 1))
+        except QueueFullError as e:
+            await run_in_threadpool(result_store.delete, [job["job_id"] for job in jobs])
+            raise HTTPException(
+                status_code=503,
+                detail=(
+                    "Too many conversion batches in progress. Please retry shortly. "
+                    f"active_batches={e.active}, limit={CONVERSION_MAX_BATCHES}"
+                ),
+                headers={"Retry-After": "30"},
+            )
+
+        asyncio.create_task(process_conversion_batch(pending))
+        handed_off = {item["temp_input_path"] for item in pending}
+        items = [item for item in items if item["path"] not in handed_off]
+
+        summary = _batch_summary(batch_id, jobs)
+        summary.update(
+            request_id=request_id,
+            rejected=rejected,
+            message="Batch queued. Poll /api/convert/batch/{batch_id} for status.",
+        )
+        return JSONResponse(status_code=202, content=summary, headers={"X-Request-ID": request_id})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("Error processing batch upload request_id=%s err=%s", request_id, e)
+        raise HTTPException(status_code=500, detail=f"Error processing upload: {str(e)}")
+    finally:
+        for item in items:
+            Path(item["path"]).unlink(missing_ok=True)
+
+
+@app.get("/api/convert/batch/{batch_id}")
+async def get_conversion_batch_status(batch_id: str):
+    await cleanup_jobs()
+    jobs = await job_store.list_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return _batch_summary(batch_id, jobs)
+
+
+@app.get("/api/convert/batch/{batch_id}/download")
+async def download_conversion_batch_results(batch_id: str):
+    """All completed results of a finished batch as one streamed zip, plus batch-summary.json."""
+    await cleanup_jobs()
+    jobs = await job_store.list_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    active = sum(1 for job in jobs if job["status"] in ACTIVE_STATUSES)
+    if active:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Batch has {active} unfinished jobs. Results not available yet.",
+        )
+
+    used_names = {"batch-summary.json"}
+    summary = []
+    entries = []
+    for job in jobs:
+        entry = {
+            "job_id": job["job_id"],
+            "file_name": job.get("file_name"),
+            "status": job["status"],
+            "token_count": job.get("token_count"),
+            "error": job.get("error"),
+            "output_filename": None,
+        }
+        if job["status"] == "completed" and result_store.exists(job["job_id"]):
+            name = unique_name(job.get("output_filename") or "converted.md", used_names)
+            entry["output_filename"] = name
+            entries.append((name, result_store.iter_decompressed(job["job_id"])))
+        summary.append(entry)
+    summary_json = json.dumps({"batch_id": batch_id, "jobs": summary}, indent=2).encode("utf-8")
+    entries.append(("batch-summary.json", [summary_json]))
+
+    return StreamingResponse(
+        iter_zip(entries),
+        media_type="application/zip",
+        headers={"Content-Disposition": f"attachment; filename=batch-{batch_id}.zip"},
     )
 
 
+@app.get("/api/convert/{job_id}")
+async def get_conversion_job_status(job_id: str):
+    await cleanup_jobs()
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    snapshot = _job_snapshot(job)
+    if job.get("status") == "queued":
+        snapshot["pending_ahead"] = await job_store.pending_ahead(job)
+
+    return snapshot
+
+
+@app.delete("/api/convert/{job_id}")
+async def cancel_conversion_job(job_id: str, request: Request):
+    """
+    Cancel a queued or running job. A job running in this process stops at
+    once (its worker process is killed and replaced); one running in another
+    API process stops at its next stage.
+
+    Only the job's owner may cancel it: duplicate uploads of the same bytes
+    share one job, and another uploader must not stop it for everyone.
+    """
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("owner") and job["owner"] != _request_owner(request):
+        raise HTTPException(status_code=403, detail="Only the client that submitted this job can cancel it")
+    cancelled = await job_store.update_active(
+        job_id,
+        status="failed",
+        stage="cancelled",
+        failed_stage=job.get("stage"),
+        error="Cancelled by client",
+    )
+    if not cancelled:
+        raise HTTPException(status_code=409, detail=f"Job is already {job.get('status')}.")
+    task = running_jobs.get(job_id)
+    if task is not None:
+        task.cancel()
+    logger.info("Cancelled conversion job job_id=%s stage=%s", job_id, job.get("stage"))
+    return _job_snapshot(cancelled)
+
+
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+@app.get("/api/convert/{job_id}/events")
+async def stream_conversion_job_events(
+    job_id: str,
+    request: Request,
+    include_result: bool = Query(False, description="Inline the markdown in the completed event"),
+):
+    """
+    Server-Sent Events stream of a job's status snapshots.
+
+    Sends a ``status`` event whenever the snapshot changes, then a final
+    ``completed`` or ``failed`` event (or ``gone`` if the job expired) and
+    closes. Changes made in this process are pushed as they happen; the job
+    is also re-read every CONVERSION_EVENTS_REFRESH_SECONDS so queue position
+    and jobs run by other API processes stay current.
+    """
+    if not await job_store.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    async def events():
+        with job_store.events.subscribe(job_id) as subscription:
+            job = await job_store.get(job_id)
+            last_sent = None
+            last_write = time.monotonic()
+            while True:
+                if not job:
+                    yield _sse_event("gone", {"job_id": job_id})
+                    return
+                snapshot = _job_snapshot(job)
+                status = snapshot["status"]
+                if status == "queued":
+                    snapshot["pending_ahead"] = await job_store.pending_ahead(job)
+                if status in {"completed", "failed"}:
+                    if status == "completed" and include_result and result_store.exists(job_id):
+                        markdown = await run_in_threadpool(result_store.read, job_id)
+                        snapshot["markdown"] = markdown.decode("utf-8")
+                    yield _sse_event(status, snapshot)
+                    return
+                if snapshot != last_sent:
+                    yield _sse_event("status", snapshot)
+                    last_sent = snapshot
+                    last_write = time.monotonic()
+                elif time.monotonic() - last_write >= CONVERSION_EVENTS_KEEPALIVE_SECONDS:
+                    yield ": keep-alive\n\n"
+                    last_write = time.monotonic()
+
+                job = await subscription.wait(CONVERSION_EVENTS_REFRESH_SECONDS)
+                if job is None:
+                    if await request.is_disconnected():
+                        return
+                    job = await job_store.get(job_id)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/convert/{job_id}/download")
+async def download_conversion_job_result(job_id: str, request: Request):
+    await cleanup_jobs()
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("status") != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job.get('status')}. Result not available yet.",
+        )
+    if not result_store.exists(job_id):
+        raise HTTPException(status_code=404, detail="Job result not found")
+    return _result_response(job, request)
+
+
+async def fill_spec_artifacts(spec_id: int) -> None:
+    """Build chunk/tool artifacts for a freshly shared spec off the request path."""
+    db = SessionLocal()
+    try:
+        spec = crud.get_spec(db, spec_id)
+        if spec is not None and spec.chunks_json is None:
+            await store_spec_artifacts(db, spec)
+    except Exception as e:
+        # Left for the lazy fill on first read or the startup backfill.
+        logger.warning("Could not build artifacts for shared spec spec_id=%s err=%s", spec_id, e)
+    finally:
+        db.close()
+
+
+@app.post("/api/convert/{job_id}/share")
+async def share_conversion_job(
+    job_id: str,
+    request: Request,
+    provider_name: Optional[str] = Form(None),
+    db: Session = Depends(get_db),
+):
+    """
+    Save a completed job's result to the marketplace from what the job kept:
+    the original upload, the markdown, its token count and the spec's info.
+    Nothing is uploaded, parsed or tokenized again; chunk/tool artifacts are
+    built in the background after the spec is stored.
+    """
+    request_id = request.headers.get("X-Request-ID", str(uuid4()))
+    started_at = time.perf_counter()
+    await cleanup_jobs()
+    job = await job_store.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.get("status") != "completed":
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job is {job.get('status')}. Result not available yet.",
+        )
+
+    def response(status: str, spec_id: Any) -> Dict[str, Any]:
+        total_ms = int((time.perf_counter() - started_at) * 1000)
+        logger.info(
+            "Shared conversion job job_id=%s request_id=%s status=%s spec_id=%s total_ms=%s",
+            job_id,
+            request_id,
+            status,
+            spec_id,
+            total_ms,
+        )
+        return {
+            "status": status,
+            "spec_id": str(spec_id),
+            "request_id": request_id,
+            "duration_ms": total_ms,
+        }
+
+    if job.get("marketplace_spec_id"):
+        return response("exists", job["marketplace_spec_id"])
+    if job.get("content_hash"):
+        existing_spec = crud.get_spec_by_content_hash(db, job["content_hash"], job["original_format"])
+        if existing_spec:
+            return response("exists", existing_spec.id)
+    if not result_store.exists(job_id) or not result_store.exists(job_id, kind="src"):
+        raise HTTPException(status_code=404, detail="Job result not found")
+
+    try:
+        markdown, original = await asyncio.gather(
+            run_in_threadpool(result_store.read, job_id),
+            run_in_threadpool(result_store.read, job_id, "src"),
+        )
+        resolved_provider = (
+            provider_name.strip() if provider_name and provider_name.strip() else job.get("provider")
+        )
+        spec_data = SpecCreate(
+            name=job.get("spec_name") or "Untitled API",
+            version=job.get("spec_version") or "1.0.0",
+            provider=resolved_provider,
+            original_filename=job.get("file_name"),
+            original_format=job["original_format"],
+            original_content=original.decode("utf-8"),
+            markdown_content=markdown.decode("utf-8"),
+            token_count=job.get("token_count"),
+            content_hash=job.get("content_hash"),
+            markdown_source=crud.MARKDOWN_FROM_CONVERTER,
+            file_size_bytes=job.get("file_size_bytes"),
+            tags=job.get("tags") or [],
+        )
+
+        existing_spec = crud.get_spec_by_name_version(db, spec_data.name, spec_data.version)
+        if existing_spec:
+            status = "exists"
+            spec_id = existing_spec.id
+        else:
+            db_spec = crud.create_spec(db, spec_data)
+            status = "created"
+            spec_id = db_spec.id
+            asyncio.create_task(fill_spec_artifacts(spec_id))
+        await job_store.update(job_id, marketplace_save_status=status, marketplace_spec_id=str(spec_id))
+        return response(status, spec_id)
+    except IntegrityError:
+        return {"status": "exists", "spec_id": "", "request_id": request_id}
+    except Exception as e:
+        logger.error("Error sharing conversion job job_id=%s request_id=%s err=%s", job_id, request_id, e)
+        raise HTTPException(status_code=500, detail=f"Failed to share spec: {str(e)}")
+
+
 @app.post("/api/specs/share")
 async def share_converted_spec(
     request: Request,
@@ -735,7 +1444,7 @@ async def share_converted_spec(
         )
 
     try:
-        temp_input_path, file_size, _, _ = await write_upload_to_temp(
+        temp_input_path, file_size, _, _, content_hash = await write_upload_to_temp(
             file,
             file_extension,
             MAX_UPLOAD_BYTES,
@@ -743,14 +1452,7 @@ async def share_converted_spec(
         spec = load_openapi_spec(temp_input_path, file_extension)
         spec_info = spec.get("info", {})
 
-        raw_tags = spec.get("tags", [])
-        tag_names = []
-        if isinstance(raw_tags, list):
-            for tag in raw_tags[:5]:
-                if isinstance(tag, dict) and "name" in tag:
-                    tag_names.append(tag["name"])
-                elif isinstance(tag, str):
-                    tag_names.append(tag)
+        tag_names = extract_tag_names(spec)
 
         resolved_token_count = token_count
         if resolved_token_count is None:
@@ -770,6 +1472,8 @@ async def share_converted_spec(
             original_content=original_content,
             markdown_content=markdown_content,
             token_count=resolved_token_count,
+            content_hash=content_hash,
+            markdown_source=crud.MARKDOWN_FROM_CLIENT,
             file_size_bytes=file_size,
             tags=tag_names,
         )
@@ -779,6 +1483,9 @@ async def share_converted_spec(
             status = "exists"
             spec_id = existing_spec.id
         else:
+            spec_data.chunks_json, spec_data.tools_json = await conversion_executor.run(
+                build_spec_file_artifacts, temp_input_path
+            )
             db_spec = crud.create_spec(db, spec_data)
             status = "created"
             spec_id = db_spec.id
@@ -864,6 +1571,32 @@ def _decode_session_claims(request: Request) -> Dict[str, Any]:
         return {}
 
 
+def _request_owner(request: Request) -> str:
+    """
+    Who a conversion is scheduled for: the session user, the user of a valid
+    API token, or else the client address (behind a FORWARDED_ALLOW_IPS proxy,
+    the address it forwarded for).
+    """
+    claims = _decode_session_claims(request)
+    if claims.get("sub"):
+        return f"user:{claims['sub']}"
+    authorization = request.headers.get("authorization", "")
+    if authorization.lower().startswith("bearer "):
+        token_hash = hashlib.sha256(authorization[7:].strip().encode()).hexdigest()
+        db = SessionLocal()
+        try:
+            token = (
+                db.query(ApiToken)
+                .filter(ApiToken.token_hash == token_hash, ApiToken.revoked_at.is_(None))
+                .first()
+            )
+            if token is not None:
+                return f"user:{token.user_id}"
+        finally:
+            db.close()
+    return f"ip:{request.client.host if request.client else 'unknown'}"
+
+
 def _get_current_user(request: Request, db: Session = Depends(get_db)) -> User:
     """Extract current user from session JWT cookie. Raises 401 if invalid."""
     token = request.cookies.get("session")
@@ -1171,6 +1904,12 @@ async def delete_spec_endpoint(
     return {"message": "Spec deleted successfully", "id": spec_id}
 
 
+def iter_encoded(text: str, chunk_chars: int = RESULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Stream ``text`` as UTF-8 slices instead of encoding one full copy up front."""
+    for start in range(0, len(text), chunk_chars):
+        yield text[start:start + chunk_chars].encode("utf-8")
+
+
 @app.get("/api/specs/{spec_id}/download/markdown")
 async def download_markdown(
     spec_id: int,
@@ -1183,14 +1922,11 @@ async def download_markdown(
     if not spec:
         raise HTTPException(status_code=404, detail="Spec not found")
     
-    # Create BytesIO object from markdown content
-    markdown_bytes = io.BytesIO(spec.markdown_content.encode('utf-8'))
-    
     # Generate filename
     filename = f"{spec.name}-v{spec.version}.md".replace(' ', '-')
     
     return StreamingResponse(
-        markdown_bytes,
+        iter_encoded(spec.markdown_content),
         media_type="text/markdown",
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -1210,9 +1946,6 @@ async def download_original(
     if not spec:
         raise HTTPException(status_code=404, detail="Spec not found")
     
-    # Create BytesIO object from original content
-    content_bytes = io.BytesIO(spec.original_content.encode('utf-8'))
-    
     # Determine media type and extension
     if spec.original_format == 'json':
         media_type = "application/json"
@@ -1225,7 +1958,7 @@ async def download_original(
     filename = f"{spec.name}-v{spec.version}.{ext}".replace(' ', '-')
     
     return StreamingResponse(
-        content_bytes,
+        iter_encoded(spec.original_content),
         media_type=media_type,
         headers={
             "Content-Disposition": f"attachment; filename={filename}"
@@ -1239,26 +1972,17 @@ async def get_spec_chunks(
     db: Session = Depends(get_db)
 ):
     """
-    Return progressive-disclosure chunks computed on the fly from the stored spec.
-    Result: { manifest, tags: {name: md}, endpoints: {opId: md}, schemas: {name: md} }
+    Return progressive-disclosure chunks precomputed when the spec was stored.
+    Result: { manifest, tags: {name: md}, endpoints: {opId: md}, schemas: {name: md},
+              token_counts: same shape with one token count per chunk }
     """
     spec = crud.get_spec(db, spec_id)
     if not spec:
         raise HTTPException(status_code=404, detail="Spec not found")
 
-    def _convert():
-        ext = FORMAT_TO_EXT.get(spec.original_format, ".yaml")
-        with tempfile.NamedTemporaryFile(mode="w", suffix=ext, delete=False, encoding="utf-8") as f:
-            f.write(spec.original_content)
-            tmp = f.name
-        try:
-            converter = OpenAPIToMarkdown(tmp)
-            return converter.convert_chunked()
-        finally:
-            Path(tmp).unlink(missing_ok=True)
-
-    chunked = await run_in_threadpool(_convert)
-    return JSONResponse(content=chunked)
+    if spec.chunks_json is None:
+        await store_spec_artifacts(db, spec)
+    return Response(content=spec.chunks_json, media_type="application/json")
 
 
 @app.get("/api/specs/{spec_id}/tools")
@@ -1273,19 +1997,9 @@ async def get_spec_tools(
     if not spec:
         raise HTTPException(status_code=404, detail="Spec not found")
 
-    def _convert():
-        ext = FORMAT_TO_EXT.get(spec.original_format, ".yaml")
-        with tempfile.NamedTemporaryFile(mode="w", suffix=ext, delete=False, encoding="utf-8") as f:
-            f.write(spec.original_content)
-            tmp = f.name
-        try:
-            converter = OpenAPIToMarkdown(tmp)
-            return converter.generate_tool_schemas()
-        finally:
-            Path(tmp).unlink(missing_ok=True)
-
-    tools = await run_in_threadpool(_convert)
-    return JSONResponse(content=tools)
+    if spec.tools_json is None:
+        await store_spec_artifacts(db, spec)
+    return Response(content=spec.tools_json, media_type="application/json")
 
 
 @app.get("/api/tags", response_model=List[TagResponse])
@@ -24,30 +24,38 @@ Env vars (HTTP transport):
   MCP_PORT            — listen port (default 8080)
   MCP_API_TOKEN       — optional admin fallback token (user tokens validated via DB)
   MCP_TOKEN_THRESHOLD — recommended token threshold (default 4000)
+  MCP_TOKEN_COUNT_MODE — "exact" (default, tiktoken) or "fast" (calibrated estimate)
+  MCP_CHUNK_TOKEN_BUDGET — token ceiling per get_chunk chunk (default MCP_TOKEN_THRESHOLD;
+                        0 serves one chunk per tag, endpoint and schema whatever its size)
 """
 
 import hashlib
 import json
 import os
 import re
-import tempfile
 import time
-from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
 from mcp.server.fastmcp import FastMCP
 
 import crud.specs as crud
+from chunk_budget import budget_chunks, find_chunk
 from models.api_spec import ApiSpec
 from models.database import SessionLocal
 from models.user import ApiToken
 from transformation import OpenAPIToMarkdown
-from utils import estimate_token_count
+from utils import estimate_token_count, estimate_token_counts
 
 _CONVERSION_CACHE: dict[tuple[str, str, str], tuple[dict[str, Any], OpenAPIToMarkdown, str]] = {}
 _MAX_CACHE_SIZE = 32
 MCP_TOKEN_THRESHOLD = int(os.getenv("MCP_TOKEN_THRESHOLD", "4000"))
+# Counts of specs without a stored count are exact by default: clients compare
+# them to the threshold, and an estimate near it could flip their choice.
+# "fast" (estimate) is opt-in; the payload's token_count_mode says which it is.
+MCP_TOKEN_COUNT_MODE = os.getenv("MCP_TOKEN_COUNT_MODE", "exact")
+# Chunks are counted exactly: agents rely on them never exceeding this.
+MCP_CHUNK_TOKEN_BUDGET = int(os.getenv("MCP_CHUNK_TOKEN_BUDGET", str(MCP_TOKEN_THRESHOLD)))
 
 mcp = FastMCP(
     "API Ingest",
@@ -92,19 +100,11 @@ def _get_cached_conversion(
     while len(_CONVERSION_CACHE) >= _MAX_CACHE_SIZE:
         del _CONVERSION_CACHE[next(iter(_CONVERSION_CACHE))]
 
-    ext = _FORMAT_TO_EXT.get(fmt, ".yaml")
-    with tempfile.NamedTemporaryFile(mode="w", suffix=ext, delete=False, encoding="utf-8") as f:
-        f.write(content)
-        tmp = f.name
-    try:
-        converter = OpenAPIToMarkdown(tmp)
-        chunked = converter.convert_chunked()
-        full_markdown = converter.convert()
-        result = (chunked, converter, full_markdown)
-        _CONVERSION_CACHE[key] = result
-        return result
-    finally:
-        Path(tmp).unlink(missing_ok=True)
+    converter = OpenAPIToMarkdown.from_content(content, fmt or "yaml")
+    full_markdown, chunked = converter.convert_all()
+    result = (chunked, converter, full_markdown)
+    _CONVERSION_CACHE[key] = result
+    return result
 
 
 def _cache_local_conversion(
@@ -120,19 +120,11 @@ def _cache_local_conversion(
     while len(_CONVERSION_CACHE) >= _MAX_CACHE_SIZE:
         del _CONVERSION_CACHE[next(iter(_CONVERSION_CACHE))]
 
-    ext = _FORMAT_TO_EXT.get(fmt, ".yaml")
-    with tempfile.NamedTemporaryFile(mode="w", suffix=ext, delete=False, encoding="utf-8") as f:
-        f.write(content)
-        tmp = f.name
-    try:
-        converter = OpenAPIToMarkdown(tmp)
-        chunked = converter.convert_chunked()
-        full_markdown = converter.convert()
-        result = (chunked, converter, full_markdown)
-        _CONVERSION_CACHE[key] = result
-        return result
-    finally:
-        Path(tmp).unlink(missing_ok=True)
+    converter = OpenAPIToMarkdown.from_content(content, fmt or "yaml")
+    full_markdown, chunked = converter.convert_all()
+    result = (chunked, converter, full_markdown)
+    _CONVERSION_CACHE[key] = result
+    return result
 
 
 def _get_local_conversion(conversion_id: str) -> tuple[dict[str, Any], OpenAPIToMarkdown, str]:
@@ -167,8 +159,47 @@ def _extract_schema_summary(schema_block: str) -> str:
     return schema_type
 
 
-def _build_chunks_index(chunked: dict[str, Any]) -> list[dict[str, str]]:
-    chunks: list[dict[str, str]] = []
+def _budgeted_chunks(chunked: dict[str, Any]) -> dict[str, Any]:
+    """Token-budgeted chunks of a conversion, built once and kept with it."""
+    budgeted = chunked.get("budgeted")
+    if budgeted is None:
+        budgeted = chunked["budgeted"] = budget_chunks(chunked, MCP_CHUNK_TOKEN_BUDGET, estimate_token_counts)
+    return budgeted
+
+
+def _budgeted_chunk_summary(chunk: dict[str, Any]) -> str:
+    content = chunk["content"]
+    if chunk["chunk_type"] == "tag":
+        endpoint_count = sum(1 for line in content.splitlines() if line.strip().startswith("- **"))
+        summary = f"{endpoint_count} endpoints"
+    elif chunk["chunk_type"] == "endpoint":
+        endpoints = re.findall(r"ENDPOINT:\s+\[(\w+)\]\s+(.+)", content)
+        summary = ", ".join(f"{method} {path}" for method, path in endpoints) or "endpoint"
+    elif len(chunk["keys"]) == 1:
+        summary = _extract_schema_summary(content)
+    else:
+        summary = f"{len(chunk['keys'])} schemas"
+    if chunk["parts"] > 1:
+        summary += f" (part {chunk['part']}/{chunk['parts']})"
+    return summary
+
+
+def _build_chunks_index(chunked: dict[str, Any]) -> list[dict[str, Any]]:
+    if MCP_CHUNK_TOKEN_BUDGET > 0:
+        return [
+            {
+                "type": chunk["chunk_type"],
+                "chunk_type": chunk["chunk_type"],
+                "key": chunk["chunk_key"],
+                "chunk_key": chunk["chunk_key"],
+                "summary": _budgeted_chunk_summary(chunk),
+                "keys": chunk["keys"],
+                "token_count": chunk["token_count"],
+            }
+            for chunk in _budgeted_chunks(chunked)["chunks"]
+        ]
+
+    chunks: list[dict[str, Any]] = []
 
     for tag_name, tag_markdown in sorted(chunked.get("tags", {}).items()):
         endpoint_count = sum(
@@ -217,12 +248,15 @@ def _build_context_payload(
     chunked: dict[str, Any],
     full_markdown: str,
     token_count: int,
+    token_count_mode: str,
 ) -> str:
     payload: dict[str, Any] = {
         id_field: source_id,
         "source_type": source_type,
         "token_count": token_count,
+        "token_count_mode": token_count_mode,
         "token_threshold": MCP_TOKEN_THRESHOLD,
+        "chunk_token_budget": MCP_CHUNK_TOKEN_BUDGET or None,
         "full_markdown": full_markdown,
         "manifest": chunked["manifest"],
         "chunks_available": _build_chunks_index(chunked),
@@ -348,18 +382,6 @@ def get_tool_schemas(spec_id: int) -> str:
 # ── Tools ──────────────────────────────────────────────────────────────
 
 
-_FORMAT_TO_EXT = {
-    "yaml": ".yaml",
-    "yml": ".yaml",
-    "json": ".json",
-    "raml": ".raml",
-    "apib": ".apib",
-    "wsdl": ".wsdl",
-    "graphql": ".graphql",
-    "gql": ".graphql",
-}
-
-
 @mcp.tool()
 def convert_spec(content: str, format: str = "yaml") -> str:
     """
@@ -372,7 +394,7 @@ def convert_spec(content: str, format: str = "yaml") -> str:
     """
     conversion_id = str(uuid4())
     chunked, _, full_markdown = _cache_local_conversion(conversion_id, content, format)
-    token_count = estimate_token_count(full_markdown)
+    token_count = estimate_token_count(full_markdown, mode=MCP_TOKEN_COUNT_MODE)
     return _build_context_payload(
         source_id=conversion_id,
         id_field="conversion_id",
@@ -380,6 +402,7 @@ def convert_spec(content: str, format: str = "yaml") -> str:
         chunked=chunked,
         full_markdown=full_markdown,
         token_count=token_count,
+        token_count_mode=MCP_TOKEN_COUNT_MODE,
     )
 
 
@@ -417,9 +440,11 @@ def load_spec(spec_id: int) -> str:
     """
     spec = _get_spec_row(spec_id)
     chunked, _, full_markdown = _get_chunked_and_converter(spec_id)
-    token_count = (
-        spec.token_count if spec.token_count is not None else estimate_token_count(full_markdown)
-    )
+    if spec.token_count is not None:
+        token_count, token_count_mode = spec.token_count, "exact"
+    else:
+        token_count = estimate_token_count(full_markdown, mode=MCP_TOKEN_COUNT_MODE)
+        token_count_mode = MCP_TOKEN_COUNT_MODE
     return _build_context_payload(
         source_id=str(spec_id),
         id_field="spec_id",
@@ -427,6 +452,7 @@ def load_spec(spec_id: int) -> str:
         chunked=chunked,
         full_markdown=full_markdown,
         token_count=token_count,
+        token_count_mode=token_count_mode,
     )
 
 
@@ -435,6 +461,11 @@ def get_chunk(source_id: str, source_type: str, chunk_type: str, chunk_key: str)
     """
     Fetch one chunk plus the manifest for context packing.
 
+    chunk_key is a chunk_key from chunks_available, or any tag name,
+    operationId or schema name: the chunk holding it is returned. With a
+    chunk token budget, chunk_content never exceeds it; an entry split over
+    several chunks continues in "<key>#2", "<key>#3", ...
+
     source_type:
       - local: source_id is conversion_id returned by convert_spec
       - marketplace: source_id is spec_id returned by search_specs/load_spec
@@ -452,15 +483,38 @@ def get_chunk(source_id: str, source_type: str, chunk_type: str, chunk_key: str)
     else:
         raise ValueError("source_type must be one of: local, marketplace")
 
-    chunk_content = _get_chunk_content(chunked, chunk_type, chunk_key)
+    if MCP_CHUNK_TOKEN_BUDGET <= 0:
+        chunk_content = _get_chunk_content(chunked, chunk_type, chunk_key)
+        return json.dumps(
+            {
+                "source_id": source_id,
+                "source_type": source_type,
+                "chunk_type": chunk_type,
+                "chunk_key": chunk_key,
+                "manifest": chunked["manifest"],
+                "chunk_content": chunk_content,
+            },
+            indent=2,
+        )
+
+    if chunk_type not in ("tag", "endpoint", "schema"):
+        raise ValueError("chunk_type must be one of: tag, endpoint, schema")
+    chunk = find_chunk(_budgeted_chunks(chunked), chunk_type, chunk_key)
+    if chunk is None:
+        raise ValueError(f"{chunk_type} chunk '{chunk_key}' not found")
     return json.dumps(
         {
             "source_id": source_id,
             "source_type": source_type,
             "chunk_type": chunk_type,
-            "chunk_key": chunk_key,
+            "chunk_key": chunk["chunk_key"],
+            "keys": chunk["keys"],
+            "part": chunk["part"],
+            "parts": chunk["parts"],
+            "token_count": chunk["token_count"],
+            "token_budget": MCP_CHUNK_TOKEN_BUDGET,
             "manifest": chunked["manifest"],
-            "chunk_content": chunk_content,
+            "chunk_content": chunk["content"],
         },
         indent=2,
     )
@@ -474,16 +528,9 @@ def convert_spec_to_tools(content: str, format: str = "yaml") -> str:
     This tool is independent from smart context loading and returns only callable
     tool definitions.
     """
-    ext = _FORMAT_TO_EXT.get(format, ".yaml")
-    with tempfile.NamedTemporaryFile(mode="w", suffix=ext, delete=False, encoding="utf-8") as f:
-        f.write(content)
-        tmp = f.name
-    try:
-        converter = OpenAPIToMarkdown(tmp)
-        tools = converter.generate_tool_schemas()
-        return json.dumps(tools, indent=2)
-    finally:
-        Path(tmp).unlink(missing_ok=True)
+    converter = OpenAPIToMarkdown.from_content(content, format or "yaml")
+    tools = converter.generate_tool_schemas()
+    return json.dumps(tools, indent=2)
 
 
 def _validate_bearer_token(raw_token: str, admin_token: str | None) -> bool:
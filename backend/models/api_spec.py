@@ -32,6 +32,14 @@ class ApiSpec(Base):
     original_content = Column(Text, nullable=False)
     markdown_content = Column(Text, nullable=False)
     token_count = Column(Integer, nullable=True)
+    # Precomputed read artifacts (JSON): chunks incl. per-chunk token_counts, tool schemas
+    chunks_json = Column(Text, nullable=True)
+    tools_json = Column(Text, nullable=True)
+    # sha256 of the uploaded bytes, used to short-circuit duplicate conversions
+    content_hash = Column(String(64), nullable=True)
+    # Who wrote markdown_content: 'converter' (this server) or 'client' (/api/specs/share).
+    # Only converter output is reused for duplicate uploads.
+    markdown_source = Column(String(16), nullable=True)
     uploaded_at = Column(DateTime, nullable=False, server_default=func.now(), index=True)
     uploaded_by = Column(String(255), nullable=True)
     file_size_bytes = Column(Integer, nullable=True)
@@ -44,6 +52,7 @@ class ApiSpec(Base):
         Index('idx_name', 'name'),
         Index('idx_uploaded_at', 'uploaded_at'),
         Index('uq_name_version', 'name', 'version', unique=True),
+        Index('idx_content_hash', 'content_hash'),
     )
     
     def to_dict(self, include_content=False):
@@ -0,0 +1,39 @@
+"""
+SQLAlchemy model for /api/convert jobs shared between API processes.
+"""
+
+from sqlalchemy import Column, String, Text, Float, Index
+from .database import Base
+
+
+class ConversionJob(Base):
+    """
+    A queued or finished conversion job.
+
+    Fields used for queue accounting and cleanup are columns; the rest of the
+    job (timings, file name, save status, ...) lives in ``payload`` as JSON.
+    Results are kept in the on-disk result store, not in this table.
+    """
+    __tablename__ = 'conversion_jobs'
+
+    job_id = Column(String(36), primary_key=True)
+    status = Column(String(20), nullable=False)
+    stage = Column(String(50), nullable=True)
+    content_hash = Column(String(64), nullable=True)
+    batch_id = Column(String(36), nullable=True)
+    owner = Column(String(80), nullable=True)
+    estimated_seconds = Column(Float, nullable=True)
+    payload = Column(Text, nullable=False, default="{}")
+    created_at_ts = Column(Float, nullable=False)
+    updated_at_ts = Column(Float, nullable=False)
+
+    __table_args__ = (
+        Index('idx_conversion_jobs_status_created', 'status', 'created_at_ts'),
+        Index('idx_conversion_jobs_updated', 'updated_at_ts'),
+        Index('idx_conversion_jobs_content_hash', 'content_hash'),
+        Index('idx_conversion_jobs_batch', 'batch_id'),
+        Index('idx_conversion_jobs_owner', 'owner'),
+    )
+
+    def __repr__(self):
+        return f"<ConversionJob(job_id='{self.job_id}', status='{self.status}')>"
@@ -81,6 +81,47 @@ def get_db():
         db.close()
 
 
+# Columns added to api_specs after its first release, migrated by init_db().
+ADDED_SPEC_COLUMNS = [
+    ("token_count", "INTEGER"),
+    ("chunks_json", "TEXT"),
+    ("tools_json", "TEXT"),
+    ("content_hash", "VARCHAR(64)"),
+    ("markdown_source", "VARCHAR(16)"),
+]
+
+# Indexes on ADDED_SPEC_COLUMNS, created by init_db() when missing.
+ADDED_SPEC_INDEXES = [
+    ("idx_content_hash", "content_hash"),
+]
+
+# Same for conversion_jobs.
+ADDED_JOB_COLUMNS = [
+    ("batch_id", "VARCHAR(36)"),
+    ("owner", "VARCHAR(80)"),
+    ("estimated_seconds", "FLOAT"),
+]
+ADDED_JOB_INDEXES = [
+    ("idx_conversion_jobs_batch", "batch_id"),
+    ("idx_conversion_jobs_owner", "owner"),
+]
+
+
+def _existing_columns(conn, table_name: str) -> set:
+    if IS_SQLITE:
+        columns = conn.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
+        return {col[1] for col in columns}
+    result = conn.execute(
+        text("""
+            SELECT column_name
+            FROM information_schema.columns
+            WHERE table_name = :table_name
+        """),
+        {"table_name": table_name},
+    )
+    return {row[0] for row in result.fetchall()}
+
+
 def init_db():
     """
     Initialize database by creating all tables.
@@ -89,28 +130,25 @@ def init_db():
     # Import models to ensure they're registered
     from .api_spec import ApiSpec, Tag, spec_tags
     from .user import User, ApiToken
+    from .conversion_job import ConversionJob
     
     # Create all tables
     Base.metadata.create_all(bind=engine)
 
-    # Lightweight startup migration for existing databases that predate token_count.
+    # Lightweight startup migration for existing databases that predate newer columns.
     # create_all() does not alter existing tables.
     with engine.connect() as conn:
-        if IS_SQLITE:
-            columns = conn.execute(text("PRAGMA table_info(api_specs)")).fetchall()
-            has_token_count = any(col[1] == "token_count" for col in columns)
-            if not has_token_count:
-                conn.execute(text("ALTER TABLE api_specs ADD COLUMN token_count INTEGER"))
-                conn.commit()
-        else:
-            result = conn.execute(text("""
-                SELECT 1
-                FROM information_schema.columns
-                WHERE table_name = 'api_specs' AND column_name = 'token_count'
-            """))
-            if not result.fetchone():
-                conn.execute(text("ALTER TABLE api_specs ADD COLUMN token_count INTEGER"))
-                conn.commit()
+        for table_name, added_columns, added_indexes in (
+            ("api_specs", ADDED_SPEC_COLUMNS, ADDED_SPEC_INDEXES),
+            ("conversion_jobs", ADDED_JOB_COLUMNS, ADDED_JOB_INDEXES),
+        ):
+            existing = _existing_columns(conn, table_name)
+            for column_name, column_type in added_columns:
+                if column_name not in existing:
+                    conn.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_name} {column_type}"))
+            for index_name, column_name in added_indexes:
+                conn.execute(text(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({column_name})"))
+        conn.commit()
     
     # Create FTS5 virtual table and triggers manually (SQLite only)
     # PostgreSQL and other databases will use simple substring search instead
@@ -0,0 +1,157 @@
+"""
+Compressed on-disk storage for completed /api/convert results.
+
+Jobs keep only metadata; the markdown is written gzip-compressed to
+CONVERSION_RESULT_DIR as ``<job_id>.md.gz`` and downloads either send those
+bytes as-is (``Content-Encoding: gzip``) or stream them decompressed. The
+original upload is kept next to it as ``<job_id>.src.gz`` so a result can be
+shared to the marketplace by job id without uploading anything again. When
+several API processes share a SQL job store, point CONVERSION_RESULT_DIR at a
+volume they all mount.
+"""
+
+import gzip
+import logging
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List
+
+logger = logging.getLogger(__name__)
+
+CONVERSION_RESULT_DIR = os.getenv(
+    "CONVERSION_RESULT_DIR", os.path.join(tempfile.gettempdir(), "apic-results")
+)
+CONVERSION_RESULT_COMPRESSLEVEL = int(os.getenv("CONVERSION_RESULT_COMPRESSLEVEL", "6"))
+RESULT_CHUNK_SIZE = 64 * 1024
+
+_JOB_ID_RE = re.compile(r"^[A-Za-z0-9-]{1,64}$")
+
+# Artifact kinds kept per job: the markdown result and the original upload.
+RESULT_KINDS = ("md", "src")
+
+
+class ResultStore:
+    """One gzip file per job and artifact kind under ``directory``."""
+
+    def __init__(self, directory: str = CONVERSION_RESULT_DIR, compresslevel: int = CONVERSION_RESULT_COMPRESSLEVEL):
+        self.directory = Path(directory)
+        self.compresslevel = compresslevel
+
+    def path(self, job_id: str, kind: str = "md") -> Path:
+        if not _JOB_ID_RE.match(job_id):
+            raise ValueError(f"Invalid job id: {job_id!r}")
+        if kind not in RESULT_KINDS:
+            raise ValueError(f"Invalid result kind: {kind!r}")
+        return self.directory / f"{job_id}.{kind}.gz"
+
+    def save(self, job_id: str, data: bytes, kind: str = "md") -> int:
+        """Compress and write a result atomically; returns the compressed size."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path(job_id, kind)
+        # mtime=0 keeps the bytes (and so any ETag a proxy derives) deterministic.
+        compressed = gzip.compress(data, compresslevel=self.compresslevel, mtime=0)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, target)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+        return len(compressed)
+
+    @contextmanager
+    def writer(self, job_id: str, kind: str = "md") -> Iterator[BinaryIO]:
+        """
+        Stream a result into the store: yields a binary file that compresses
+        what is written to it. The result appears atomically when the block
+        exits cleanly and is discarded if it raises.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        target = self.path(job_id, kind)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                filename="", mode="wb", fileobj=raw, compresslevel=self.compresslevel, mtime=0
+            ) as compressed:
+                yield compressed
+            os.replace(tmp_path, target)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+    def size(self, job_id: str, kind: str = "md") -> int:
+        """Compressed size of a stored result."""
+        return self.path(job_id, kind).stat().st_size
+
+    def exists(self, job_id: str, kind: str = "md") -> bool:
+        return self.path(job_id, kind).is_file()
+
+    def iter_decompressed(self, job_id: str, chunk_size: int = RESULT_CHUNK_SIZE) -> Iterator[bytes]:
+        with gzip.open(self.path(job_id), "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+
+    def read(self, job_id: str, kind: str = "md") -> bytes:
+        with gzip.open(self.path(job_id, kind), "rb") as f:
+            return f.read()
+
+    def delete(self, job_ids: Iterable[str]) -> None:
+        """Delete every artifact kind kept for ``job_ids``."""
+        for job_id in job_ids:
+            try:
+                for kind in RESULT_KINDS:
+                    self.path(job_id, kind).unlink(missing_ok=True)
+            except (OSError, ValueError) as e:
+                logger.warning("Could not delete job result job_id=%s err=%s", job_id, e)
+
+    def sweep(self, max_age_seconds: int) -> List[str]:
+        """
+        Delete result files older than ``max_age_seconds`` (orphans from
+        restarts), and partial writes left behind by killed workers.
+        """
+        if not self.directory.is_dir():
+            return []
+        cutoff = time.time() - max_age_seconds
+        for path in self.directory.glob("*.tmp"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+        removed = []
+        for kind in RESULT_KINDS:
+            for path in self.directory.glob(f"*.{kind}.gz"):
+                try:
+                    if path.stat().st_mtime < cutoff:
+                        path.unlink()
+                        job_id = path.name[: -len(f".{kind}.gz")]
+                        if job_id not in removed:
+                            removed.append(job_id)
+                except OSError:
+                    continue
+        return removed
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip; an explicit gzip entry beats ``*``."""
+    qualities = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        quality = 1.0
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        qualities[coding] = quality
+    return qualities.get("gzip", qualities.get("*", 0.0)) > 0
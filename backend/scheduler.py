@@ -0,0 +1,178 @@
+"""
+Fair-share scheduling of conversion worker slots.
+
+Jobs wait for one of ``slots`` workers keyed by their owner (session user,
+API token user or client address). Owners are served by deficit round robin
+weighted by upload size, so one user's bulk uploads can't hold every worker
+while others wait. Files up to ``priority_max_bytes`` wait in a priority
+lane that is served first; after ``priority_burst`` priority grants in a row
+one bulk job goes ahead so bulk work still drains.
+
+A slot is held until its ``async with`` block exits, or longer if the
+holder hands it work that outlives the block (``keep_until``): a timed-out
+conversion thread can't be stopped, so it keeps its slot until it returns.
+
+The scheduler only orders work inside this API process; queue admission
+across processes stays in the job store.
+"""
+
+import asyncio
+import os
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict, List, Optional
+
+CONVERSION_FAIR_QUANTUM_BYTES = int(os.getenv("CONVERSION_FAIR_QUANTUM_BYTES", str(1024 * 1024)))
+CONVERSION_PRIORITY_MAX_BYTES = int(os.getenv("CONVERSION_PRIORITY_MAX_BYTES", str(256 * 1024)))
+CONVERSION_PRIORITY_BURST = int(os.getenv("CONVERSION_PRIORITY_BURST", "4"))
+
+
+class _Waiter:
+    __slots__ = ("owner", "cost", "future", "granted")
+
+    def __init__(self, owner: str, cost: int, future: asyncio.Future):
+        self.owner = owner
+        self.cost = cost
+        self.future = future
+        self.granted = False
+
+
+class Slot:
+    """A granted worker slot, released once its holder and anything it keeps running are done."""
+
+    __slots__ = ("pending",)
+
+    def __init__(self):
+        self.pending: List[asyncio.Future] = []
+
+    def keep_until(self, future: asyncio.Future) -> None:
+        """Hold the slot past the end of the ``async with`` block until ``future`` is done."""
+        self.pending.append(future)
+
+
+class _DeficitRoundRobin:
+    """Per-owner FIFO queues served in deficit round robin order."""
+
+    def __init__(self, quantum: int):
+        self.quantum = max(quantum, 1)
+        self._queues: Dict[str, Deque[_Waiter]] = {}
+        self._deficit: Dict[str, int] = {}
+        self._order: Deque[str] = deque()
+        self.size = 0
+
+    def push(self, waiter: _Waiter) -> None:
+        queue = self._queues.get(waiter.owner)
+        if queue is None:
+            queue = self._queues[waiter.owner] = deque()
+            self._deficit[waiter.owner] = 0
+            self._order.append(waiter.owner)
+        queue.append(waiter)
+        self.size += 1
+
+    def remove(self, waiter: _Waiter) -> bool:
+        queue = self._queues.get(waiter.owner)
+        if queue is None or waiter not in queue:
+            return False
+        queue.remove(waiter)
+        self.size -= 1
+        if not queue:
+            self._drop(waiter.owner)
+        return True
+
+    def pop(self) -> Optional[_Waiter]:
+        while self._order:
+            owner = self._order[0]
+            queue = self._queues[owner]
+            head = queue[0]
+            if self._deficit[owner] >= head.cost:
+                self._deficit[owner] -= head.cost
+                queue.popleft()
+                self.size -= 1
+                if not queue:
+                    self._drop(owner)
+                return head
+            if len(self._order) == 1:
+                # Nobody to rotate to: top up in whole rounds at once.
+                shortfall = head.cost - self._deficit[owner]
+                self._deficit[owner] += -(-shortfall // self.quantum) * self.quantum
+                continue
+            self._deficit[owner] += self.quantum
+            self._order.rotate(-1)
+        return None
+
+    def _drop(self, owner: str) -> None:
+        del self._queues[owner]
+        del self._deficit[owner]
+        self._order.remove(owner)
+
+
+class FairScheduler:
+    """Hands out ``slots`` worker slots fairly across owners."""
+
+    def __init__(
+        self,
+        slots: int,
+        quantum_bytes: int = CONVERSION_FAIR_QUANTUM_BYTES,
+        priority_max_bytes: int = CONVERSION_PRIORITY_MAX_BYTES,
+        priority_burst: int = CONVERSION_PRIORITY_BURST,
+    ):
+        self.slots = max(slots, 1)
+        self.priority_max_bytes = priority_max_bytes
+        self.priority_burst = max(priority_burst, 1)
+        self._free = self.slots
+        self._priority = _DeficitRoundRobin(quantum_bytes)
+        self._bulk = _DeficitRoundRobin(quantum_bytes)
+        self._priority_streak = 0
+
+    @property
+    def waiting(self) -> int:
+        return self._priority.size + self._bulk.size
+
+    @asynccontextmanager
+    async def slot(self, owner: str, cost: int) -> AsyncIterator[Slot]:
+        await self.acquire(owner, cost)
+        held = Slot()
+        try:
+            yield held
+        finally:
+            pending = [future for future in held.pending if not future.done()]
+            if pending:
+                done = asyncio.gather(*pending, return_exceptions=True)
+                done.add_done_callback(lambda _: self.release())
+            else:
+                self.release()
+
+    async def acquire(self, owner: str, cost: int) -> None:
+        if self._free > 0 and not self.waiting:
+            self._free -= 1
+            return
+        waiter = _Waiter(owner, max(cost, 1), asyncio.get_running_loop().create_future())
+        lane = self._priority if cost <= self.priority_max_bytes else self._bulk
+        lane.push(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            lane.remove(waiter)
+            if waiter.granted:
+                # Granted a slot just before being cancelled: hand it on.
+                self.release()
+            raise
+
+    def release(self) -> None:
+        self._free += 1
+        while self._free > 0:
+            waiter = self._next()
+            if waiter is None:
+                break
+            if waiter.future.done():
+                continue
+            waiter.granted = True
+            self._free -= 1
+            waiter.future.set_result(None)
+
+    def _next(self) -> Optional[_Waiter]:
+        if self._priority.size and (not self._bulk.size or self._priority_streak < self.priority_burst):
+            self._priority_streak += 1
+            return self._priority.pop()
+        self._priority_streak = 0
+        return self._bulk.pop()
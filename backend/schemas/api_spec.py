@@ -32,6 +32,10 @@ class SpecCreate(BaseModel):
     original_content: str = Field(..., min_length=1)
     markdown_content: str = Field(..., min_length=1)
     token_count: Optional[int] = Field(None, ge=0)
+    chunks_json: Optional[str] = None
+    tools_json: Optional[str] = None
+    content_hash: Optional[str] = Field(None, max_length=64)
+    markdown_source: Optional[str] = Field(None, pattern='^(converter|client)$')
     uploaded_by: Optional[str] = Field(None, max_length=255)
     file_size_bytes: Optional[int] = Field(None, ge=0)
     tags: Optional[List[str]] = Field(default_factory=list)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Calibrate the fast token estimator against tiktoken.
+
+Converts every spec in ../examples (whole documents plus their manifest, tag,
+endpoint and schema chunks) and the example markdown files, counts each text
+exactly with tiktoken and fits the coefficients of
+``token_counter.estimate_tokens_fast`` by least squares on relative error.
+
+Usage (from backend/, needs the tiktoken ranks, i.e. network or a warm
+TIKTOKEN_CACHE_DIR):
+
+    python scripts/calibrate_token_estimator.py [--model gpt-4]
+
+Paste the printed coefficients into token_counter.FAST_ESTIMATE_COEFFICIENTS
+and the printed bound into FAST_ESTIMATE_MAX_ERROR.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+
+import token_counter  # noqa: E402
+from transformation import OpenAPIToMarkdown  # noqa: E402
+
+EXAMPLES_DIR = BACKEND_DIR.parent / "examples"
+SPEC_SUFFIXES = {".yaml", ".yml", ".json", ".raml", ".apib", ".wsdl", ".graphql", ".gql"}
+# Texts shorter than this are too noisy to bound (and too cheap to matter).
+MIN_BOUND_TOKENS = 100
+
+
+def load_corpus() -> Dict[str, str]:
+    corpus: Dict[str, str] = {}
+    for path in sorted(EXAMPLES_DIR.iterdir()):
+        if path.suffix.lower() == ".md":
+            corpus[path.name] = path.read_text(encoding="utf-8")
+        elif path.suffix.lower() in SPEC_SUFFIXES:
+            try:
+                converter = OpenAPIToMarkdown(str(path))
+                corpus[path.name] = converter.convert()
+                chunked = converter.convert_chunked()
+            except Exception as e:
+                print(f"skipping {path.name}: {e}", file=sys.stderr)
+                continue
+            corpus[f"{path.name}:manifest"] = chunked["manifest"]
+            for section in ("tags", "endpoints", "schemas"):
+                for key, text in chunked[section].items():
+                    corpus[f"{path.name}:{section}:{key}"] = text
+    return {name: text for name, text in corpus.items() if text}
+
+
+def solve(matrix: List[List[float]], vector: List[float]) -> List[float]:
+    """Solve a small dense linear system by Gaussian elimination."""
+    size = len(vector)
+    rows = [row[:] + [value] for row, value in zip(matrix, vector)]
+    for col in range(size):
+        pivot = max(range(col, size), key=lambda r: abs(rows[r][col]))
+        rows[col], rows[pivot] = rows[pivot], rows[col]
+        for r in range(size):
+            if r != col and rows[r][col]:
+                factor = rows[r][col] / rows[col][col]
+                rows[r] = [a - factor * b for a, b in zip(rows[r], rows[col])]
+    return [rows[i][size] / rows[i][i] for i in range(size)]
+
+
+def fit(features: Sequence[Sequence[float]], counts: Sequence[int]) -> List[float]:
+    """Weighted least squares (weights 1/count) with an intercept first."""
+    size = len(features[0]) + 1
+    normal = [[0.0] * size for _ in range(size)]
+    rhs = [0.0] * size
+    for row, count in zip(features, counts):
+        x = [1.0, *row]
+        weight = 1.0 / max(count, 1) ** 2
+        for i in range(size):
+            rhs[i] += weight * x[i] * count
+            for j in range(size):
+                normal[i][j] += weight * x[i] * x[j]
+    return solve(normal, rhs)
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--model", default=token_counter.TOKEN_COUNT_MODEL)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    encoding = token_counter.get_encoding(args.model)
+    names = list(corpus)
+    counts = [len(tokens) for tokens in encoding.encode_ordinary_batch([corpus[n] for n in names])]
+    features = [token_counter.fast_estimate_features(corpus[n]) for n in names]
+    coefficients = fit(features, counts)
+
+    errors = []
+    for name, row, count in zip(names, features, counts):
+        estimate = coefficients[0] + sum(c * f for c, f in zip(coefficients[1:], row))
+        if count >= MIN_BOUND_TOKENS:
+            errors.append(abs(estimate - count) / count)
+
+    print(f"texts: {len(names)} ({len(errors)} with >= {MIN_BOUND_TOKENS} tokens)")
+    print(f"FAST_ESTIMATE_COEFFICIENTS = ({', '.join(f'{c:.4f}' for c in coefficients)})")
+    print(
+        f"relative error: mean {sum(errors) / len(errors):.3f}, "
+        f"p95 {percentile(errors, 0.95):.3f}, max {max(errors):.3f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Tests for upload cost estimates and the EWMA cost model behind admission.
+
+Run:  cd backend && pytest tests/test_admission.py -v
+"""
+
+import json
+from pathlib import Path
+import pytest
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from admission import (
+    CostModel,
+    RETRY_AFTER_MAX_SECONDS,
+    estimate_cost_units,
+    prescan_spec,
+    retry_after_seconds,
+)
+
+YAML_SPEC = """openapi: 3.0.0
+info:
+  title: Scan
+  version: '1'
+paths:
+  /items:
+    get:
+      responses: {}
+    post:
+      responses: {}
+  "/items/{id}":
+    delete:
+      responses: {}
+"""
+
+GRAPHQL_SPEC = """type Query {
+  items(first: Int): [Item]
+  item(id: ID!): Item
+}
+
+type Item {
+  id: ID!
+}
+"""
+
+
+class TestPrescan:
+    def test_yaml(self, tmp_path):
+        path = tmp_path / "spec.yaml"
+        path.write_text(YAML_SPEC)
+        assert prescan_spec(str(path), "yaml") == {"paths": 2, "operations": 3}
+
+    def test_minified_json(self, tmp_path):
+        spec = {"paths": {"/a": {"get": {}, "put": {}}, "/b": {"post": {}}}}
+        path = tmp_path / "spec.json"
+        path.write_text(json.dumps(spec, separators=(",", ":")))
+        assert prescan_spec(str(path), "json") == {"paths": 2, "operations": 3}
+
+    def test_graphql(self, tmp_path):
+        path = tmp_path / "schema.graphql"
+        path.write_text(GRAPHQL_SPEC)
+        assert prescan_spec(str(path), "graphql") == {"paths": 2, "operations": 3}
+
+
+class TestCostModel:
+    def test_units_grow_with_size_and_operations(self):
+        small = estimate_cost_units(1024, "yaml", {"operations": 2})
+        large = estimate_cost_units(4 * 1024 * 1024, "yaml", {"operations": 400})
+        assert small < 2 < large
+        assert estimate_cost_units(1024, "graphql", {"operations": 2}) < small
+
+    def test_default_until_observed(self):
+        model = CostModel(alpha=0.5, default_seconds_per_unit=0.25)
+        assert model.estimate_seconds(4) == 1.0
+        model.observe(0, {"convert_ms": 1000})
+        assert model.stage_rates() == {}
+
+    def test_ewma_over_stages(self):
+        model = CostModel(alpha=0.5, default_seconds_per_unit=0.25)
+        model.observe(2, {"convert_ms": 400, "token_ms": 200, "read_ms": 999})
+        assert model.stage_rates() == {"convert_ms": 200, "token_ms": 100}
+        model.observe(2, {"convert_ms": 800, "token_ms": 200})
+        assert model.stage_rates() == {"convert_ms": 300, "token_ms": 100}
+        assert model.estimate_seconds(10) == pytest.approx(4.0)
+
+    @pytest.mark.parametrize("excess,workers,expected", [
+        (0, 1, 1),
+        (9.2, 1, 10),
+        (9.2, 2, 5),
+        (10_000, 1, RETRY_AFTER_MAX_SECONDS),
+    ])
+    def test_retry_after(self, excess, workers, expected):
+        assert retry_after_seconds(excess, workers) == expected
@@ -8,6 +8,7 @@ Run:  cd backend && pytest tests/test_auth_and_mcp.py -v
 """
 
 import hashlib
+import json
 import os
 import secrets
 import sys
@@ -49,6 +50,7 @@ _dbmod.IS_SQLITE = True
 
 from models.user import User, ApiToken  # noqa: E402
 from models.api_spec import ApiSpec, Tag  # noqa: E402
+import crud  # noqa: E402
 
 # Create tables
 Base.metadata.create_all(bind=_test_engine)
@@ -357,6 +359,784 @@ class TestMarketplaceAdminDelete:
         assert r.json()["id"] == spec_id
 
 
+class TestStoredSpecArtifacts:
+    """Chunks and tool schemas are served from stored artifacts, not reconverted."""
+
+    SPEC_YAML = (
+        "openapi: '3.0.0'\n"
+        "info:\n  title: ArtifactAPI\n  version: 1.0.0\n"
+        "paths:\n"
+        "  /ping:\n"
+        "    get:\n"
+        "      operationId: ping\n"
+        "      responses:\n"
+        "        '200': {description: OK}\n"
+    )
+
+    @pytest.fixture(autouse=True)
+    def _offline_token_counts(self, monkeypatch):
+        import utils
+        monkeypatch.setattr(utils, "estimate_token_count", lambda text, model="gpt-4": len(text))
+        monkeypatch.setattr(utils, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+
+    def _seed_spec(self, version, **columns):
+        db = _TestSession()
+        spec = ApiSpec(
+            name="ArtifactAPI",
+            version=version,
+            original_format="yaml",
+            original_content=self.SPEC_YAML,
+            markdown_content="# ArtifactAPI",
+            **columns,
+        )
+        db.add(spec)
+        db.commit()
+        sid = spec.id
+        db.close()
+        return sid
+
+    def _stored(self, spec_id):
+        db = _TestSession()
+        spec = db.query(ApiSpec).filter(ApiSpec.id == spec_id).first()
+        db.close()
+        return spec
+
+    def test_chunks_filled_on_first_read(self):
+        spec_id = self._seed_spec("1.0.0")
+        r = client.get(f"/api/specs/{spec_id}/chunks")
+        assert r.status_code == 200
+        body = r.json()
+        assert "ping" in body["endpoints"]
+        assert body["token_counts"]["endpoints"]["ping"] == len(body["endpoints"]["ping"])
+        stored = self._stored(spec_id)
+        assert stored.chunks_json == r.text
+        assert stored.tools_json is not None
+
+    def test_tools_served_verbatim_from_storage(self):
+        spec_id = self._seed_spec("2.0.0", chunks_json="{}", tools_json='[{"name":"stored"}]')
+        r = client.get(f"/api/specs/{spec_id}/tools")
+        assert r.status_code == 200
+        assert r.json() == [{"name": "stored"}]
+
+    def test_backfill_populates_existing_rows(self):
+        import asyncio
+        from main import backfill_spec_artifacts
+
+        spec_id = self._seed_spec("3.0.0")
+        asyncio.run(backfill_spec_artifacts())
+        stored = self._stored(spec_id)
+        assert json.loads(stored.tools_json)[0]["name"] == "ping"
+        assert "ping" in json.loads(stored.chunks_json)["token_counts"]["endpoints"]
+
+
+def _wait_for_job(c, job_id, timeout=10.0):
+    import time
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        body = c.get(f"/api/convert/{job_id}").json()
+        if body["status"] in {"completed", "failed"}:
+            return body
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestConversionJobs:
+    """Queued /api/convert jobs run to completion and serve their result."""
+
+    @pytest.fixture(autouse=True)
+    def _offline_token_counts(self, monkeypatch):
+        import utils
+        monkeypatch.setattr(utils, "estimate_token_count", lambda text, model="gpt-4": len(text))
+        monkeypatch.setattr(utils, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+
+    @pytest.mark.parametrize("store_kind", ["memory", "sql"])
+    def test_convert_job_completes_and_downloads(self, store_kind, monkeypatch, tmp_path):
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, store_kind))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("jobs.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+            )
+            assert r.status_code == 202
+            job_id = r.json()["job_id"]
+
+            status = _wait_for_job(c, job_id)
+            assert status["status"] == "completed", status["error"]
+            assert status["timings"]["executor"] == "thread"
+            assert status["timings"]["job_store"] == store_kind
+
+            assert (tmp_path / f"{job_id}.md.gz").is_file()
+
+            d = c.get(f"/api/convert/{job_id}/download")
+            assert d.status_code == 200
+            assert d.headers["Content-Encoding"] == "gzip"
+            assert "ENDPOINT: [GET] /ping" in d.text
+            assert d.headers["X-Token-Count"] == str(len(d.text))
+            assert "artifactapi-v1.0.0.md" in d.headers["Content-Disposition"]
+
+            plain = c.get(
+                f"/api/convert/{job_id}/download", headers={"Accept-Encoding": "identity"}
+            )
+            assert plain.status_code == 200
+            assert "Content-Encoding" not in plain.headers
+            assert plain.text == d.text
+            assert plain.headers["Content-Length"] == str(len(d.content))
+
+    def test_small_upload_is_answered_inline(self, monkeypatch, tmp_path):
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert?save_to_db=false",
+                files={"file": ("jobs.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+                headers={"Accept-Encoding": "identity"},
+            )
+            assert r.status_code == 200
+            assert "ENDPOINT: [GET] /ping" in r.text
+            assert r.headers["X-Token-Count"] == str(len(r.text))
+            assert "convert_ms" in json.loads(r.headers["X-Stage-Timings"])
+            assert "artifactapi-v1.0.0.md" in r.headers["Content-Disposition"]
+            job_id = r.headers["X-Job-Id"]
+
+            # The job behind it stays downloadable, and a repeat upload is served inline too.
+            assert c.get(f"/api/convert/{job_id}/download").text == r.text
+            again = c.post(
+                "/api/convert?save_to_db=false",
+                files={"file": ("jobs.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+            )
+            assert again.status_code == 200
+            assert again.headers["X-Job-Id"] == job_id
+            assert again.text == r.text
+
+    def test_inline_falls_back_to_job_when_slow_or_large(self, monkeypatch, tmp_path):
+        import time
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        monkeypatch.setattr(main, "CONVERSION_INLINE_WAIT_SECONDS", 0.2)
+        original = main.convert_spec_file
+
+        def slow_convert(path, *args):
+            time.sleep(0.5)
+            return original(path, *args)
+
+        monkeypatch.setattr(main, "convert_spec_file", slow_convert)
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert?save_to_db=false",
+                files={"file": ("slow.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+            )
+            assert r.status_code == 202
+            assert _wait_for_job(c, r.json()["job_id"])["status"] == "completed"
+
+            monkeypatch.setattr(main, "CONVERSION_INLINE_MAX_BYTES", 10)
+            spec = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", "LargeAPI")
+            r = c.post(
+                "/api/convert?save_to_db=false",
+                files={"file": ("large.yaml", spec, "application/x-yaml")},
+            )
+            assert r.status_code == 202
+
+    def test_per_user_queue_limit(self, monkeypatch, tmp_path):
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        monkeypatch.setattr(main, "CONVERSION_MAX_QUEUE_PER_USER", 1)
+
+        async def never_runs(**kwargs):
+            Path(kwargs["temp_input_path"]).unlink(missing_ok=True)
+
+        monkeypatch.setattr(main, "process_conversion_job", never_runs)
+        db = _TestSession()
+        user = _make_user(db)
+        raw_token, _ = _create_db_token(db, user.id)
+        user_id = user.id
+        db.close()
+
+        def upload(c, name, **kwargs):
+            spec = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", name)
+            return c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": (f"{name}.yaml", spec, "application/x-yaml")},
+                **kwargs,
+            )
+
+        with TestClient(app) as c:
+            assert upload(c, "First").status_code == 202
+            limited = upload(c, "Second")
+            assert limited.status_code == 429
+            assert int(limited.headers["Retry-After"]) >= 1
+
+            # The session user and their API token share one owner.
+            c.cookies.set("session", _mint_jwt(user_id))
+            assert upload(c, "Third").status_code == 202
+            c.cookies.clear()
+            token_upload = upload(c, "Fourth", headers={"Authorization": f"Bearer {raw_token}"})
+            assert token_upload.status_code == 429
+
+    def test_anonymous_clients_behind_a_trusted_proxy_are_separate_owners(self, monkeypatch, tmp_path):
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        monkeypatch.setattr(main, "CONVERSION_MAX_QUEUE_PER_USER", 1)
+
+        async def never_runs(**kwargs):
+            Path(kwargs["temp_input_path"]).unlink(missing_ok=True)
+
+        monkeypatch.setattr(main, "process_conversion_job", never_runs)
+
+        def upload(c, name, forwarded_for):
+            spec = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", name)
+            return c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": (f"{name}.yaml", spec, "application/x-yaml")},
+                headers={"X-Forwarded-For": forwarded_for},
+            )
+
+        # The default FORWARDED_ALLOW_IPS trusts a proxy on 127.0.0.1.
+        with TestClient(app, client=("127.0.0.1", 50000)) as proxy:
+            assert upload(proxy, "ViaProxyA", "203.0.113.1").status_code == 202
+            assert upload(proxy, "ViaProxyB", "203.0.113.2").status_code == 202
+            assert upload(proxy, "ViaProxyA2", "203.0.113.1").status_code == 429
+
+        # Anyone else can't pick their owner by sending the header.
+        with TestClient(app, client=("198.51.100.7", 50000)) as direct:
+            assert upload(direct, "Direct", "203.0.113.3").status_code == 202
+            assert upload(direct, "Spoofed", "203.0.113.4").status_code == 429
+
+    def test_queue_budget_sets_retry_after_from_estimates(self, monkeypatch, tmp_path):
+        import main
+        from admission import CostModel
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        monkeypatch.setattr(main, "cost_model", CostModel(default_seconds_per_unit=20.0))
+        monkeypatch.setattr(main, "CONVERSION_QUEUE_BUDGET_SECONDS", 30.0)
+
+        async def never_runs(**kwargs):
+            Path(kwargs["temp_input_path"]).unlink(missing_ok=True)
+
+        monkeypatch.setattr(main, "process_conversion_job", never_runs)
+
+        def upload(c, name):
+            spec = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", name)
+            return c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": (f"{name}.yaml", spec, "application/x-yaml")},
+            )
+
+        with TestClient(app) as c:
+            first = upload(c, "First")
+            assert first.status_code == 202
+            estimated = c.get(f"/api/convert/{first.json()['job_id']}").json()["estimated_seconds"]
+            assert estimated > 20
+
+            refused = upload(c, "Second")
+            assert refused.status_code == 503
+            # Two jobs' worth of work minus the budget must drain first.
+            assert int(refused.headers["Retry-After"]) >= 2 * estimated - 30
+
+    def test_cancel_queued_running_and_finished_jobs(self, monkeypatch, tmp_path):
+        import time
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        original = main.convert_spec_file
+
+        def slow_convert(path, *args):
+            if "SlowAPI" in Path(path).read_text():
+                time.sleep(1.0)
+            return original(path, *args)
+
+        monkeypatch.setattr(main, "convert_spec_file", slow_convert)
+
+        def upload(c, name):
+            spec = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", name)
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": (f"{name}.yaml", spec, "application/x-yaml")},
+            )
+            assert r.status_code == 202
+            return r.json()["job_id"]
+
+        with TestClient(app) as c:
+            assert c.delete("/api/convert/missing").status_code == 404
+
+            running = upload(c, "SlowAPI")
+            queued = upload(c, "QueuedAPI")
+            deadline = time.monotonic() + 5
+            while c.get(f"/api/convert/{running}").json()["status"] != "processing":
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+
+            # Another user who uploaded the same bytes shares the job but can't cancel it.
+            db = _TestSession()
+            other = {"session": _mint_jwt(_make_user(db).id)}
+            db.close()
+            assert c.delete(f"/api/convert/{queued}", cookies=other).status_code == 403
+
+            cancelled = c.delete(f"/api/convert/{queued}")
+            assert cancelled.status_code == 200
+            assert cancelled.json()["stage"] == "cancelled"
+            assert cancelled.json()["failed_stage"] == "waiting_worker"
+
+            r = c.delete(f"/api/convert/{running}")
+            assert r.status_code == 200
+            assert r.json()["failed_stage"] == "convert"
+            status = _wait_for_job(c, running)
+            assert status["status"] == "failed"
+            assert status["error"] == "Cancelled by client"
+
+            done = upload(c, "DoneAPI")
+            assert _wait_for_job(c, done)["status"] == "completed"
+            assert c.delete(f"/api/convert/{done}").status_code == 409
+            # The cancelled job never overwrote its cancellation.
+            time.sleep(1.2)
+            assert c.get(f"/api/convert/{running}").json()["stage"] == "cancelled"
+
+    def test_job_over_time_budget_fails_with_its_stage(self, monkeypatch, tmp_path):
+        import time
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        from scheduler import FairScheduler
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        monkeypatch.setattr(main, "worker_scheduler", FairScheduler(1))
+        monkeypatch.setattr(main, "CONVERSION_JOB_TIMEOUT_SECONDS", 0.1)
+
+        def late_convert(path, results, job_id, *args):
+            time.sleep(0.5)
+            results.save(job_id, b"too late")
+
+        monkeypatch.setattr(main, "convert_spec_file", late_convert)
+
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("slow.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+            )
+            job_id = r.json()["job_id"]
+            status = _wait_for_job(c, job_id)
+            # The thread can't be stopped: it keeps its worker slot until it returns...
+            assert main.worker_scheduler._free == 0
+            deadline = time.monotonic() + 5
+            while main.worker_scheduler._free == 0:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            time.sleep(0.1)
+            # ...and its late result is dropped.
+            assert not main.result_store.exists(job_id)
+        assert status["status"] == "failed"
+        assert status["failed_stage"] == "convert"
+        assert "0.1s time budget in stage convert" in status["error"]
+
+    def test_lone_job_gets_render_workers(self, monkeypatch, tmp_path):
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        monkeypatch.setattr(main, "CONVERSION_RENDER_WORKERS", 3)
+        seen = []
+        real_convert = main.convert_spec_file
+
+        def convert(path, results, job_id, render_workers=1):
+            seen.append(render_workers)
+            return real_convert(path, results, job_id, render_workers)
+
+        monkeypatch.setattr(main, "convert_spec_file", convert)
+
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("jobs.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+            )
+            assert _wait_for_job(c, r.json()["job_id"])["status"] == "completed"
+        assert seen == [3]
+
+        # A job that shares the queue with another one renders serially.
+        monkeypatch.setitem(main.running_jobs, "this-job", None)
+        monkeypatch.setitem(main.running_jobs, "other-job", None)
+        assert main.render_workers() == 1
+
+    def test_events_stream_ends_with_completed_result(self, monkeypatch, tmp_path):
+        import main
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+
+        with TestClient(app) as c:
+            assert c.get("/api/convert/missing/events").status_code == 404
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("jobs.yaml", TestStoredSpecArtifacts.SPEC_YAML, "application/x-yaml")},
+            )
+            job_id = r.json()["job_id"]
+
+            events = []
+            with c.stream("GET", f"/api/convert/{job_id}/events?include_result=true") as stream:
+                assert stream.headers["content-type"].startswith("text/event-stream")
+                event = None
+                for line in stream.iter_lines():
+                    if line.startswith("event: "):
+                        event = line[len("event: "):]
+                    elif line.startswith("data: "):
+                        events.append((event, json.loads(line[len("data: "):])))
+
+        assert all(name == "status" for name, _ in events[:-1])
+        name, final = events[-1]
+        assert name == "completed"
+        assert final["job_id"] == job_id
+        assert "ENDPOINT: [GET] /ping" in final["markdown"]
+
+
+class TestBatchConversion:
+    """/api/convert/batch fans specs out as jobs and returns their results as one zip."""
+
+    @pytest.fixture(autouse=True)
+    def _isolated_jobs(self, monkeypatch, tmp_path):
+        import main
+        import utils
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(utils, "estimate_token_count", lambda text, model="gpt-4": len(text))
+        monkeypatch.setattr(utils, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 20, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+
+    def _spec(self, name):
+        return TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", name)
+
+    def _wait_for_batch(self, c, batch_id, timeout=10.0):
+        import time
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            body = c.get(f"/api/convert/batch/{batch_id}").json()
+            if body["status"] in ("completed", "partial", "failed"):
+                return body
+            time.sleep(0.02)
+        raise AssertionError(f"batch {batch_id} did not finish")
+
+    def test_zip_batch_completes_and_downloads_as_zip(self):
+        import io
+        import zipfile
+        archive = io.BytesIO()
+        with zipfile.ZipFile(archive, "w") as z:
+            z.writestr("specs/alpha.yaml", self._spec("AlphaAPI"))
+            z.writestr("specs/beta.yml", self._spec("BetaAPI"))
+            z.writestr("specs/notes.txt", "not a spec")
+            z.writestr("__MACOSX/._alpha.yaml", "junk")
+
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert/batch?save_to_db=false",
+                files={"files": ("specs.zip", archive.getvalue(), "application/zip")},
+            )
+            assert r.status_code == 202
+            body = r.json()
+            assert [job["file_name"] for job in body["jobs"]] == ["alpha.yaml", "beta.yml"]
+            assert body["rejected"] == [{"file_name": "notes.txt", "error": "Unsupported file type"}]
+
+            status = self._wait_for_batch(c, body["batch_id"])
+            assert status["status"] == "completed"
+            assert status["counts"] == {"completed": 2}
+            assert all(job["batch_id"] == body["batch_id"] for job in status["jobs"])
+
+            d = c.get(f"/api/convert/batch/{body['batch_id']}/download")
+            assert d.status_code == 200
+            assert d.headers["content-type"] == "application/zip"
+            with zipfile.ZipFile(io.BytesIO(d.content)) as results:
+                names = sorted(results.namelist())
+                assert names == ["alphaapi-v1.0.0.md", "batch-summary.json", "betaapi-v1.0.0.md"]
+                assert "ENDPOINT: [GET] /ping" in results.read("alphaapi-v1.0.0.md").decode()
+                summary = json.loads(results.read("batch-summary.json"))
+                assert {job["status"] for job in summary["jobs"]} == {"completed"}
+
+    def test_multiple_files_and_failed_items(self):
+        import io
+        import zipfile
+        same = self._spec("SameAPI")
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert/batch?save_to_db=false",
+                files=[
+                    ("files", ("one.yaml", same, "application/x-yaml")),
+                    ("files", ("two.yaml", same + "\n# copy\n", "application/x-yaml")),
+                    ("files", ("broken.json", "{not json", "application/json")),
+                ],
+            )
+            assert r.status_code == 202
+            batch_id = r.json()["batch_id"]
+            status = self._wait_for_batch(c, batch_id)
+            assert status["status"] == "partial"
+            assert status["counts"] == {"completed": 2, "failed": 1}
+
+            d = c.get(f"/api/convert/batch/{batch_id}/download")
+            with zipfile.ZipFile(io.BytesIO(d.content)) as results:
+                assert sorted(results.namelist()) == [
+                    "batch-summary.json", "sameapi-v1.0.0-2.md", "sameapi-v1.0.0.md",
+                ]
+
+    def test_batch_of_failed_items_reports_failed(self):
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert/batch?save_to_db=false",
+                files=[
+                    ("files", ("broken.json", "{not json", "application/json")),
+                    ("files", ("also-broken.json", "[1,", "application/json")),
+                ],
+            )
+            assert r.status_code == 202
+            status = self._wait_for_batch(c, r.json()["batch_id"])
+            assert status["status"] == "failed"
+            assert status["counts"] == {"failed": 2}
+
+    def test_rejects_empty_batch_and_unknown_ids(self):
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert/batch",
+                files={"files": ("readme.txt", "hello", "text/plain")},
+            )
+            assert r.status_code == 400
+            assert c.get("/api/convert/batch/missing").status_code == 404
+            assert c.get("/api/convert/batch/missing/download").status_code == 404
+
+    def test_batch_limit_leaves_single_uploads_admitted(self, monkeypatch):
+        import asyncio
+        import main
+        monkeypatch.setattr(main, "CONVERSION_MAX_BATCHES", 1)
+        monkeypatch.setattr(main, "CONVERSION_MAX_QUEUE", 1)
+        gate = asyncio.Event()
+        original = main.process_conversion_batch
+
+        async def held_batch(items):
+            await gate.wait()
+            await original(items)
+
+        monkeypatch.setattr(main, "process_conversion_batch", held_batch)
+        with TestClient(app) as c:
+            files = {"files": ("a.yaml", self._spec("HeldAPI"), "application/x-yaml")}
+            first = c.post("/api/convert/batch?save_to_db=false", files=files)
+            assert first.status_code == 202
+            second = c.post("/api/convert/batch?save_to_db=false", files=files)
+            assert second.status_code == 503
+            assert second.headers["Retry-After"] == "30"
+            assert c.get(f"/api/convert/batch/{first.json()['batch_id']}/download").status_code == 409
+
+            single = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("single.yaml", self._spec("SingleAPI"), "application/x-yaml")},
+            )
+            assert single.status_code == 202
+            assert _wait_for_job(c, single.json()["job_id"])["status"] == "completed"
+            c.portal.call(gate.set)
+            self._wait_for_batch(c, first.json()["batch_id"])
+
+
+class TestDuplicateUploads:
+    """Identical uploads reuse an existing job or a stored spec instead of converting."""
+
+    @pytest.fixture(autouse=True)
+    def _isolated_jobs(self, monkeypatch, tmp_path):
+        import main
+        import utils
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(utils, "estimate_token_count", lambda text, model="gpt-4": len(text))
+        monkeypatch.setattr(utils, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        self.conversions = 0
+        original = main.convert_spec_file
+
+        def counting_convert(path, *args):
+            self.conversions += 1
+            return original(path, *args)
+
+        monkeypatch.setattr(main, "convert_spec_file", counting_convert)
+
+    def _upload(self, c, content, name="dup.yaml", save_to_db="false"):
+        r = c.post(
+            f"/api/convert?save_to_db={save_to_db}&inline=false",
+            files={"file": (name, content, "application/x-yaml")},
+        )
+        assert r.status_code == 202
+        return r.json()
+
+    def test_second_upload_attaches_to_first_job(self):
+        spec = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", "DupAPI")
+        with TestClient(app) as c:
+            first = self._upload(c, spec)
+            _wait_for_job(c, first["job_id"])
+            second = self._upload(c, spec)
+            assert second["deduplicated"] is True
+            assert second["job_id"] == first["job_id"]
+            assert second["status"] == "completed"
+
+            # The same bytes uploaded as another format are converted again.
+            assert "deduplicated" not in self._upload(c, spec, name="dup.json")
+        assert self.conversions >= 1
+
+    def test_stored_spec_completes_job_without_converting(self):
+        import hashlib
+        content = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", "StoredAPI")
+        db = _TestSession()
+        spec = ApiSpec(
+            name="StoredAPI",
+            version="4.2.0",
+            original_format="yaml",
+            original_content=content,
+            markdown_content="# StoredAPI from the marketplace",
+            token_count=31,
+            content_hash=hashlib.sha256(content.encode()).hexdigest(),
+            markdown_source="converter",
+        )
+        db.add(spec)
+        db.commit()
+        spec_id = spec.id
+        db.close()
+
+        with TestClient(app) as c:
+            body = self._upload(c, content, save_to_db="true")
+            assert body["deduplicated"] is True
+            assert body["status"] == "completed"
+
+            status = c.get(f"/api/convert/{body['job_id']}").json()
+            assert status["marketplace_save_status"] == "exists"
+            assert status["marketplace_spec_id"] == str(spec_id)
+            assert status["token_count"] == 31
+
+            d = c.get(f"/api/convert/{body['job_id']}/download")
+            assert d.text == "# StoredAPI from the marketplace"
+            assert "storedapi-v4.2.0.md" in d.headers["Content-Disposition"]
+        assert self.conversions == 0
+
+    def test_client_shared_markdown_is_not_reused(self):
+        content = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", "SharedAPI")
+        with TestClient(app) as c:
+            shared = c.post(
+                "/api/specs/share",
+                files={"file": ("shared.yaml", content, "application/x-yaml")},
+                data={"markdown_content": "# Not what the converter wrote", "token_count": "7"},
+            )
+            assert shared.status_code == 200
+            assert shared.json()["status"] == "created"
+
+            body = self._upload(c, content)
+            assert "deduplicated" not in body
+            assert _wait_for_job(c, body["job_id"])["status"] == "completed"
+            d = c.get(f"/api/convert/{body['job_id']}/download")
+            assert "Not what the converter wrote" not in d.text
+            assert "SharedAPI" in d.text
+        assert self.conversions == 1
+
+    def test_backfill_records_content_hashes(self):
+        import hashlib
+        db = _TestSession()
+        db.add(ApiSpec(name="HashMe", version="1", original_content="a: 1", markdown_content="#"))
+        db.commit()
+        assert crud.backfill_content_hashes(db, limit=10) == 1
+        stored = db.query(ApiSpec).filter(ApiSpec.name == "HashMe").first()
+        assert stored.content_hash == hashlib.sha256(b"a: 1").hexdigest()
+        db.close()
+
+
+class TestShareConversionJob:
+    """A finished job is shared from its retained artifacts, without a re-upload."""
+
+    @pytest.fixture(autouse=True)
+    def _isolated_jobs(self, monkeypatch, tmp_path):
+        import main
+        import utils
+        from job_store import create_job_store
+        from result_store import ResultStore
+        monkeypatch.setattr(utils, "estimate_token_count", lambda text, model="gpt-4": len(text))
+        monkeypatch.setattr(utils, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+        monkeypatch.setattr(main, "job_store", create_job_store(60, 10, "memory"))
+        monkeypatch.setattr(main, "result_store", ResultStore(str(tmp_path)))
+        self.tmp_path = tmp_path
+        self.loads = 0
+        original = main.load_openapi_spec
+
+        def counting_load(*args, **kwargs):
+            self.loads += 1
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(main, "load_openapi_spec", counting_load)
+
+    def test_share_persists_job_artifacts(self):
+        content = TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", "ShareJobAPI").replace(
+            "paths:\n", "tags:\n  - name: health\npaths:\n"
+        )
+        with TestClient(app) as c:
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("share.yaml", content, "application/x-yaml")},
+            )
+            job_id = r.json()["job_id"]
+            status = _wait_for_job(c, job_id)
+            assert status["status"] == "completed", status["error"]
+            assert (self.tmp_path / f"{job_id}.src.gz").is_file()
+            markdown = c.get(f"/api/convert/{job_id}/download").text
+
+            shared = c.post(f"/api/convert/{job_id}/share", data={"provider_name": "Acme"})
+            assert shared.status_code == 200
+            body = shared.json()
+            assert body["status"] == "created"
+
+            db = _TestSession()
+            spec = db.query(ApiSpec).filter(ApiSpec.id == int(body["spec_id"])).first()
+            assert (spec.name, spec.version, spec.provider) == ("ShareJobAPI", "1.0.0", "Acme")
+            assert spec.original_content == content
+            assert spec.original_filename == "share.yaml"
+            assert spec.markdown_content == markdown
+            assert spec.token_count == len(markdown)
+            assert [tag.name for tag in spec.tags] == ["health"]
+            db.close()
+
+            chunks = c.get(f"/api/specs/{body['spec_id']}/chunks")
+            assert "ping" in chunks.json()["endpoints"]
+
+            again = c.post(f"/api/convert/{job_id}/share")
+            assert again.json() == {**again.json(), "status": "exists", "spec_id": body["spec_id"]}
+            assert c.get(f"/api/convert/{job_id}").json()["marketplace_spec_id"] == body["spec_id"]
+        assert self.loads == 0
+
+    def test_share_requires_a_completed_job_with_artifacts(self):
+        import main
+        with TestClient(app) as c:
+            assert c.post("/api/convert/missing/share").status_code == 404
+
+            r = c.post(
+                "/api/convert?save_to_db=false&inline=false",
+                files={"file": ("gone.yaml", TestStoredSpecArtifacts.SPEC_YAML.replace("ArtifactAPI", "GoneAPI"), "application/x-yaml")},
+            )
+            job_id = r.json()["job_id"]
+            _wait_for_job(c, job_id)
+            main.result_store.delete([job_id])
+            assert c.post(f"/api/convert/{job_id}/share").status_code == 404
+
+
 # ======================================================================
 # Part 3: MCP Server Auth
 # ======================================================================
@@ -416,6 +1196,14 @@ class TestMCPAuth:
 class TestMCPResourcesAndTools:
     """Call MCP resource/tool functions directly (they are plain Python)."""
 
+    @pytest.fixture(autouse=True)
+    def _offline_token_counts(self, monkeypatch):
+        import mcp_server
+        monkeypatch.setattr(mcp_server, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+        monkeypatch.setattr(
+            mcp_server, "estimate_token_count", lambda text, model="gpt-4", mode="exact": len(text)
+        )
+
     def _seed_spec(self):
         """Insert a minimal spec into the DB for resource tests."""
         db = _TestSession()
@@ -488,6 +1276,7 @@ class TestMCPResourcesAndTools:
         assert "conversion_id" in parsed
         assert parsed["source_type"] == "local"
         assert isinstance(parsed.get("token_count"), int)
+        assert parsed.get("token_count_mode") == "exact"
         assert parsed.get("token_threshold") == 4000
         assert isinstance(parsed.get("full_markdown"), str)
         assert "manifest" in parsed
@@ -497,6 +1286,14 @@ class TestMCPResourcesAndTools:
         assert first_chunk["type"] == first_chunk["chunk_type"]
         assert first_chunk["key"] == first_chunk["chunk_key"]
 
+    def test_fast_token_count_mode_is_opt_in_and_labelled(self, monkeypatch):
+        import json as _json
+        import mcp_server
+
+        monkeypatch.setattr(mcp_server, "MCP_TOKEN_COUNT_MODE", "fast")
+        parsed = _json.loads(mcp_server.convert_spec("openapi: '3.0.0'\ninfo: {title: Fast, version: '1'}\npaths: {}\n", "yaml"))
+        assert parsed["token_count_mode"] == "fast"
+
     def test_search_specs_tool(self):
         import json as _json
         from mcp_server import search_specs
@@ -570,6 +1367,65 @@ class TestMCPResourcesAndTools:
         assert "manifest" in parsed
         assert "ping" in parsed["chunk_content"]
 
+    def test_chunks_never_exceed_the_budget(self, monkeypatch):
+        import json as _json
+        import mcp_server
+        from mcp_server import convert_spec, get_chunk
+
+        monkeypatch.setattr(mcp_server, "MCP_CHUNK_TOKEN_BUDGET", 1500)
+        paths = "".join(
+            f"  /items/{i}:\n"
+            f"    get:\n"
+            f"      operationId: getItem{i}\n"
+            f"      summary: {'Fetch one item of the big collection ' * (8 if i == 0 else 1)}\n"
+            f"      tags: [items]\n"
+            f"      responses:\n"
+            f"        '200':\n"
+            f"          description: OK\n"
+            for i in range(30)
+        )
+        sample_yaml = "openapi: '3.0.0'\ninfo:\n  title: Budget\n  version: 1.0.0\npaths:\n" + paths
+        converted = _json.loads(convert_spec(sample_yaml, "yaml"))
+        assert converted["chunk_token_budget"] == 1500
+        index = converted["chunks_available"]
+        assert all(chunk["token_count"] <= 1500 for chunk in index)
+        # Small endpoints share chunks; the big tag summary is split in parts.
+        endpoint_chunks = [chunk for chunk in index if chunk["chunk_type"] == "endpoint"]
+        assert len(endpoint_chunks) < 30
+        assert [chunk["key"] for chunk in index if chunk["chunk_type"] == "tag"][:2] == ["items", "items#2"]
+
+        conversion_id = converted["conversion_id"]
+        for chunk in index:
+            fetched = _json.loads(get_chunk(conversion_id, "local", chunk["chunk_type"], chunk["chunk_key"]))
+            assert len(fetched["chunk_content"]) == fetched["token_count"] <= fetched["token_budget"]
+        # Any operationId resolves to the chunk holding it.
+        fetched = _json.loads(get_chunk(conversion_id, "local", "endpoint", "getItem7"))
+        assert "getItem7" in fetched["keys"]
+        assert "OPERATION_ID: getItem7" in fetched["chunk_content"]
+
+    def test_zero_budget_serves_one_chunk_per_entry(self, monkeypatch):
+        import json as _json
+        import mcp_server
+        from mcp_server import convert_spec, get_chunk
+
+        monkeypatch.setattr(mcp_server, "MCP_CHUNK_TOKEN_BUDGET", 0)
+        sample_yaml = (
+            "openapi: '3.0.0'\n"
+            "info:\n  title: NoBudget\n  version: 1.0.0\n"
+            "paths:\n"
+            "  /ping:\n"
+            "    get:\n"
+            "      operationId: ping\n"
+            "      responses:\n"
+            "        '200':\n"
+            "          description: pong\n"
+        )
+        converted = _json.loads(convert_spec(sample_yaml, "yaml"))
+        assert converted["chunk_token_budget"] is None
+        assert "token_count" not in converted["chunks_available"][0]
+        parsed = _json.loads(get_chunk(converted["conversion_id"], "local", "endpoint", "ping"))
+        assert parsed["chunk_key"] == "ping" and "part" not in parsed
+
     def test_convert_spec_to_tools(self):
         import json as _json
         from mcp_server import convert_spec_to_tools
@@ -0,0 +1,144 @@
+"""
+Tests for token-budgeted chunks.
+
+Structural checks count one token per character; exactness is checked offline
+with a small byte-level encoding that uses cl100k_base's pre-tokenizer
+pattern, as in test_token_counter.
+
+Run:  cd backend && pytest tests/test_chunk_budget.py -v
+"""
+
+from pathlib import Path
+import pytest
+import sys
+
+import tiktoken
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from chunk_budget import MIN_CHUNK_TOKENS, budget_chunks, find_chunk
+from transformation import OpenAPIToMarkdown
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent.parent / "examples"
+
+# cl100k_base's pre-tokenizer pattern.
+CL100K_PAT_STR = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+
+
+def count_chars(texts):
+    return [len(text) for text in texts]
+
+
+def _test_encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for merged in (b"  ", b"\n\n", b"    ", b"in", b"ing", b"##", b"###", b"get", b"\n  "):
+        ranks[merged] = len(ranks)
+    return tiktoken.Encoding(name="test_cl100k", pat_str=CL100K_PAT_STR, mergeable_ranks=ranks, special_tokens={})
+
+
+def _chunked(endpoints=None, tags=None, schemas=None):
+    return {
+        "manifest": "# API\n",
+        "tags": tags or {},
+        "endpoints": endpoints or {},
+        "schemas": schemas or {},
+    }
+
+
+def _reassemble(budgeted, chunk_type):
+    return "".join(c["content"] for c in budgeted["chunks"] if c["chunk_type"] == chunk_type)
+
+
+@pytest.fixture(scope="module")
+def documented():
+    return OpenAPIToMarkdown(str(EXAMPLES_DIR / "openapi.documented.yml")).convert_chunked()
+
+
+class TestBudgetChunks:
+
+    @pytest.mark.parametrize("max_tokens", [MIN_CHUNK_TOKENS, 200, 1500, 8000])
+    def test_every_chunk_fits_and_nothing_is_lost(self, documented, max_tokens):
+        budgeted = budget_chunks(documented, max_tokens, count_chars)
+        assert budgeted["token_budget"] == max_tokens
+        assert budgeted["manifest"] == documented["manifest"]
+        for chunk in budgeted["chunks"]:
+            assert 0 < chunk["token_count"] <= max_tokens
+            assert chunk["token_count"] == len(chunk["content"])
+        for chunk_type, section in (("tag", "tags"), ("endpoint", "endpoints"), ("schema", "schemas")):
+            expected = "".join(t if t.endswith("\n") else t + "\n" for t in documented[section].values())
+            assert _reassemble(budgeted, chunk_type) == expected
+
+    def test_small_endpoints_share_a_chunk(self):
+        endpoints = {f"op{i}": f"### op{i}\nGET /items/{i}\n" for i in range(10)}
+        budgeted = budget_chunks(_chunked(endpoints=endpoints), 63, count_chars)
+        chunks = budgeted["chunks"]
+        assert [c["keys"] for c in chunks] == [["op0", "op1", "op2"], ["op3", "op4", "op5"], ["op6", "op7", "op8"], ["op9"]]
+        assert [c["chunk_key"] for c in chunks] == ["op0", "op3", "op6", "op9"]
+        assert all(c["parts"] == 1 for c in chunks)
+
+    def test_tags_are_never_packed(self):
+        tags = {"a": "## a\n", "b": "## b\n"}
+        budgeted = budget_chunks(_chunked(tags=tags), 100, count_chars)
+        assert [c["keys"] for c in budgeted["chunks"]] == [["a"], ["b"]]
+
+    def test_endpoints_and_schemas_do_not_mix(self):
+        budgeted = budget_chunks(
+            _chunked(endpoints={"op": "### op\n"}, schemas={"Item": "#### Item\n"}), 100, count_chars
+        )
+        assert [(c["chunk_type"], c["keys"]) for c in budgeted["chunks"]] == [
+            ("endpoint", ["op"]),
+            ("schema", ["Item"]),
+        ]
+
+    def test_large_tag_is_split_into_numbered_parts(self):
+        summary = "## items\n" + "".join(f"- [GET] /items/{i}: get item {i}\n" for i in range(40))
+        budgeted = budget_chunks(_chunked(tags={"items": summary}), 200, count_chars)
+        chunks = budgeted["chunks"]
+        assert len(chunks) > 1
+        assert [c["chunk_key"] for c in chunks] == ["items"] + [f"items#{n}" for n in range(2, len(chunks) + 1)]
+        assert all(c["keys"] == ["items"] and c["parts"] == len(chunks) for c in chunks)
+        assert [c["part"] for c in chunks] == list(range(1, len(chunks) + 1))
+        assert "".join(c["content"] for c in chunks) == summary
+        # Parts end at line starts.
+        assert all(c["content"].endswith("\n") for c in chunks)
+
+    def test_single_line_over_the_budget_is_cut(self):
+        line = " ".join(f"word{i}" for i in range(100)) + "\n"
+        budgeted = budget_chunks(_chunked(endpoints={"op": line}), 64, count_chars)
+        assert len(budgeted["chunks"]) > 1
+        assert all(c["token_count"] <= 64 for c in budgeted["chunks"])
+        assert _reassemble(budgeted, "endpoint") == line
+
+    def test_counts_are_exact_for_the_real_pre_tokenizer(self, documented):
+        encoding = _test_encoding()
+
+        def count_tokens(texts):
+            return [len(encoding.encode_ordinary(text)) for text in texts]
+
+        for max_tokens in (MIN_CHUNK_TOKENS, 100, 1000):
+            budgeted = budget_chunks(documented, max_tokens, count_tokens)
+            for chunk in budgeted["chunks"]:
+                assert chunk["token_count"] == len(encoding.encode_ordinary(chunk["content"]))
+                assert chunk["token_count"] <= max_tokens
+
+    def test_budget_below_minimum_is_rejected(self):
+        with pytest.raises(ValueError):
+            budget_chunks(_chunked(), MIN_CHUNK_TOKENS - 1, count_chars)
+
+
+class TestFindChunk:
+
+    def test_finds_by_chunk_key_or_member(self):
+        endpoints = {f"op{i}": f"### op{i}\n" for i in range(6)}
+        budgeted = budget_chunks(_chunked(endpoints=endpoints), 24, count_chars)
+        assert find_chunk(budgeted, "endpoint", "op3")["chunk_key"] == "op3"
+        assert find_chunk(budgeted, "endpoint", "op4")["chunk_key"] == "op3"
+        assert find_chunk(budgeted, "schema", "op4") is None
+        assert find_chunk(budgeted, "endpoint", "missing") is None
+
+    def test_split_entry_resolves_to_its_first_part(self):
+        summary = "".join(f"- line {i}\n" for i in range(20))
+        budgeted = budget_chunks(_chunked(tags={"items": summary}), 40, count_chars)
+        assert find_chunk(budgeted, "tag", "items")["part"] == 1
+        assert find_chunk(budgeted, "tag", "items#2")["part"] == 2
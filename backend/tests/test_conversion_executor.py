@@ -0,0 +1,200 @@
+"""
+Tests for the pluggable conversion executors (threadpool vs warm process pool).
+
+Run:  cd backend && pytest tests/test_conversion_executor.py -v
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+import pytest
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from conversion_executor import (
+    ConversionTimeoutError,
+    ProcessConversionExecutor,
+    ThreadConversionExecutor,
+    _Call,
+    _ping,
+    convert_spec_file,
+    create_conversion_executor,
+)
+
+SPEC = {
+    "openapi": "3.0.0",
+    "info": {"title": "Exec API", "version": "2.1.0", "contact": {"name": "Exec Co"}},
+    "tags": [{"name": "items"}, "misc"],
+    "paths": {
+        "/items": {
+            "get": {"operationId": "listItems", "tags": ["items"], "responses": {"200": {"description": "OK"}}}
+        }
+    },
+}
+
+
+@pytest.fixture
+def spec_path():
+    with tempfile.NamedTemporaryFile(
+        mode="w", suffix=".json", delete=False, encoding="utf-8"
+    ) as f:
+        json.dump(SPEC, f)
+        tmp = f.name
+    try:
+        yield tmp
+    finally:
+        Path(tmp).unlink(missing_ok=True)
+
+
+class TestCreateConversionExecutor:
+    def test_thread_is_default(self):
+        assert isinstance(create_conversion_executor("thread"), ThreadConversionExecutor)
+
+    def test_process_uses_worker_count(self):
+        executor = create_conversion_executor("process", workers=3)
+        assert isinstance(executor, ProcessConversionExecutor)
+        assert executor.workers == 3
+
+    def test_unknown_kind_falls_back_to_threads(self):
+        assert isinstance(create_conversion_executor("gpu"), ThreadConversionExecutor)
+
+
+class TestConvertSpecFile:
+    def test_streams_markdown_into_result_store(self, spec_path, monkeypatch, tmp_path):
+        import transformation
+        import utils
+        from result_store import ResultStore
+        from transformation import OpenAPIToMarkdown, RenderedBlockCache
+        monkeypatch.setattr(utils, "estimate_token_counts", lambda texts, model="gpt-4": [len(t) for t in texts])
+        monkeypatch.setattr(transformation, "RENDERED_BLOCKS", RenderedBlockCache(1 << 20, 100))
+        results = ResultStore(str(tmp_path))
+
+        result = asyncio.run(ThreadConversionExecutor().run(convert_spec_file, spec_path, results, "job-1"))
+
+        markdown = results.read("job-1")
+        assert markdown.decode("utf-8") == OpenAPIToMarkdown(spec_path).convert()
+        assert "ENDPOINT: [GET] /items" in markdown.decode("utf-8")
+        assert "markdown" not in result
+        assert result["token_count"] == len(markdown.decode("utf-8"))
+        assert result["result_bytes"] == len(markdown)
+        assert result["result_compressed_bytes"] == results.size("job-1")
+        assert result["info"] == {"title": "Exec API", "version": "2.1.0", "contact": {"name": "Exec Co"}}
+        assert result["tags"] == ["items", "misc"]
+        assert set(result["timings"]) == {
+            "init_ms", "convert_ms", "token_ms", "store_ms", "endpoint_blocks", "render_cache_hit_ratio",
+        }
+        assert result["timings"]["render_cache_hit_ratio"] == 0.0
+
+        # Converting the same operations again reuses every rendered endpoint block.
+        again = convert_spec_file(spec_path, results, "job-1b")
+        assert again["timings"]["render_cache_hit_ratio"] == 1.0
+        assert results.read("job-1b") == markdown
+
+    def test_failure_mid_stream_leaves_no_result(self, spec_path, monkeypatch, tmp_path):
+        from result_store import ResultStore
+        from transformation import OpenAPIToMarkdown
+
+        def broken_iter_convert(self, workers=1):
+            yield "# Partial\n"
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(OpenAPIToMarkdown, "iter_convert", broken_iter_convert)
+        results = ResultStore(str(tmp_path))
+
+        with pytest.raises(RuntimeError):
+            convert_spec_file(spec_path, results, "job-2")
+        assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.slow
+class TestProcessConversionExecutor:
+    def test_runs_work_in_a_worker_process(self):
+        executor = ProcessConversionExecutor(workers=1)
+        executor.start()
+        try:
+            pid = asyncio.run(executor.run(_ping))
+        finally:
+            executor.shutdown()
+        assert pid != os.getpid()
+
+    def test_timeout_kills_worker_and_reclaims_slot(self):
+        executor = ProcessConversionExecutor(workers=1)
+        executor.start()
+
+        async def scenario():
+            first_pid = await executor.run(_ping)
+            with pytest.raises(ConversionTimeoutError):
+                await executor.run(time.sleep, 30, timeout=0.5)
+            # The only worker was replaced, so the next call runs right away.
+            started = time.monotonic()
+            second_pid = await executor.run(_ping, timeout=30)
+            return first_pid, second_pid, time.monotonic() - started
+
+        try:
+            first_pid, second_pid, waited = asyncio.run(scenario())
+        finally:
+            executor.shutdown()
+        assert second_pid != first_pid
+        assert waited < 25
+
+    def test_cancelled_call_kills_worker(self):
+        executor = ProcessConversionExecutor(workers=1)
+        executor.start()
+
+        async def scenario():
+            task = asyncio.create_task(executor.run(time.sleep, 30))
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return await executor.run(_ping, timeout=30)
+
+        try:
+            assert asyncio.run(scenario()) != os.getpid()
+        finally:
+            executor.shutdown()
+
+    def test_abandoning_a_finished_call_keeps_its_worker(self):
+        executor = ProcessConversionExecutor(workers=1)
+        executor.start()
+        try:
+            call = _Call()
+            first_pid = executor._call(call, _ping, ())
+            # A timeout that fires as the call returns must not kill the worker it released.
+            executor._abandon(call)
+            assert asyncio.run(executor.run(_ping, timeout=30)) == first_pid
+        finally:
+            executor.shutdown()
+
+    def test_worker_exceptions_propagate(self, tmp_path):
+        from result_store import ResultStore
+        executor = ProcessConversionExecutor(workers=1)
+        try:
+            with pytest.raises(FileNotFoundError):
+                asyncio.run(executor.run(
+                    convert_spec_file, "/nonexistent/spec.yaml", ResultStore(str(tmp_path)), "job"
+                ))
+        finally:
+            executor.shutdown()
+
+
+class TestThreadConversionExecutor:
+    def test_timeout(self):
+        with pytest.raises(ConversionTimeoutError):
+            asyncio.run(ThreadConversionExecutor().run(time.sleep, 0.5, timeout=0.05))
+
+    def test_abandoned_thread_is_handed_over_until_it_returns(self):
+        abandoned = []
+
+        async def scenario():
+            with pytest.raises(ConversionTimeoutError):
+                await ThreadConversionExecutor().run(
+                    lambda: time.sleep(0.3) or "late", timeout=0.05, on_abandon=abandoned.append
+                )
+            assert len(abandoned) == 1 and not abandoned[0].done()
+            return await abandoned[0]
+
+        assert asyncio.run(scenario()) == "late"
@@ -0,0 +1,363 @@
+"""
+Tests for the conversion job stores (in-memory and SQL-backed) and the
+on-disk result store.
+
+Run:  cd backend && pytest tests/test_job_store.py -v
+"""
+
+import asyncio
+from pathlib import Path
+import pytest
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+import models.database as database
+from models.database import Base
+from models.conversion_job import ConversionJob
+from job_store import (
+    InMemoryJobStore,
+    JobEvents,
+    QueueFullError,
+    SQLJobStore,
+    create_job_store,
+    now_ts,
+)
+from result_store import ResultStore, accepts_gzip
+
+
+def _job(job_id, status="queued", created_at_ts=None, **extra):
+    ts = created_at_ts if created_at_ts is not None else now_ts()
+    job = {
+        "job_id": job_id,
+        "status": status,
+        "stage": "waiting_worker",
+        "request_id": f"req-{job_id}",
+        "timings": {"read_ms": 1},
+        "created_at_ts": ts,
+        "updated_at_ts": ts,
+    }
+    job.update(extra)
+    return job
+
+
+@pytest.fixture(params=["memory", "sql"])
+def store(request, monkeypatch):
+    if request.param == "sql":
+        engine = create_engine(
+            "sqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+        Base.metadata.create_all(bind=engine, tables=[ConversionJob.__table__])
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=engine))
+    return create_job_store(ttl_seconds=60, max_items=3, kind=request.param)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class TestJobStore:
+    def test_enqueue_and_get(self, store):
+        run(store.enqueue(_job("a"), max_active=5))
+        job = run(store.get("a"))
+        assert job["request_id"] == "req-a"
+        assert job["timings"] == {"read_ms": 1}
+        assert run(store.get("missing")) is None
+
+    def test_queue_limit(self, store):
+        run(store.enqueue(_job("a"), max_active=2))
+        run(store.enqueue(_job("b"), max_active=2))
+        with pytest.raises(QueueFullError) as exc:
+            run(store.enqueue(_job("c"), max_active=2))
+        assert exc.value.active == 2
+        assert run(store.get("c")) is None
+
+    def test_per_owner_limit(self, store):
+        run(store.enqueue(_job("a", owner="user:1"), max_active=5, max_active_per_owner=1))
+        with pytest.raises(QueueFullError) as exc:
+            run(store.enqueue(_job("b", owner="user:1"), max_active=5, max_active_per_owner=1))
+        assert exc.value.owner == "user:1"
+        assert exc.value.active == 1
+        run(store.enqueue(_job("c", owner="user:2"), max_active=5, max_active_per_owner=1))
+
+        run(store.update("a", status="completed"))
+        run(store.enqueue(_job("b", owner="user:1"), max_active=5, max_active_per_owner=1))
+
+    def test_work_budget(self, store):
+        run(store.enqueue(_job("a", estimated_seconds=8.0), max_active=5, max_active_seconds=10))
+        with pytest.raises(QueueFullError) as exc:
+            run(store.enqueue(_job("b", estimated_seconds=3.0), max_active=5, max_active_seconds=10))
+        assert exc.value.active_seconds == pytest.approx(8.0)
+        run(store.enqueue(_job("c", estimated_seconds=2.0), max_active=5, max_active_seconds=10))
+
+        run(store.update("a", status="completed"))
+        run(store.enqueue(_job("b", estimated_seconds=3.0), max_active=5, max_active_seconds=10))
+        with pytest.raises(QueueFullError) as exc:
+            run(store.enqueue(_job("d", estimated_seconds=6.0), max_active=5, max_active_seconds=10))
+        assert exc.value.active_seconds == pytest.approx(5.0)
+
+    def test_work_budget_admits_oversized_job_into_empty_queue(self, store):
+        run(store.enqueue(_job("huge", estimated_seconds=50.0), max_active=5, max_active_seconds=10))
+
+    def test_claim_only_once(self, store):
+        run(store.enqueue(_job("a"), max_active=5))
+        claimed = run(store.claim("a", stage="convert"))
+        assert claimed["status"] == "processing"
+        assert claimed["stage"] == "convert"
+        assert run(store.claim("a", stage="convert")) is None
+        assert run(store.claim("missing")) is None
+
+    def test_update_merges_timings(self, store):
+        run(store.enqueue(_job("a"), max_active=5))
+        updated = run(store.update("a", status="completed", result_bytes=6, timings={"total_ms": 7}))
+        assert updated["timings"] == {"read_ms": 1, "total_ms": 7}
+        assert run(store.get("a"))["result_bytes"] == 6
+        assert run(store.update("missing", status="failed")) is None
+
+    def test_update_active_skips_finished_jobs(self, store):
+        run(store.enqueue(_job("a"), max_active=5))
+        cancelled = run(store.update_active("a", status="failed", stage="cancelled"))
+        assert cancelled["stage"] == "cancelled"
+        assert run(store.update_active("a", status="completed")) is None
+        assert run(store.get("a"))["status"] == "failed"
+        assert run(store.claim("a")) is None
+        assert run(store.update_active("missing", stage="x")) is None
+
+    def test_find_by_hash_returns_newest_live_job(self, store):
+        run(store.enqueue(_job("a", created_at_ts=1.0, content_hash="h1"), max_active=5))
+        run(store.enqueue(_job("b", created_at_ts=2.0, content_hash="h1"), max_active=5))
+        assert run(store.find_by_hash("h1"))["job_id"] == "b"
+        run(store.update("b", status="failed"))
+        assert run(store.find_by_hash("h1")) in (None, run(store.get("a")))
+        assert run(store.find_by_hash("other")) is None
+
+    def test_enqueue_without_limit_admits_finished_job(self, store):
+        run(store.enqueue(_job("a"), max_active=1))
+        run(store.enqueue(_job("done", status="completed"), max_active=None))
+        assert run(store.get("done"))["status"] == "completed"
+
+    def test_pending_ahead_counts_older_active_jobs(self, store):
+        run(store.enqueue(_job("a", created_at_ts=1.0), max_active=5))
+        run(store.enqueue(_job("b", created_at_ts=2.0, status="completed"), max_active=5))
+        run(store.enqueue(_job("c", created_at_ts=3.0), max_active=5))
+        assert run(store.pending_ahead(run(store.get("c")))) == 1
+
+    def test_cleanup_drops_expired_and_overflowing_finished_jobs(self, store):
+        old = now_ts() - 120
+        run(store.enqueue(_job("expired", status="completed", updated_at_ts=old), max_active=9))
+        run(store.enqueue(_job("active-old", updated_at_ts=old), max_active=9))
+        for i in range(3):
+            run(store.enqueue(_job(f"done-{i}", status="failed", updated_at_ts=now_ts() + i), max_active=9))
+        assert sorted(run(store.cleanup())) == ["done-0", "expired"]
+
+        assert run(store.get("expired")) is None
+        # Over the cap of 3: the oldest finished job goes, active jobs never do.
+        assert run(store.get("active-old")) is not None
+        assert run(store.get("done-0")) is None
+        assert run(store.get("done-1")) is not None
+        assert run(store.get("done-2")) is not None
+
+
+class TestBatches:
+    def _batch(self, batch_id, size, status="queued"):
+        return [_job(f"{batch_id}-{i}", status=status, created_at_ts=float(i), batch_id=batch_id) for i in range(size)]
+
+    def test_batch_admitted_whole_and_listed_in_order(self, store):
+        run(store.enqueue_batch(self._batch("b1", 3), max_active_batches=1))
+        assert [job["job_id"] for job in run(store.list_batch("b1"))] == ["b1-0", "b1-1", "b1-2"]
+        assert run(store.list_batch("other")) == []
+
+    def test_active_batch_limit(self, store):
+        run(store.enqueue_batch(self._batch("b1", 2), max_active_batches=1))
+        with pytest.raises(QueueFullError) as exc:
+            run(store.enqueue_batch(self._batch("b2", 2), max_active_batches=1))
+        assert exc.value.active == 1
+        assert run(store.list_batch("b2")) == []
+
+        # A batch stops counting once all of its items are finished.
+        run(store.update("b1-0", status="completed"))
+        run(store.update("b1-1", status="failed"))
+        run(store.enqueue_batch(self._batch("b2", 2), max_active_batches=1))
+
+    def test_batch_items_do_not_use_single_job_slots(self, store):
+        run(store.enqueue_batch(self._batch("b1", 5), max_active_batches=1))
+        run(store.enqueue(_job("single-1"), max_active=1))
+        with pytest.raises(QueueFullError):
+            run(store.enqueue(_job("single-2"), max_active=1))
+
+
+class TestInMemoryRegistry:
+    """Counters, queue positions and the expiry heap agree with a full scan."""
+
+    def test_indexes_match_brute_force(self, monkeypatch):
+        import random
+        import job_store
+
+        clock = [1000.0]
+        monkeypatch.setattr(job_store, "now_ts", lambda: clock[0])
+        rng = random.Random(7)
+        store = InMemoryJobStore(ttl_seconds=50, max_items=40)
+
+        async def scenario():
+            for i in range(600):
+                clock[0] += rng.random() * 2
+                jobs = list(store._jobs.values())
+                action = rng.random()
+                if action < 0.4 or not jobs:
+                    try:
+                        await store.enqueue(_job(f"j{i}", created_at_ts=clock[0]), max_active=15)
+                    except QueueFullError:
+                        pass
+                elif action < 0.6:
+                    await store.claim(rng.choice(jobs)["job_id"])
+                elif action < 0.85:
+                    job = rng.choice(jobs)
+                    if job["status"] in ("queued", "processing") or rng.random() < 0.2:
+                        await store.update(job["job_id"], status=rng.choice(["completed", "failed"]))
+                else:
+                    await store.cleanup()
+
+                active = [j for j in store._jobs.values() if j["status"] in ("queued", "processing")]
+                assert store._active_count() == len(active)
+                for job in active:
+                    ahead = sum(1 for other in active if other["created_at_ts"] < job["created_at_ts"])
+                    assert await store.pending_ahead(job) == ahead
+                assert len(store._finished_heap) <= 2 * len(store._jobs) + 64 + 1
+
+            cutoff = clock[0] - 50
+            removed = await store.cleanup()
+            assert all(
+                j["updated_at_ts"] >= cutoff
+                for j in store._jobs.values()
+                if j["status"] in ("completed", "failed")
+            )
+            assert len(store._jobs) <= 40 or not any(
+                j["status"] in ("completed", "failed") for j in store._jobs.values()
+            )
+            assert not set(removed) & set(store._jobs)
+
+        run(scenario())
+
+
+class TestJobEvents:
+    def test_store_updates_reach_subscribers(self, store):
+        async def scenario():
+            await store.enqueue(_job("a"), max_active=5)
+            with store.events.subscribe("a") as subscription:
+                assert await subscription.wait(0.01) is None
+                await store.claim("a", stage="convert")
+                await store.update("a", stage="db_save")
+                # Only the latest state is kept for a slow reader.
+                latest = await subscription.wait(1)
+                assert latest["status"] == "processing"
+                assert latest["stage"] == "db_save"
+            assert store.events._subscribers == {}
+
+        run(scenario())
+
+    def test_publish_ignores_other_jobs(self):
+        async def scenario():
+            events = JobEvents()
+            with events.subscribe("a") as subscription:
+                events.publish({"job_id": "b", "timings": {}})
+                events.publish(None)
+                assert await subscription.wait(0.01) is None
+
+        run(scenario())
+
+
+class TestCreateJobStore:
+    def test_kinds(self):
+        assert isinstance(create_job_store(60, 10, "memory"), InMemoryJobStore)
+        assert isinstance(create_job_store(60, 10, "sql"), SQLJobStore)
+        assert isinstance(create_job_store(60, 10, "redis"), InMemoryJobStore)
+
+
+class TestResultStore:
+    def test_round_trip(self, tmp_path):
+        results = ResultStore(str(tmp_path / "results"))
+        data = ("# API\n" + "x" * 200_000).encode("utf-8")
+        compressed = results.save("job-1", data)
+
+        assert compressed < len(data)
+        assert results.path("job-1").stat().st_size == compressed
+        assert b"".join(results.iter_decompressed("job-1", chunk_size=4096)) == data
+        results.delete(["job-1", "never-written"])
+        assert not results.exists("job-1")
+
+    def test_rejects_path_like_job_ids(self, tmp_path):
+        with pytest.raises(ValueError):
+            ResultStore(str(tmp_path)).path("../etc/passwd")
+
+    def test_sweep_removes_old_files(self, tmp_path):
+        import os
+        results = ResultStore(str(tmp_path))
+        results.save("old", b"a")
+        results.save("new", b"b")
+        os.utime(results.path("old"), (0, 0))
+        assert results.sweep(max_age_seconds=60) == ["old"]
+        assert results.exists("new")
+
+    def test_writer_streams_atomically(self, tmp_path):
+        import gzip
+        results = ResultStore(str(tmp_path))
+        with results.writer("job") as out:
+            out.write(b"# API\n")
+            assert not results.exists("job")
+            out.write(b"x" * 100_000)
+        assert results.read("job") == b"# API\n" + b"x" * 100_000
+        assert results.size("job") == results.path("job").stat().st_size
+        # Same bytes as a one-shot save.
+        results.save("once", b"# API\n" + b"x" * 100_000)
+        assert gzip.decompress(results.path("once").read_bytes()) == results.read("job")
+
+        with pytest.raises(RuntimeError):
+            with results.writer("broken") as out:
+                out.write(b"partial")
+                raise RuntimeError("boom")
+        assert not results.exists("broken")
+        assert list(tmp_path.glob("*.tmp")) == []
+
+    def test_sweep_removes_stale_partial_writes(self, tmp_path):
+        import os
+        results = ResultStore(str(tmp_path))
+        stale = tmp_path / "killed.tmp"
+        stale.write_bytes(b"partial")
+        os.utime(stale, (0, 0))
+        results.sweep(max_age_seconds=60)
+        assert not stale.exists()
+
+    def test_artifact_kinds_are_deleted_and_swept_together(self, tmp_path):
+        import os
+        results = ResultStore(str(tmp_path))
+        results.save("job", b"# md")
+        results.save("job", b"openapi: 3.0.0", kind="src")
+        assert results.read("job", kind="src") == b"openapi: 3.0.0"
+        with pytest.raises(ValueError):
+            results.path("job", kind="other")
+        results.delete(["job"])
+        assert not results.exists("job") and not results.exists("job", kind="src")
+
+        results.save("old", b"a")
+        results.save("old", b"b", kind="src")
+        for path in tmp_path.glob("old.*"):
+            os.utime(path, (0, 0))
+        assert results.sweep(max_age_seconds=60) == ["old"]
+        assert list(tmp_path.glob("old.*")) == []
+
+    @pytest.mark.parametrize("header,expected", [
+        ("gzip, deflate, br", True),
+        ("br;q=1.0, gzip;q=0.5", True),
+        ("gzip;q=0", False),
+        ("*", True),
+        ("*, gzip;q=0", False),
+        ("identity", False),
+        ("", False),
+    ])
+    def test_accepts_gzip(self, header, expected):
+        assert accepts_gzip(header) is expected
@@ -12,7 +12,7 @@ import pytest
 import sys
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
-from transformation import OpenAPIToMarkdown
+from transformation import OpenAPIToMarkdown, YAML_BACKEND, YAML_LOADERS, load_yaml
 from main import load_openapi_spec, ALLOWED_EXTENSIONS, FORMAT_MAP, FORMAT_TO_EXT
 
 # ── Inline fixtures ───────────────────────────────────────────────────
@@ -513,3 +513,32 @@ class TestFormatToExt:
 
     def test_apib_maps_to_apib_ext(self):
         assert FORMAT_TO_EXT["apib"] == ".apib"
+
+
+# ── Group 8: YAML loader backends ────────────────────────────────────
+
+EXAMPLES_DIR = Path(__file__).resolve().parent.parent.parent / "examples"
+YAML_EXAMPLES = sorted(
+    p for p in EXAMPLES_DIR.glob("*") if p.suffix in (".yaml", ".yml", ".raml")
+)
+
+
+class TestYAMLBackends:
+    def test_preferred_backend_is_available(self):
+        assert YAML_BACKEND in YAML_LOADERS
+        assert "python" in YAML_LOADERS
+
+    @pytest.mark.skipif("libyaml" not in YAML_LOADERS, reason="PyYAML built without libyaml")
+    @pytest.mark.parametrize("path", YAML_EXAMPLES, ids=lambda p: p.name)
+    def test_backends_parse_examples_identically(self, path):
+        """libyaml and pure-Python loaders must produce identical dicts."""
+        content = path.read_text(encoding="utf-8")
+        raml = path.suffix == ".raml"
+        assert load_yaml(content, raml=raml, backend="libyaml") == load_yaml(
+            content, raml=raml, backend="python"
+        )
+
+    @pytest.mark.parametrize("backend", sorted(YAML_LOADERS))
+    def test_raml_custom_tags_load_as_none(self, backend):
+        result = load_yaml("title: API\nschema: !include schema.json\n", raml=True, backend=backend)
+        assert result == {"title": "API", "schema": None}
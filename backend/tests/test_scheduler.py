@@ -0,0 +1,114 @@
+"""
+Tests for the fair-share worker scheduler.
+
+Run:  cd backend && pytest tests/test_scheduler.py -v
+"""
+
+import asyncio
+from pathlib import Path
+import pytest
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from scheduler import FairScheduler
+
+MB = 1024 * 1024
+
+
+def _grant_order(scheduler, jobs):
+    """Queue ``(owner, cost)`` jobs behind a held slot; return the order they run in."""
+
+    async def scenario():
+        order = []
+
+        async def job(name, owner, cost):
+            async with scheduler.slot(owner, cost):
+                order.append(name)
+                await asyncio.sleep(0)
+
+        await scheduler.acquire("holder", 1)
+        tasks = []
+        for name, owner, cost in jobs:
+            tasks.append(asyncio.create_task(job(name, owner, cost)))
+            await asyncio.sleep(0)
+        scheduler.release()
+        await asyncio.gather(*tasks)
+        return order
+
+    return asyncio.run(scenario())
+
+
+class TestFairScheduler:
+    def test_free_slots_are_granted_immediately(self):
+        async def scenario():
+            scheduler = FairScheduler(slots=2)
+            await scheduler.acquire("a", MB)
+            await scheduler.acquire("a", MB)
+            assert scheduler.waiting == 0
+
+        asyncio.run(scenario())
+
+    def test_bulk_owner_does_not_block_others(self):
+        scheduler = FairScheduler(slots=1, quantum_bytes=MB, priority_max_bytes=0)
+        jobs = [(f"bulk-{i}", "bulk", MB) for i in range(5)] + [("other", "other", MB)]
+        order = _grant_order(scheduler, jobs)
+        assert order.index("other") <= 1
+
+    def test_shares_are_weighted_by_size(self):
+        scheduler = FairScheduler(slots=1, quantum_bytes=MB, priority_max_bytes=0)
+        jobs = [("big", "a", 4 * MB)] + [(f"b-{i}", "b", MB) for i in range(4)]
+        order = _grant_order(scheduler, jobs)
+        # The 4 MB job needs four rounds of credit; the other owner's 1 MB
+        # jobs run one per round meanwhile.
+        assert order == ["b-0", "b-1", "b-2", "big", "b-3"]
+
+    def test_small_files_use_priority_lane(self):
+        scheduler = FairScheduler(slots=1, quantum_bytes=MB, priority_max_bytes=1000, priority_burst=2)
+        jobs = [(f"bulk-{i}", "bulk", MB) for i in range(3)] + [(f"small-{i}", f"u{i}", 500) for i in range(3)]
+        order = _grant_order(scheduler, jobs)
+        # Two small jobs go first, then one bulk job so bulk work isn't starved.
+        assert order[:4] == ["small-0", "small-1", "bulk-0", "small-2"]
+
+    def test_cancelled_waiter_gives_up_its_place(self):
+        async def scenario():
+            scheduler = FairScheduler(slots=1)
+            await scheduler.acquire("a", 1)
+            waiter = asyncio.create_task(scheduler.acquire("b", 1))
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            assert scheduler.waiting == 0
+            scheduler.release()
+            await asyncio.wait_for(scheduler.acquire("c", 1), 1)
+
+        asyncio.run(scenario())
+
+    def test_slot_granted_while_cancelling_is_passed_on(self):
+        async def scenario():
+            scheduler = FairScheduler(slots=1)
+            await scheduler.acquire("a", 1)
+            first = asyncio.create_task(scheduler.acquire("b", 1))
+            second = asyncio.create_task(scheduler.acquire("c", 1))
+            await asyncio.sleep(0)
+            scheduler.release()
+            first.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await first
+            await asyncio.wait_for(second, 1)
+
+        asyncio.run(scenario())
+
+    def test_kept_slot_is_released_when_its_work_finishes(self):
+        async def scenario():
+            scheduler = FairScheduler(slots=1)
+            work = asyncio.get_running_loop().create_future()
+            async with scheduler.slot("a", 1) as slot:
+                slot.keep_until(work)
+            waiter = asyncio.create_task(scheduler.acquire("b", 1))
+            await asyncio.sleep(0)
+            assert not waiter.done()
+            work.set_result(None)
+            await asyncio.wait_for(waiter, 1)
+
+        asyncio.run(scenario())
@@ -0,0 +1,144 @@
+"""
+Tests for cached, batched token counting.
+
+Runs offline against a small byte-level encoding that uses cl100k_base's
+pre-tokenizer pattern, so chunked counts can be checked against whole-document
+counts without downloading the real ranks.
+
+Run:  cd backend && pytest tests/test_token_counter.py -v
+"""
+
+from pathlib import Path
+import pytest
+import sys
+
+import tiktoken
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import token_counter
+
+# cl100k_base's pre-tokenizer pattern.
+CL100K_PAT_STR = (
+    r"""'(?i:[sdmt]|ll|ve|re)|[^\r\n\p{L}\p{N}]?+\p{L}++|\p{N}{1,3}+| ?[^\s\p{L}\p{N}]++[\r\n]*+|\s++$|\s*[\r\n]|\s+(?!\S)|\s"""
+)
+
+
+def _test_encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for merged in (b"  ", b"\n\n", b"    ", b"in", b"ing", b"##", b"###", b"get"):
+        ranks[merged] = len(ranks)
+    return tiktoken.Encoding(name="test_cl100k", pat_str=CL100K_PAT_STR, mergeable_ranks=ranks, special_tokens={})
+
+
+SAMPLE = "".join(
+    f"### Endpoint {i}\n\n"
+    f"ENDPOINT: [GET] /items/{i}\n"
+    f"  - name: getting item {i}  \n"
+    f"    description: 'it''s a thing' {{\"id\": {i}}}\n\n\n"
+    for i in range(200)
+)
+
+
+@pytest.fixture
+def encoding(monkeypatch):
+    encoding = _test_encoding()
+    monkeypatch.setattr(token_counter, "get_encoding", lambda model=token_counter.TOKEN_COUNT_MODEL: encoding)
+    monkeypatch.setattr(token_counter, "TOKEN_COUNT_CHUNK_CHARS", 500)
+    return encoding
+
+
+class TestSplitAtLineStarts:
+    def test_short_text_is_one_chunk(self):
+        assert token_counter.split_at_line_starts("a\nb", max_chars=10) == ["a\nb"]
+
+    def test_chunks_end_lines_and_rejoin(self):
+        chunks = token_counter.split_at_line_starts(SAMPLE, max_chars=300)
+        assert len(chunks) > 10
+        assert "".join(chunks) == SAMPLE
+        for chunk, following in zip(chunks, chunks[1:]):
+            assert len(chunk) >= 300
+            assert chunk.endswith("\n") and not following[0].isspace()
+
+    def test_text_without_line_starts_is_not_split(self):
+        text = "x" * 100 + "\n   indented"
+        assert token_counter.split_at_line_starts(text, max_chars=10) == [text]
+
+
+class TestCountTokens:
+    def test_chunk_counts_sum_to_document_count(self, encoding):
+        chunk_counts = token_counter.count_document_chunks(SAMPLE)
+        assert len(chunk_counts) > 1
+        assert sum(chunk_counts) == len(encoding.encode_ordinary(SAMPLE))
+        assert token_counter.count_tokens(SAMPLE) == sum(chunk_counts)
+
+    def test_batch_counts_each_text(self, encoding):
+        texts = ["", "# Title\n", SAMPLE, "getting  things\n\n"]
+        assert token_counter.count_tokens_batch(texts) == [len(encoding.encode_ordinary(t)) for t in texts]
+        assert token_counter.count_tokens_batch([]) == []
+
+    def test_special_token_text_is_counted_as_text(self, encoding):
+        assert token_counter.count_tokens("<|endoftext|>") == len("<|endoftext|>".encode())
+
+    def test_encoder_is_loaded_once_per_model(self, monkeypatch):
+        loads = []
+        encoding = _test_encoding()
+
+        def fake_encoding_for_model(model):
+            loads.append(model)
+            if model == "unknown":
+                raise KeyError(model)
+            return encoding
+
+        monkeypatch.setattr(tiktoken, "encoding_for_model", fake_encoding_for_model)
+        monkeypatch.setattr(tiktoken, "get_encoding", lambda name: encoding)
+        token_counter.get_encoding.cache_clear()
+        try:
+            token_counter.warm_up("gpt-4")
+            assert token_counter.count_tokens("hello\n", "gpt-4") == 6
+            assert token_counter.get_encoding("unknown") is encoding
+            token_counter.get_encoding("unknown")
+            assert loads == ["gpt-4", "unknown"]
+        finally:
+            token_counter.get_encoding.cache_clear()
+
+
+class TestFastEstimate:
+    def test_features_count_class_transitions(self):
+        text = "Hello, world! 42abc é"
+        assert token_counter.fast_estimate_features(text) == (len(text.encode("utf-8")), 2, 0, 1)
+
+    def test_estimate_scales_with_text(self):
+        assert token_counter.estimate_tokens_fast("") == 0
+        assert token_counter.estimate_tokens_fast("a") == 1
+        one = token_counter.estimate_tokens_fast(SAMPLE)
+        assert token_counter.estimate_tokens_fast(SAMPLE * 2) == pytest.approx(2 * one, rel=0.01)
+
+    def test_estimator_modes(self, encoding):
+        import utils
+        assert utils.estimate_token_count(SAMPLE, mode="fast") == token_counter.estimate_tokens_fast(SAMPLE)
+        assert utils.estimate_token_count(SAMPLE, mode="exact") == len(encoding.encode_ordinary(SAMPLE))
+        with pytest.raises(ValueError):
+            utils.estimate_token_count(SAMPLE, mode="guess")
+
+
+class TestStreamingTokenCounter:
+    def test_streamed_total_matches_whole_document(self, encoding, monkeypatch):
+        monkeypatch.setattr(token_counter, "TOKEN_COUNT_THREADS", 2)
+        batches = []
+
+        def count_batch(texts):
+            batches.append(len(texts))
+            return token_counter.count_tokens_batch(texts)
+
+        counter = token_counter.StreamingTokenCounter(count_batch)
+        # Feed pieces that don't line up with line starts.
+        for start in range(0, len(SAMPLE), 37):
+            counter.feed(SAMPLE[start:start + 37])
+        assert counter.finish() == len(encoding.encode_ordinary(SAMPLE))
+        # Counted as it went, in several batches, not all at the end.
+        assert len(batches) > 2
+        assert counter.finish() == counter.total
+
+    def test_empty_stream(self, encoding):
+        counter = token_counter.StreamingTokenCounter()
+        assert counter.finish() == 0
@@ -18,7 +18,7 @@ import pytest
 import sys
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from transformation import OpenAPIToMarkdown
+from transformation import OpenAPIToMarkdown, ParsedSpecCache, PARSED_SPECS, RenderedBlockCache, parse_spec
 
 # ── Fixtures ──────────────────────────────────────────────────────────
 
@@ -224,6 +224,47 @@ class TestMonolithicOutput:
         assert "### Pet" in md
         assert "### Error" in md
 
+    def test_iter_convert_yields_blocks_incrementally(self, converter):
+        pieces = list(converter.iter_convert())
+        assert pieces[0].startswith("# Pet Store")
+        assert "".join(pieces) == converter.convert()
+        # Each endpoint block is its own piece.
+        assert sum("ENDPOINT:" in piece for piece in pieces) == 3
+        assert any(piece.startswith("\n### Pet") for piece in pieces)
+
+    def test_save_writes_streamed_pieces(self, converter, tmp_path):
+        out = tmp_path / "out.md"
+        streaming = OpenAPIToMarkdown(str(converter.spec_path), str(out))
+        streaming.save(streaming.iter_convert())
+        assert out.read_text(encoding="utf-8") == converter.convert()
+
+    def test_parallel_rendering_matches_serial(self, tmp_path, monkeypatch):
+        import transformation
+
+        paths = {
+            f"/items{i}": {
+                method: {
+                    "operationId": f"{method}Item{i}",
+                    "tags": tags,
+                    "responses": {"200": {"description": "OK"}},
+                }
+                for method, tags in (("get", ["b", "a"]), ("post", ["a"]), ("delete", []))
+            }
+            for i in range(7)
+        }
+        paths["/untagged"] = {"get": {"responses": {"200": {"description": "OK"}}}}
+        spec_file = tmp_path / "spec.json"
+        spec_file.write_text(json.dumps({**MINIMAL_SPEC, "paths": paths}), encoding="utf-8")
+        # No cached blocks, so the parallel pass renders everything.
+        monkeypatch.setattr(transformation, "RENDERED_BLOCKS", RenderedBlockCache(0, 0))
+        serial = OpenAPIToMarkdown(str(spec_file)).convert()
+
+        monkeypatch.setattr(transformation, "PARALLEL_RENDER_MIN_OPERATIONS", 0)
+        monkeypatch.setattr(transformation, "PARALLEL_RENDER_BATCH", 2)
+        parallel = "".join(OpenAPIToMarkdown(str(spec_file)).iter_convert(workers=2))
+        assert parallel == serial
+        assert serial.count("OPERATION_ID: getItem3") == 2
+
 
 # ── 2. Chunked output tests ──────────────────────────────────────────
 
@@ -510,6 +551,303 @@ class TestP0EdgeCases:
         assert "id" in required
         assert props["id"].get("type") == "string"
 
+    def test_escaped_pointer_ref_resolves(self):
+        spec = {
+            "openapi": "3.0.0",
+            "info": {"title": "API", "version": "1.0"},
+            "paths": {
+                "/items": {
+                    "get": {
+                        "parameters": [
+                            {"name": "q", "in": "query", "schema": {"type": "integer"}}
+                        ],
+                        "responses": {"200": {"description": "OK"}},
+                    },
+                    "post": {
+                        "parameters": [{"$ref": "#/paths/~1items/get/parameters/0"}],
+                        "responses": {"200": {"description": "OK"}},
+                    },
+                }
+            },
+        }
+        conv = self._make_converter(spec)
+        post_tool = next(t for t in conv.generate_tool_schemas() if t["name"] == "POST_items")
+        assert post_tool["parameters"]["properties"]["q"]["type"] == "integer"
+
+    def test_recursive_yaml_anchor_terminates(self):
+        raw = (
+            "openapi: 3.0.0\n"
+            "info: {title: API, version: '1.0'}\n"
+            "paths:\n"
+            "  /nodes:\n"
+            "    get:\n"
+            "      responses:\n"
+            "        '200':\n"
+            "          description: OK\n"
+            "          content:\n"
+            "            application/json:\n"
+            "              schema: &node\n"
+            "                type: object\n"
+            "                properties:\n"
+            "                  child: *node\n"
+        )
+        conv = OpenAPIToMarkdown.from_content(raw, "yaml")
+        md, chunked = conv.convert_all()
+        assert "child" in md
+        assert "GET_nodes" in chunked["endpoints"]
+
+    def test_dereference_shares_spec_nodes(self):
+        spec = {
+            "openapi": "3.0.0",
+            "info": {"title": "API", "version": "1.0"},
+            "paths": {},
+            "components": {
+                "schemas": {
+                    "Name": {"type": "string", "maxLength": 40},
+                    "Pet": {
+                        "type": "object",
+                        "properties": {"name": {"$ref": "#/components/schemas/Name"}},
+                    },
+                }
+            },
+        }
+        conv = self._make_converter(spec)
+        schemas = conv.spec["components"]["schemas"]
+        pet = conv._dereference({"$ref": "#/components/schemas/Pet"})
+        assert pet["properties"]["name"] is schemas["Name"]
+        assert pet["type"] == "object"
+        assert dict(pet["properties"]) == {"name": schemas["Name"]}
+
+    def test_tool_enum_with_refs_is_json_serializable(self):
+        spec = {
+            "openapi": "3.0.0",
+            "info": {"title": "API", "version": "1.0"},
+            "paths": {
+                "/items": {
+                    "get": {
+                        "parameters": [
+                            {
+                                "name": "shape",
+                                "in": "query",
+                                "schema": {
+                                    "type": "object",
+                                    "enum": [{"$ref": "#/components/schemas/Square"}],
+                                },
+                            }
+                        ],
+                        "responses": {"200": {"description": "OK"}},
+                    }
+                }
+            },
+            "components": {"schemas": {"Square": {"side": 1}}},
+        }
+        conv = self._make_converter(spec)
+        tools = conv.generate_tool_schemas()
+        dumped = json.loads(json.dumps(tools))
+        assert dumped[0]["parameters"]["properties"]["shape"]["enum"] == [{"side": 1}]
+
+
+class TestFromContent:
+    """In-memory construction must match the file-based path exactly."""
+
+    def test_str_bytes_memoryview_match_file(self, converter):
+        expected = converter.convert()
+        raw = json.dumps(MINIMAL_SPEC)
+        for content in (raw, raw.encode("utf-8"), memoryview(raw.encode("utf-8"))):
+            conv = OpenAPIToMarkdown.from_content(content, "json")
+            assert conv.convert() == expected
+
+    def test_format_hint_accepts_extension(self):
+        raw = json.dumps(MINIMAL_SPEC)
+        by_name = OpenAPIToMarkdown.from_content(raw, "json")
+        by_ext = OpenAPIToMarkdown.from_content(raw, ".json")
+        assert by_name.spec == by_ext.spec == MINIMAL_SPEC
+
+    def test_unknown_format_is_best_effort(self):
+        conv = OpenAPIToMarkdown.from_content(json.dumps(MINIMAL_SPEC), "")
+        assert conv.spec["info"]["title"] == "Pet Store"
+
+    def test_non_openapi_format_hint(self):
+        sdl = "type Query {\n  ping: String\n}\n"
+        conv = OpenAPIToMarkdown.from_content(sdl, "gql")
+        assert "/ping" in conv.spec["paths"]
+
+
+class TestParsedSpecCache:
+    """Parsed specs are shared by content hash + format and evicted by bytes."""
+
+    def test_same_content_reuses_parsed_spec(self, converter):
+        raw = json.dumps(MINIMAL_SPEC)
+        PARSED_SPECS.clear()
+        first = OpenAPIToMarkdown.from_content(raw, "json")
+        second = OpenAPIToMarkdown.from_content(raw.encode("utf-8"), "json")
+        assert second.spec is first.spec
+        assert second.convert() == converter.convert()
+
+    def test_format_is_part_of_the_key(self):
+        raw = "type Query {\n  ping: String\n}\n"
+        assert parse_spec(raw, ".graphql") is not parse_spec(raw, "")
+
+    def test_raw_content_fallback_is_not_cached(self):
+        PARSED_SPECS.clear()
+        spec = parse_spec("just some text", "", name="notes")
+        assert spec["info"]["title"] == "notes"
+        assert len(PARSED_SPECS) == 0
+
+    def test_specs_are_charged_their_estimated_parsed_size(self):
+        from transformation import PARSED_SPEC_SIZE_FACTOR
+        raw = json.dumps(MINIMAL_SPEC)
+        PARSED_SPECS.clear()
+        parse_spec(raw, ".json")
+        assert PARSED_SPECS.total_bytes == len(raw) * PARSED_SPEC_SIZE_FACTOR
+
+    def test_lru_evicts_by_bytes(self):
+        cache = ParsedSpecCache(max_bytes=10, max_items=10)
+        cache.put(("a", ".json"), {"a": 1}, 4)
+        cache.put(("b", ".json"), {"b": 1}, 4)
+        assert cache.get(("a", ".json")) == {"a": 1}  # a is now most recent
+        cache.put(("c", ".json"), {"c": 1}, 4)
+        assert cache.get(("b", ".json")) is None
+        assert cache.get(("a", ".json")) is not None
+        assert cache.total_bytes == 8
+
+    def test_oversized_entry_is_skipped(self):
+        cache = ParsedSpecCache(max_bytes=10, max_items=10)
+        cache.put(("big", ".yaml"), {}, 11)
+        assert len(cache) == 0 and cache.total_bytes == 0
+
+
+class TestRenderedBlockCache:
+    """Endpoint blocks are reused across specs by operation fingerprint."""
+
+    @pytest.fixture(autouse=True)
+    def _fresh_cache(self, monkeypatch):
+        import transformation
+        monkeypatch.setattr(transformation, "RENDERED_BLOCKS", RenderedBlockCache(1 << 20, 1000))
+
+    @staticmethod
+    def _version(**changes):
+        spec = json.loads(json.dumps(MINIMAL_SPEC))
+        spec["components"]["schemas"]["Tag"] = {"type": "object", "properties": {"label": {"type": "string"}}}
+        spec["components"]["schemas"]["Pet"]["properties"]["tag"] = {"$ref": "#/components/schemas/Tag"}
+        for change in changes.values():
+            change(spec)
+        return spec
+
+    @staticmethod
+    def _convert(spec):
+        converter = OpenAPIToMarkdown.from_content(json.dumps(spec), "json")
+        return converter.convert(), converter.endpoint_cache_hits
+
+    def _uncached(self, spec, monkeypatch):
+        import transformation
+        monkeypatch.setattr(transformation, "RENDERED_BLOCKS", RenderedBlockCache(0, 0))
+        return self._convert(spec)[0]
+
+    def _hits_after_first_version(self, new_version, monkeypatch):
+        assert self._convert(self._version())[1] == 0
+        markdown, hits = self._convert(new_version)
+        assert markdown == self._uncached(new_version, monkeypatch)
+        return hits
+
+    def test_unchanged_spec_reuses_every_block(self):
+        self._convert(self._version())
+        assert self._convert(self._version())[1] == 3
+
+    def test_changed_operation_is_rerendered(self, monkeypatch):
+        def retitle(spec):
+            spec["paths"]["/pets"]["get"]["summary"] = "List the pets"
+
+        assert self._hits_after_first_version(self._version(retitle=retitle), monkeypatch) == 2
+
+    def test_change_to_a_shared_schema_invalidates_its_users(self, monkeypatch):
+        def error_code(spec):
+            spec["components"]["schemas"]["Error"]["properties"]["code"]["type"] = "string"
+
+        # Only createPet references Error.
+        assert self._hits_after_first_version(self._version(error_code=error_code), monkeypatch) == 2
+
+    def test_change_behind_nested_refs_invalidates_its_users(self, monkeypatch):
+        def label(spec):
+            spec["components"]["schemas"]["Tag"]["properties"]["label"]["type"] = "integer"
+
+        # Every operation reaches Tag through Pet.
+        assert self._hits_after_first_version(self._version(label=label), monkeypatch) == 0
+
+    def test_base_url_and_security_are_part_of_the_fingerprint(self, monkeypatch):
+        def server(spec):
+            spec["servers"] = [{"url": "https://pets.example.com"}]
+
+        def scheme(spec):
+            spec["components"]["securitySchemes"]["bearerAuth"]["bearerFormat"] = "JWT"
+
+        assert self._hits_after_first_version(self._version(server=server), monkeypatch) == 0
+        assert self._hits_after_first_version(self._version(scheme=scheme), monkeypatch) == 0
+
+    def test_value_types_are_part_of_the_fingerprint(self):
+        from transformation import _fingerprint_source
+
+        assert _fingerprint_source({"200": True})[0] != _fingerprint_source({"200": 1})[0]
+        assert _fingerprint_source({"a": 1, "b": 2})[0] != _fingerprint_source({"b": 2, "a": 1})[0]
+
+    def test_refs_are_found_in_unmarshallable_nodes(self):
+        import datetime
+        from transformation import _fingerprint_source
+
+        node = {"created": datetime.date(2024, 1, 1), "schema": {"$ref": "#/components/schemas/Pet"}}
+        assert _fingerprint_source(node)[1] == ["#/components/schemas/Pet"]
+        assert _fingerprint_source([{"$ref": "#/a"}, {"x": {"$ref": "#/b"}}])[1] == ["#/a", "#/b"]
+        assert _fingerprint_source(("/pets", "get", [], node))[1] == ["#/components/schemas/Pet"]
+
+    def test_schema_change_behind_a_date_example_invalidates_its_users(self):
+        import yaml
+
+        def convert(pet_name_type):
+            spec = self._version()
+            spec["paths"]["/pets"]["get"]["parameters"][0]["example"] = "__DATE__"
+            spec["components"]["schemas"]["Pet"]["properties"]["name"]["type"] = pet_name_type
+            # YAML reads the unquoted example back as a datetime.date.
+            text = yaml.safe_dump(spec, sort_keys=False).replace("__DATE__", "2024-01-01")
+            converter = OpenAPIToMarkdown.from_content(text, "yaml")
+            return converter.convert(), converter.endpoint_cache_hits
+
+        convert("string")
+        markdown, hits = convert("integer")
+        # Every operation reaches Pet, including listPets with its date example.
+        assert hits == 0
+        assert "name: string" not in markdown
+
+    def test_self_referential_anchor_terminates(self):
+        from transformation import _collect_refs
+
+        node = {"type": "object", "properties": {"tag": {"$ref": "#/components/schemas/Tag"}}}
+        node["properties"]["child"] = node
+        assert _collect_refs(node) == ["#/components/schemas/Tag"]
+
+        spec_text = """
+openapi: 3.0.0
+info: {title: Tree, version: '1'}
+paths:
+  /nodes:
+    get:
+      operationId: getNode
+      responses:
+        '200':
+          description: ok
+          content:
+            application/json:
+              schema: {$ref: '#/components/schemas/Node'}
+components:
+  schemas:
+    Node: &node
+      type: object
+      properties:
+        child: *node
+"""
+        converter = OpenAPIToMarkdown.from_content(spec_text, "yaml")
+        assert "getNode" in converter.convert()
+        assert converter.endpoint_blocks == 1
+
 
 # ── 6. Real spec smoke tests ─────────────────────────────────────────
 
@@ -550,3 +888,9 @@ class TestRealSpecs:
         converter = OpenAPIToMarkdown(str(spec_path))
         md = converter.convert()
         assert "$ref" not in md, "Unresolved $ref found in markdown output"
+
+    def test_convert_all_matches_separate_calls(self, spec_path):
+        converter = OpenAPIToMarkdown(str(spec_path))
+        markdown, chunked = converter.convert_all()
+        assert markdown == converter.convert()
+        assert chunked == converter.convert_chunked()
@@ -0,0 +1,179 @@
+"""
+Cached, batched token counting with tiktoken.
+
+Encoders are loaded once per process and model; ``warm_up`` loads the default
+one in the API lifespan and in conversion worker processes, so no request pays
+for it. Counting goes through tiktoken's multi-threaded batch encoder: long
+documents are split at line starts, which are pre-tokenizer boundaries for the
+cl100k/o200k encodings, so the per-chunk counts add up exactly to the count of
+the whole document. ``count_tokens_batch`` counts many texts (e.g. every
+chunk of a spec) in one pass.
+
+``estimate_tokens_fast`` trades exactness for speed: a linear model over the
+byte length and a few character-class transition counts, fitted against
+cl100k_base on the example specs by ``scripts/calibrate_token_estimator.py``.
+It is roughly 15x faster than encoding and, for texts of 100+ tokens in that
+corpus, within 3% on average, 7.3% at the 95th percentile and
+FAST_ESTIMATE_MAX_ERROR at worst; whole documents land within 1%.
+"""
+
+import functools
+import os
+import re
+import string
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import tiktoken
+
+TOKEN_COUNT_MODEL = os.getenv("TOKEN_COUNT_MODEL", "gpt-4")
+TOKEN_COUNT_THREADS = int(os.getenv("TOKEN_COUNT_THREADS", "4"))
+# Documents longer than this are counted as several chunks in parallel.
+TOKEN_COUNT_CHUNK_CHARS = int(os.getenv("TOKEN_COUNT_CHUNK_CHARS", str(64 * 1024)))
+
+# A newline followed by a non-space character: no pre-token spans it.
+_LINE_START_RE = re.compile(r"\n(?=\S)")
+
+EXACT = "exact"
+FAST = "fast"
+TOKEN_COUNT_MODES = (EXACT, FAST)
+
+# (intercept, per UTF-8 byte, per punctuation->space, per punctuation->letter,
+# per digit->letter transition); refit with scripts/calibrate_token_estimator.py.
+FAST_ESTIMATE_COEFFICIENTS = (0.7689, 0.1736, 0.9979, 0.4521, 1.8664)
+# Largest relative error of the fit on the calibration corpus (texts of 100+ tokens).
+FAST_ESTIMATE_MAX_ERROR = 0.18
+
+
+def _class_table() -> bytes:
+    table = bytearray(b"x" * 256)
+    for char in string.ascii_letters:
+        table[ord(char)] = ord("a")
+    for char in string.digits:
+        table[ord(char)] = ord("0")
+    for char in string.punctuation:
+        table[ord(char)] = ord(".")
+    for char in " \t\r\x0b\x0c":
+        table[ord(char)] = ord(" ")
+    return bytes(table)
+
+
+# Maps every byte to its character class: a(lpha), 0 (digit), . (punctuation),
+# space, or x (newline, control and non-ASCII bytes).
+_CLASS_TABLE = _class_table()
+
+
+@functools.lru_cache(maxsize=None)
+def get_encoding(model: str = TOKEN_COUNT_MODEL) -> tiktoken.Encoding:
+    """The encoder for ``model`` (cl100k_base for unknown models), loaded once."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def warm_up(model: str = TOKEN_COUNT_MODEL) -> None:
+    """Load the encoder (downloading its ranks on first use) ahead of requests."""
+    get_encoding(model).encode_ordinary("warm-up")
+
+
+def split_at_line_starts(text: str, max_chars: Optional[int] = None) -> List[str]:
+    """Split ``text`` into pieces of at least ``max_chars`` that each end a line."""
+    if max_chars is None:
+        max_chars = TOKEN_COUNT_CHUNK_CHARS
+    if max_chars <= 0 or len(text) <= max_chars:
+        return [text]
+    chunks = []
+    start = 0
+    while len(text) - start > max_chars:
+        match = _LINE_START_RE.search(text, start + max_chars)
+        if match is None:
+            break
+        chunks.append(text[start:match.end()])
+        start = match.end()
+    chunks.append(text[start:])
+    return chunks
+
+
+def count_tokens_batch(texts: Sequence[str], model: str = TOKEN_COUNT_MODEL) -> List[int]:
+    """Token count of each of ``texts``, encoded together in one batch."""
+    pieces: List[str] = []
+    owners: List[int] = []
+    for index, text in enumerate(texts):
+        for piece in split_at_line_starts(text):
+            pieces.append(piece)
+            owners.append(index)
+
+    counts = [0] * len(texts)
+    if not pieces:
+        return counts
+    encoding = get_encoding(model)
+    if len(pieces) == 1:
+        counts[owners[0]] = len(encoding.encode_ordinary(pieces[0]))
+        return counts
+    encoded = encoding.encode_ordinary_batch(pieces, num_threads=max(TOKEN_COUNT_THREADS, 1))
+    for index, tokens in zip(owners, encoded):
+        counts[index] += len(tokens)
+    return counts
+
+
+def count_document_chunks(text: str, model: str = TOKEN_COUNT_MODEL) -> List[int]:
+    """Per-chunk token counts of ``text``; their sum is the document's count."""
+    chunks = split_at_line_starts(text)
+    if len(chunks) == 1:
+        return [len(get_encoding(model).encode_ordinary(text))]
+    return [
+        len(tokens)
+        for tokens in get_encoding(model).encode_ordinary_batch(chunks, num_threads=max(TOKEN_COUNT_THREADS, 1))
+    ]
+
+
+def count_tokens(text: str, model: str = TOKEN_COUNT_MODEL) -> int:
+    return sum(count_document_chunks(text, model))
+
+
+class StreamingTokenCounter:
+    """
+    Exact token count of text fed piece by piece (e.g. from
+    ``OpenAPIToMarkdown.iter_convert``). Pending text is counted in batches
+    once a few chunks' worth has accumulated, cut at line starts so the total
+    matches counting the whole document at once.
+    """
+
+    def __init__(self, count_batch: Optional[Callable[[Sequence[str]], List[int]]] = None):
+        self._count_batch = count_batch or count_tokens_batch
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        self.total = 0
+
+    def feed(self, text: str) -> None:
+        self._pending.append(text)
+        self._pending_chars += len(text)
+        if self._pending_chars > TOKEN_COUNT_CHUNK_CHARS * max(TOKEN_COUNT_THREADS, 1):
+            *ready, rest = split_at_line_starts("".join(self._pending))
+            self._pending = [rest]
+            self._pending_chars = len(rest)
+            if ready:
+                self.total += sum(self._count_batch(ready))
+
+    def finish(self) -> int:
+        """Count whatever is still pending and return the total."""
+        if self._pending:
+            self.total += sum(self._count_batch(split_at_line_starts("".join(self._pending))))
+            self._pending = []
+            self._pending_chars = 0
+        return self.total
+
+
+def fast_estimate_features(text: str) -> Tuple[int, int, int, int]:
+    """Byte length and punct->space, punct->letter, digit->letter transition counts."""
+    classes = text.encode("utf-8").translate(_CLASS_TABLE)
+    return len(classes), classes.count(b". "), classes.count(b".a"), classes.count(b"0a")
+
+
+def estimate_tokens_fast(text: str) -> int:
+    """Calibrated estimate of the cl100k token count of ``text``, without encoding."""
+    if not text:
+        return 0
+    intercept, *weights = FAST_ESTIMATE_COEFFICIENTS
+    estimate = intercept + sum(w * f for w, f in zip(weights, fast_estimate_features(text)))
+    return max(int(round(estimate)), 1)
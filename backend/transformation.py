@@ -9,17 +9,26 @@ Features:
 - Generates runnable curl examples
 - Uses strict Gitingest-style separators
 - Groups by tag, alphabetically ordered
-- Keeps chunks under 2-4k tokens per endpoint
+- Emits per-tag, per-endpoint and per-schema chunks (see chunk_budget for token ceilings)
 """
 
+import hashlib
+import itertools
 import json
+import marshal
+import multiprocessing
+import os
+import threading
 import yaml
 import sys
 import re
+import reprlib
 import xml.etree.ElementTree as ET
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
-from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
 from copy import deepcopy
 
 
@@ -140,13 +149,38 @@ def _raml_resource_to_paths(key: str, resource: dict, default_media: str) -> Dic
     return paths
 
 
-def _safe_load_raml(content: str) -> Dict[str, Any]:
-    """YAML-load RAML content, tolerating !include and other custom tags."""
-    class _RAMLLoader(yaml.SafeLoader):
+def _raml_loader(base: type) -> type:
+    """Subclass a YAML loader so RAML's !include and other custom tags load as None."""
+    class _RAMLLoader(base):
         pass
     _RAMLLoader.add_multi_constructor("!", lambda loader, suffix, node: None)
+    return _RAMLLoader
+
+
+# backend name -> (safe loader, RAML loader). libyaml's C loaders parse several
+# times faster than the pure-Python ones and are preferred whenever PyYAML was
+# built against it.
+YAML_LOADERS: Dict[str, Tuple[type, type]] = {
+    "python": (yaml.SafeLoader, _raml_loader(yaml.SafeLoader)),
+}
+try:
+    YAML_LOADERS["libyaml"] = (yaml.CSafeLoader, _raml_loader(yaml.CSafeLoader))
+except AttributeError:  # PyYAML without libyaml bindings
+    pass
+
+YAML_BACKEND = "libyaml" if "libyaml" in YAML_LOADERS else "python"
+
+
+def load_yaml(content: str, raml: bool = False, backend: Optional[str] = None) -> Any:
+    """yaml.safe_load equivalent on the fastest available backend (or the one named)."""
+    safe_loader, raml_loader = YAML_LOADERS[backend or YAML_BACKEND]
+    return yaml.load(content, Loader=raml_loader if raml else safe_loader)
+
+
+def _safe_load_raml(content: str) -> Dict[str, Any]:
+    """YAML-load RAML content, tolerating !include and other custom tags."""
     try:
-        return yaml.load(content, Loader=_RAMLLoader) or {}
+        return load_yaml(content, raml=True) or {}
     except yaml.YAMLError:
         return {}
 
@@ -554,64 +588,388 @@ def _gql_type_to_schema(gql_type: str) -> Dict[str, Any]:
     return {"type": "string", "description": f"(GraphQL type: {t})"}
 
 
+# Format hints accepted by OpenAPIToMarkdown.from_content, mapped to the file
+# suffix that drives parser selection in _load_spec.
+_FORMAT_SUFFIXES = {
+    "yaml": ".yaml", "yml": ".yaml", "json": ".json",
+    "raml": ".raml", "apib": ".apib", "wsdl": ".wsdl",
+    "graphql": ".graphql", "gql": ".graphql",
+}
+
+SpecContent = Union[str, bytes, memoryview]
+
+SPEC_CACHE_MAX_BYTES = int(os.getenv("SPEC_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Parsed spec dicts are charged this many times their source bytes: measured
+# at 2-7x on the example specs (minified JSON highest), so SPEC_CACHE_MAX_BYTES
+# bounds the memory the cached dicts actually hold.
+PARSED_SPEC_SIZE_FACTOR = 8
+SPEC_CACHE_MAX_ITEMS = int(os.getenv("SPEC_CACHE_MAX_ITEMS", "64"))
+RENDER_CACHE_MAX_BYTES = int(os.getenv("RENDER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+RENDER_CACHE_MAX_ITEMS = int(os.getenv("RENDER_CACHE_MAX_ITEMS", "100000"))
+# Specs with fewer operations render serially even when workers are offered:
+# starting a pool and shipping it the spec would cost more than it saves.
+PARALLEL_RENDER_MIN_OPERATIONS = int(os.getenv("PARALLEL_RENDER_MIN_OPERATIONS", "500"))
+# Endpoint blocks rendered per pool task.
+PARALLEL_RENDER_BATCH = 64
+
+
+class ByteBudgetLRU:
+    """
+    Thread-safe LRU bounded by a total size, as accounted by callers of
+    ``put``, and an item count; least recently used entries are evicted
+    until both limits hold.
+    """
+
+    def __init__(self, max_bytes: int, max_items: int):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.total_bytes = 0
+        self._entries: "OrderedDict[Any, Tuple[Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0 and self.max_bytes > 0
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Any, value: Any, size: int) -> None:
+        if size > self.max_bytes or self.max_items <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.total_bytes += size
+            while self.total_bytes > self.max_bytes or len(self._entries) > self.max_items:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.total_bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.total_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ParsedSpecCache(ByteBudgetLRU):
+    """
+    Process-wide LRU of parsed spec dicts keyed by (sha256 of raw bytes, format suffix).
+
+    Size is accounted as the estimated memory of the parsed dicts (source
+    bytes times PARSED_SPEC_SIZE_FACTOR). Cached dicts are shared between
+    converters and must be treated as read-only.
+    """
+
+
+class RenderedBlockCache(ByteBudgetLRU):
+    """
+    Process-wide LRU of rendered endpoint blocks keyed by operation fingerprint
+    (see ``OpenAPIToMarkdown._endpoint_fingerprints``), sized in characters.
+
+    Fingerprints cover everything a block is rendered from, so a new version
+    of a spec (or any spec sharing operations with one converted before)
+    reuses the blocks of its unchanged operations.
+    """
+
+
+PARSED_SPECS = ParsedSpecCache(SPEC_CACHE_MAX_BYTES, SPEC_CACHE_MAX_ITEMS)
+RENDERED_BLOCKS = RenderedBlockCache(RENDER_CACHE_MAX_BYTES, RENDER_CACHE_MAX_ITEMS)
+
+
+def parse_spec(content: SpecContent, suffix: str, name: str = "spec") -> Dict[str, Any]:
+    """
+    Parse raw spec content by file suffix (".yaml", ".raml", ...; "" = best-effort).
+
+    Content that was parsed before in this process is served from
+    PARSED_SPECS without running the YAML/RAML/WSDL/GraphQL/APIB parsers.
+    ``name`` titles the raw-content fallback for unparseable input.
+    """
+    raw = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+    key = (hashlib.sha256(raw).hexdigest(), suffix)
+    spec = PARSED_SPECS.get(key)
+    if spec is None:
+        text = content if isinstance(content, str) else raw.decode('utf-8')
+        spec = _parse_spec_text(text, suffix, name)
+        if '_raw_content' not in spec:
+            PARSED_SPECS.put(key, spec, len(raw) * PARSED_SPEC_SIZE_FACTOR)
+    return spec
+
+
+def _parse_spec_text(content: str, suffix: str, name: str) -> Dict[str, Any]:
+    """Load API spec from YAML, JSON, or other formats (best-effort)."""
+    if suffix == '.raml':
+        raw = _safe_load_raml(content)
+        return normalize_raml(raw)
+
+    if suffix == '.apib':
+        return normalize_apib(content)
+
+    if suffix == '.wsdl':
+        return normalize_wsdl(content)
+
+    if suffix in ('.graphql', '.gql'):
+        return normalize_graphql(content)
+
+    if suffix in ('.yaml', '.yml'):
+        return load_yaml(content) or {}
+
+    if suffix == '.json':
+        return json.loads(content)
+
+    try:
+        result = load_yaml(content)
+        if isinstance(result, dict):
+            return result
+    except Exception:
+        pass
+    try:
+        result = json.loads(content)
+        if isinstance(result, dict):
+            return result
+    except Exception:
+        pass
+
+    return {
+        "info": {"title": name, "version": "1.0.0"},
+        "_raw_content": content,
+    }
+
+
+def _resolve_pointer(spec: Any, ref: str) -> Any:
+    """
+    Walk a local JSON pointer ("#/components/schemas/User") from the spec root.
+
+    Tokens are unescaped per RFC 6901 ("~1" -> "/", "~0" -> "~"); missing
+    segments resolve to an empty dict like the rest of the converter expects.
+    """
+    node = spec
+    for token in ref.split('/')[1:]:  # Skip the '#'
+        token = token.replace('~1', '/').replace('~0', '~')
+        if isinstance(node, dict):
+            node = node.get(token, {})
+        elif isinstance(node, list) and token.isdigit() and int(token) < len(node):
+            node = node[int(token)]
+        else:
+            return {}
+    return node
+
+
+def _collect_refs(node: Any) -> List[str]:
+    """
+    Every ``$ref`` string anywhere inside a raw spec node. Each container is
+    visited once, so YAML anchors that contain themselves terminate.
+    """
+    refs = []
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        if isinstance(node, dict):
+            ref = node.get('$ref')
+            if isinstance(ref, str):
+                refs.append(ref)
+            children = node.values()
+        elif isinstance(node, (list, tuple)):
+            children = node
+        else:
+            continue
+        stack.extend(child for child in children if isinstance(child, (dict, list, tuple)))
+    return refs
+
+
+# How marshal format 2 writes a '$ref' string (e.g. the key of a reference).
+_MARSHALLED_REF = marshal.dumps('$ref', 2)
+
+
+def _fingerprint_source(node: Any) -> Tuple[bytes, List[str]]:
+    """
+    Serialize a raw spec node for fingerprinting and list the ``$ref``
+    strings inside it.
+
+    marshal format 2 has no back-references, so equal nodes always serialize
+    alike, and it keeps key order and value types, which both show in the
+    output. Nodes marshal can't write (e.g. dates) fall back to ``repr`` and
+    a walk for their refs.
+    """
+    try:
+        data = marshal.dumps(node, 2)
+    except ValueError:
+        return repr(node).encode('utf-8'), _collect_refs(node)
+    refs = []
+    start = data.find(_MARSHALLED_REF)
+    while start >= 0:
+        value = start + len(_MARSHALLED_REF)
+        if data[value:value + 1] != b'u':
+            break
+        end = value + 5 + int.from_bytes(data[value + 1:value + 5], 'little')
+        refs.append(data[value + 5:end].decode('utf-8', 'surrogatepass'))
+        start = data.find(_MARSHALLED_REF, end)
+    if len(refs) != data.count(_MARSHALLED_REF):
+        # A non-string $ref, or '$ref' bytes inside some other value.
+        refs = _collect_refs(node)
+    return data, refs
+
+
+_UNRESOLVED = object()
+
+
+class _RefMapping(Mapping):
+    """
+    Read-only view of a spec dict that dereferences $ref values on access.
+
+    Nothing is copied: values are looked up in the underlying spec node,
+    wrapped again only when they can still contain a $ref, and remembered
+    so repeated reads of a shared schema stay cheap.
+    """
+
+    __slots__ = ('_converter', '_node', '_depth', '_max_depth', '_resolved')
+
+    def __init__(self, converter: "OpenAPIToMarkdown", node: Dict[str, Any], depth: int, max_depth: int):
+        self._converter = converter
+        self._node = node
+        self._depth = depth
+        self._max_depth = max_depth
+        self._resolved: Dict[Any, Any] = {}
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self._resolved.get(key, _UNRESOLVED)
+        if value is _UNRESOLVED:
+            value = self._resolved[key] = self._converter._dereference(
+                self._node[key], self._depth, self._max_depth
+            )
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        value = self._resolved.get(key, _UNRESOLVED)
+        if value is _UNRESOLVED:
+            if key not in self._node:
+                return default
+            value = self._resolved[key] = self._converter._dereference(
+                self._node[key], self._depth, self._max_depth
+            )
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._node
+
+    def __iter__(self):
+        return iter(self._node)
+
+    def __len__(self) -> int:
+        return len(self._node)
+
+    @reprlib.recursive_repr()
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
+class _RefList(Sequence):
+    """Read-only view of a spec list; the list counterpart of _RefMapping."""
+
+    __slots__ = ('_converter', '_node', '_depth', '_max_depth')
+
+    def __init__(self, converter: "OpenAPIToMarkdown", node: List[Any], depth: int, max_depth: int):
+        self._converter = converter
+        self._node = node
+        self._depth = depth
+        self._max_depth = max_depth
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return [self._converter._dereference(item, self._depth, self._max_depth) for item in self._node[index]]
+        return self._converter._dereference(self._node[index], self._depth, self._max_depth)
+
+    def __len__(self) -> int:
+        return len(self._node)
+
+    @reprlib.recursive_repr()
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def _plain(value: Any) -> Any:
+    """Copy a dereferenced view back into ordinary dicts and lists (e.g. for JSON)."""
+    if isinstance(value, Mapping):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, _RefList)):
+        return [_plain(item) for item in value]
+    return value
+
+
 class OpenAPIToMarkdown:
     """Convert OpenAPI specification to LLM-ready markdown format."""
     
-    def __init__(self, spec_path: str, output_path: Optional[str] = None):
+    def __init__(
+        self,
+        spec_path: str,
+        output_path: Optional[str] = None,
+        content: Optional[SpecContent] = None,
+    ):
         self.spec_path = Path(spec_path)
-        self.spec = self._load_spec()
-        self.components = self.spec.get('components', {})
-        self.dereferenced_cache = {}
+        self._bind_spec(self._load_spec(content))
         
         # Generate output path based on API name and version
         if output_path:
             self.output_path = Path(output_path)
         else:
             self.output_path = self._generate_output_filename()
-        
-    def _load_spec(self) -> Dict[str, Any]:
-        """Load API spec from YAML, JSON, or other formats (best-effort)."""
-        with open(self.spec_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        suffix = self.spec_path.suffix.lower()
-
-        if suffix == '.raml':
-            raw = _safe_load_raml(content)
-            return normalize_raml(raw)
-
-        if suffix == '.apib':
-            return normalize_apib(content)
-
-        if suffix == '.wsdl':
-            return normalize_wsdl(content)
 
-        if suffix in ('.graphql', '.gql'):
-            return normalize_graphql(content)
-
-        if suffix in ('.yaml', '.yml'):
-            return yaml.safe_load(content) or {}
-
-        if suffix == '.json':
-            return json.loads(content)
+    def _bind_spec(self, spec: Dict[str, Any]) -> None:
+        self.spec = spec
+        self.components = self.spec.get('components', {})
+        # $ref string -> raw target node, filled as pointers are first resolved.
+        self._ref_index: Dict[str, Any] = {}
+        # Dereferenced $ref targets keyed by (ref, depth, max_depth), shared by every use site.
+        self._ref_targets: Dict[Tuple[str, int, int], Any] = {}
+        # Endpoint blocks in the last rendering pass, and how many came from RENDERED_BLOCKS.
+        self.endpoint_blocks = 0
+        self.endpoint_cache_hits = 0
+
+    @classmethod
+    def _from_parsed(cls, spec: Dict[str, Any], spec_path: str) -> "OpenAPIToMarkdown":
+        """Bind a converter to an already-parsed spec, e.g. one shipped to a render worker."""
+        converter = cls.__new__(cls)
+        converter.spec_path = Path(spec_path)
+        converter._bind_spec(spec)
+        converter.output_path = converter._generate_output_filename()
+        return converter
+
+    @classmethod
+    def from_content(
+        cls,
+        content: SpecContent,
+        spec_format: str = "yaml",
+        output_path: Optional[str] = None,
+    ) -> "OpenAPIToMarkdown":
+        """
+        Build a converter from an in-memory spec instead of a file on disk.
 
-        try:
-            result = yaml.safe_load(content)
-            if isinstance(result, dict):
-                return result
-        except Exception:
-            pass
-        try:
-            result = json.loads(content)
-            if isinstance(result, dict):
-                return result
-        except Exception:
-            pass
+        spec_format is a format name (yaml, json, raml, apib, wsdl, graphql)
+        or a file extension; unknown formats use best-effort detection.
+        """
+        fmt = spec_format.lower().lstrip('.') if spec_format else ''
+        suffix = _FORMAT_SUFFIXES.get(fmt, '')
+        return cls(f"spec{suffix}", output_path, content=content)
 
-        return {
-            "info": {"title": self.spec_path.stem, "version": "1.0.0"},
-            "_raw_content": content,
-        }
+    def _load_spec(self, content: Optional[SpecContent] = None) -> Dict[str, Any]:
+        """Load API spec from YAML, JSON, or other formats (best-effort)."""
+        if content is None:
+            with open(self.spec_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        return parse_spec(content, self.spec_path.suffix.lower(), self.spec_path.stem)
     
     def _generate_output_filename(self) -> Path:
         """Generate output filename based on API name and version."""
@@ -633,35 +991,54 @@ class OpenAPIToMarkdown:
         # Place in same directory as input file
         return self.spec_path.parent / filename
     
+    def _resolve_ref(self, ref: str) -> Any:
+        """Return the raw node a $ref points at."""
+        target = self._ref_index.get(ref)
+        if target is None:
+            target = self._ref_index[ref] = _resolve_pointer(self.spec, ref)
+        return target
+
     def _dereference(self, ref_or_obj: Any, depth: int = 0, max_depth: int = 3) -> Any:
         """
         Dereference $ref pointers (shallow inline for readability).
         Limits depth to avoid excessive expansion.
+
+        Containers come back as lazy read-only views over the spec, so only
+        the keys a renderer actually reads are ever resolved.
         """
+        node_type = type(ref_or_obj)
+        if node_type is _RefMapping or node_type is _RefList:
+            # Re-dereferencing a view: keep it unless more depth is asked for.
+            if ref_or_obj._depth <= depth:
+                return ref_or_obj
+            ref_or_obj = ref_or_obj._node
+            node_type = type(ref_or_obj)
+
         if depth > max_depth:
             return ref_or_obj
-            
-        if isinstance(ref_or_obj, dict):
-            if '$ref' in ref_or_obj:
-                ref = ref_or_obj['$ref']
-                if ref in self.dereferenced_cache:
-                    return self.dereferenced_cache[ref]
-                
-                # Parse reference like "#/components/schemas/User"
-                parts = ref.split('/')
-                obj = self.spec
-                for part in parts[1:]:  # Skip the '#'
-                    obj = obj.get(part, {})
-                
-                self.dereferenced_cache[ref] = obj
-                return self._dereference(obj, depth + 1, max_depth)
-            else:
-                return {k: self._dereference(v, depth, max_depth) for k, v in ref_or_obj.items()}
-        elif isinstance(ref_or_obj, list):
-            return [self._dereference(item, depth, max_depth) for item in ref_or_obj]
+
+        if node_type is dict:
+            ref = ref_or_obj.get('$ref')
+            if isinstance(ref, str):
+                key = (ref, depth, max_depth)
+                target = self._ref_targets.get(key)
+                if target is None:
+                    target = self._ref_targets[key] = self._dereference(
+                        self._resolve_ref(ref), depth + 1, max_depth
+                    )
+                return target
+            for value in ref_or_obj.values():
+                if isinstance(value, (dict, list)):
+                    return _RefMapping(self, ref_or_obj, depth, max_depth)
+            return ref_or_obj
+        elif node_type is list:
+            for item in ref_or_obj:
+                if isinstance(item, (dict, list)):
+                    return _RefList(self, ref_or_obj, depth, max_depth)
+            return ref_or_obj
         else:
             return ref_or_obj
-    
+
     def _normalize_type(self, schema: Dict[str, Any]) -> str:
         """Normalize schema type to readable format."""
         if not schema:
@@ -1032,94 +1409,108 @@ class OpenAPIToMarkdown:
         
         return dict(endpoints_by_tag)
     
-    def _generate_components_appendix(self) -> str:
-        """Generate appendix with shared components/schemas."""
-        schemas = self.components.get('schemas', {})
-        if not schemas:
-            return ""
-        
-        lines = [
-            "",
-            "=" * 80,
-            "## COMPONENTS APPENDIX",
-            "=" * 80,
-            "",
-            "Shared schemas referenced throughout the API:",
-            ""
-        ]
-        
-        for schema_name in sorted(schemas.keys()):
-            schema = self._dereference(schemas[schema_name])
-            schema_type = schema.get('type', 'object')
-            description = schema.get('description', '')
-            
-            lines.append(f"### {schema_name}")
-            lines.append(f"Type: {schema_type}")
-            if description:
-                lines.append(f"Description: {description[:200]}{'...' if len(description) > 200 else ''}")
-            lines.append("")
-            lines.append(self._format_schema_inline(schema, indent=0))
-            lines.append("")
-        
-        return '\n'.join(lines)
-    
     def _get_base_url(self) -> str:
         servers = self.spec.get('servers', [])
         return servers[0].get('url', 'https://api.example.com') if servers else 'https://api.example.com'
 
-    def convert(self) -> str:
-        """Main conversion method. Returns a single monolithic markdown string."""
-        base_url = self._get_base_url()
-        header = self._generate_header()
-        endpoints_by_tag = self._group_endpoints_by_tag()
-        toc = self._generate_toc(endpoints_by_tag)
-
-        endpoint_blocks = ["\n## Endpoint Details\n"]
-        for tag in sorted(endpoints_by_tag.keys()):
-            endpoint_blocks.append(f"\n### Tag: {tag}\n")
-            endpoints = endpoints_by_tag[tag]
-            sorted_endpoints = sorted(endpoints, key=lambda x: (x[1], x[0]))
-            for path, method, operation in sorted_endpoints:
-                tags = operation.get('tags', [tag])
-                block = self._format_endpoint(path, method, operation, tags, base_url)
-                endpoint_blocks.append(block)
-
-        appendix = self._generate_components_appendix()
-        markdown = header + "\n" + toc + "\n" + ''.join(endpoint_blocks)
-        if appendix:
-            markdown += "\n" + appendix
-        return markdown
+    def _format_schema_block(self, schema_name: str) -> str:
+        """Format one component schema as used by the appendix and schema chunks."""
+        schema = self._dereference(self.components['schemas'][schema_name])
+        schema_type = schema.get('type', 'object')
+        description = schema.get('description', '')
+        lines = [f"### {schema_name}", f"Type: {schema_type}"]
+        if description:
+            lines.append(f"Description: {description[:200]}{'...' if len(description) > 200 else ''}")
+        lines.append("")
+        lines.append(self._format_schema_inline(schema, indent=0))
+        lines.append("")
+        return "\n".join(lines)
 
-    def convert_chunked(self) -> Dict[str, Any]:
+    def _render_fragments(self) -> Dict[str, Any]:
         """
-        Progressive-disclosure output: returns a dict with separately
-        addressable manifest, per-tag summaries, per-endpoint blocks,
-        and per-schema definitions.
+        Single rendering pass shared by convert() and convert_chunked().
+
+        Every endpoint block and schema block is formatted exactly once;
+        operations listed under several tags reuse the same block.
 
         Keys:
-          manifest  - str: title, version, base URLs, auth, tag→endpoint index
-          tags      - dict[str, str]: per-tag summary markdown
-          endpoints - dict[str, str]: keyed by operationId (or METHOD_path fallback)
-          schemas   - dict[str, str]: per-component schema markdown
+          manifest - str: header + table of contents
+          tags     - list of (tag, [(path, method, operation, op_id, block)])
+          schemas  - list of (schema_name, block), alphabetically ordered
         """
         base_url = self._get_base_url()
         endpoints_by_tag = self._group_endpoints_by_tag()
-
         manifest = self._generate_header() + "\n" + self._generate_toc(endpoints_by_tag)
 
+        listings, operations = self._order_endpoints(endpoints_by_tag)
+        blocks = {
+            (path, method): block
+            for (path, method, _, _), block in zip(
+                operations, self._iter_endpoint_blocks(operations, base_url)
+            )
+        }
+        tags: List[Tuple[str, List[Tuple[str, str, Dict, str, str]]]] = []
+        for tag in sorted(listings):
+            entries = []
+            for path, method, operation in listings[tag]:
+                op_id = operation.get('operationId') or f"{method.upper()}_{path.replace('/', '_').strip('_')}"
+                entries.append((path, method, operation, op_id, blocks[(path, method)]))
+            tags.append((tag, entries))
+
+        schemas = [
+            (schema_name, self._format_schema_block(schema_name))
+            for schema_name in sorted(self.components.get('schemas', {}).keys())
+        ]
+
+        return {"manifest": manifest, "tags": tags, "schemas": schemas}
+
+    @staticmethod
+    def _iter_markdown(
+        manifest: str,
+        tags: Iterable[Tuple[str, Iterable[str]]],
+        schema_blocks: Iterable[str],
+    ) -> Iterator[str]:
+        """Yield the monolithic markdown document piece by piece, in order."""
+        yield manifest
+        yield "\n"
+        yield "\n## Endpoint Details\n"
+        for tag, blocks in tags:
+            yield f"\n### Tag: {tag}\n"
+            yield from blocks
+
+        appendix_started = False
+        for block in schema_blocks:
+            if not appendix_started:
+                appendix_started = True
+                yield "\n" + '\n'.join([
+                    "",
+                    "=" * 80,
+                    "## COMPONENTS APPENDIX",
+                    "=" * 80,
+                    "",
+                    "Shared schemas referenced throughout the API:",
+                    "",
+                ])
+            yield "\n" + block
+
+    @classmethod
+    def _assemble_markdown(cls, fragments: Dict[str, Any]) -> str:
+        """Join rendered fragments into the monolithic markdown document."""
+        return ''.join(cls._iter_markdown(
+            fragments["manifest"],
+            ((tag, (entry[4] for entry in entries)) for tag, entries in fragments["tags"]),
+            (block for _, block in fragments["schemas"]),
+        ))
+
+    @staticmethod
+    def _assemble_chunked(fragments: Dict[str, Any]) -> Dict[str, Any]:
+        """Split rendered fragments into progressive-disclosure chunks."""
         tags_dict: Dict[str, str] = {}
         endpoints_dict: Dict[str, str] = {}
 
-        for tag in sorted(endpoints_by_tag.keys()):
+        for tag, entries in fragments["tags"]:
             tag_lines = [f"## {tag}", ""]
-            endpoints = endpoints_by_tag[tag]
-            sorted_endpoints = sorted(endpoints, key=lambda x: (x[1], x[0]))
-
-            for path, method, operation in sorted_endpoints:
-                op_tags = operation.get('tags', [tag])
-                block = self._format_endpoint(path, method, operation, op_tags, base_url)
-
-                op_id = operation.get('operationId') or f"{method.upper()}_{path.replace('/', '_').strip('_')}"
+            for path, method, operation, op_id, block in entries:
                 endpoints_dict[op_id] = block
 
                 summary = operation.get('summary', operation.get('description', ''))
@@ -1130,25 +1521,235 @@ class OpenAPIToMarkdown:
             tag_lines.append("")
             tags_dict[tag] = "\n".join(tag_lines)
 
-        schemas_dict: Dict[str, str] = {}
-        for schema_name in sorted(self.components.get('schemas', {}).keys()):
-            schema = self._dereference(self.components['schemas'][schema_name])
-            schema_type = schema.get('type', 'object')
-            description = schema.get('description', '')
-            lines = [f"### {schema_name}", f"Type: {schema_type}"]
-            if description:
-                lines.append(f"Description: {description[:200]}{'...' if len(description) > 200 else ''}")
-            lines.append("")
-            lines.append(self._format_schema_inline(schema, indent=0))
-            lines.append("")
-            schemas_dict[schema_name] = "\n".join(lines)
-
         return {
-            "manifest": manifest,
+            "manifest": fragments["manifest"],
             "tags": tags_dict,
             "endpoints": endpoints_dict,
-            "schemas": schemas_dict,
+            "schemas": dict(fragments["schemas"]),
+        }
+
+    def convert(self) -> str:
+        """Main conversion method. Returns a single monolithic markdown string."""
+        return ''.join(self.iter_convert())
+
+    def iter_convert(self, workers: int = 1) -> Iterator[str]:
+        """
+        Generate the convert() document incrementally: the header and table of
+        contents, then each tag heading and endpoint block, then the schema
+        appendix. Blocks are formatted as they are yielded, so only blocks of
+        operations listed under several tags are kept around for reuse.
+        Endpoint blocks rendered before, by any converter in this process,
+        come from RENDERED_BLOCKS.
+
+        With ``workers`` > 1 and at least PARALLEL_RENDER_MIN_OPERATIONS
+        endpoint blocks to render, they are rendered by a pool of that many
+        processes; the output is identical to serial rendering.
+        """
+        base_url = self._get_base_url()
+        endpoints_by_tag = self._group_endpoints_by_tag()
+        manifest = self._generate_header() + "\n" + self._generate_toc(endpoints_by_tag)
+        listings, operations = self._order_endpoints(endpoints_by_tag)
+        blocks = self._iter_endpoint_blocks(operations, base_url, workers)
+        shared_blocks: Dict[Tuple[str, str], str] = {}
+
+        def tag_blocks(tag: str) -> Iterator[str]:
+            for path, method, operation in listings[tag]:
+                block = shared_blocks.get((path, method))
+                if block is None:
+                    block = next(blocks)
+                    if len(operation.get('tags', [tag])) > 1:
+                        shared_blocks[(path, method)] = block
+                yield block
+
+        yield from self._iter_markdown(
+            manifest,
+            ((tag, tag_blocks(tag)) for tag in sorted(listings)),
+            (
+                self._format_schema_block(schema_name)
+                for schema_name in sorted(self.components.get('schemas', {}).keys())
+            ),
+        )
+
+    @staticmethod
+    def _order_endpoints(
+        endpoints_by_tag: Dict[str, List[Tuple[str, str, Dict]]],
+    ) -> Tuple[Dict[str, List[Tuple[str, str, Dict]]], List[Tuple[str, str, Dict, List[str]]]]:
+        """
+        Each tag's endpoints in document order, and every operation once as
+        ``(path, method, operation, tags)`` in the order its block is first needed.
+        """
+        listings = {
+            tag: sorted(endpoints, key=lambda x: (x[1], x[0]))
+            for tag, endpoints in endpoints_by_tag.items()
         }
+        operations: List[Tuple[str, str, Dict, List[str]]] = []
+        seen = set()
+        for tag in sorted(listings):
+            for path, method, operation in listings[tag]:
+                if (path, method) not in seen:
+                    seen.add((path, method))
+                    operations.append((path, method, operation, operation.get('tags', [tag])))
+        return listings, operations
+
+    def _endpoint_fingerprints(
+        self,
+        operations: List[Tuple[str, str, Dict, List[str]]],
+        base_url: str,
+    ) -> List[str]:
+        """
+        A stable digest per operation of everything its block is rendered
+        from: path, method, tags, the raw operation, the raw target of every
+        $ref reachable from it, the base URL and the security context.
+
+        Raw nodes are hashed as serialized by ``_fingerprint_source``. Each
+        $ref gets one digest covering its target and everything reachable from
+        it, shared by every operation using it.
+        """
+        context = hashlib.sha256(repr((
+            base_url,
+            self.spec.get('security', []),
+            self.components.get('securitySchemes', {}),
+        )).encode('utf-8'))
+        targets: Dict[str, Tuple[bytes, List[str]]] = {}
+        closures: Dict[str, bytes] = {}
+
+        def target(ref: str) -> Tuple[bytes, List[str]]:
+            """Digest of the raw node ``ref`` points at, and the $refs inside it."""
+            entry = targets.get(ref)
+            if entry is None:
+                data, refs = _fingerprint_source(self._resolve_ref(ref))
+                entry = targets[ref] = (hashlib.sha256(data).digest(), refs)
+            return entry
+
+        def closure(ref: str) -> bytes:
+            """Digest of every target reachable from ``ref``, itself included."""
+            digest = closures.get(ref)
+            if digest is None:
+                reachable = {ref}
+                pending = [ref]
+                while pending:
+                    for child in target(pending.pop())[1]:
+                        if child not in reachable:
+                            reachable.add(child)
+                            pending.append(child)
+                combined = hashlib.sha256()
+                for reached in sorted(reachable):
+                    combined.update(reached.encode('utf-8') + b"\0" + target(reached)[0])
+                digest = closures[ref] = combined.digest()
+            return digest
+
+        fingerprints = []
+        for path, method, operation, op_tags in operations:
+            data, refs = _fingerprint_source((path, method, op_tags, operation))
+            digest = context.copy()
+            digest.update(data)
+            for ref in sorted(set(refs)):
+                digest.update(ref.encode('utf-8') + b"\0" + closure(ref))
+            fingerprints.append(digest.hexdigest())
+        return fingerprints
+
+    def _iter_endpoint_blocks(
+        self,
+        operations: List[Tuple[str, str, Dict, List[str]]],
+        base_url: str,
+        workers: int = 1,
+    ) -> Iterator[str]:
+        """
+        Yield the endpoint block of each ``(path, method, operation, tags)``
+        in order. Blocks of operations whose fingerprint is in RENDERED_BLOCKS
+        are reused; only the rest are rendered, and then cached. Sets
+        ``endpoint_blocks`` and ``endpoint_cache_hits`` for the caller's stats.
+        """
+        self.endpoint_blocks = len(operations)
+        if RENDERED_BLOCKS.enabled:
+            fingerprints = self._endpoint_fingerprints(operations, base_url)
+            cached = [RENDERED_BLOCKS.get(fingerprint) for fingerprint in fingerprints]
+        else:
+            fingerprints = cached = [None] * len(operations)
+        misses = [operation for operation, block in zip(operations, cached) if block is None]
+        self.endpoint_cache_hits = len(operations) - len(misses)
+
+        rendered = self._render_endpoint_blocks(misses, base_url, workers)
+        for fingerprint, block in zip(fingerprints, cached):
+            if block is None:
+                block = next(rendered)
+                if fingerprint is not None:
+                    RENDERED_BLOCKS.put(fingerprint, block, len(block))
+            yield block
+
+    def _render_endpoint_blocks(
+        self,
+        operations: List[Tuple[str, str, Dict, List[str]]],
+        base_url: str,
+        workers: int,
+    ) -> Iterator[str]:
+        """
+        Render the endpoint block of each ``(path, method, operation, tags)``
+        in order, serially or, for many operations, in a process pool.
+
+        Each pool worker receives the parsed spec once and renders contiguous
+        batches of operations; at most two batches per worker are in flight,
+        so finished blocks don't pile up ahead of a slow consumer. Daemonic
+        processes (e.g. conversion executor workers) can't start a pool and
+        always render serially.
+        """
+        if (
+            workers <= 1
+            or len(operations) < max(PARALLEL_RENDER_MIN_OPERATIONS, 2)
+            or multiprocessing.current_process().daemon
+        ):
+            for path, method, operation, op_tags in operations:
+                yield self._format_endpoint(path, method, operation, op_tags, base_url)
+            return
+
+        batches = iter([
+            [(path, method, op_tags) for path, method, _, op_tags in operations[i:i + PARALLEL_RENDER_BATCH]]
+            for i in range(0, len(operations), PARALLEL_RENDER_BATCH)
+        ])
+        pool = ProcessPoolExecutor(
+            max_workers=min(workers, -(-len(operations) // PARALLEL_RENDER_BATCH)),
+            # spawn: never fork a process that may be running threads.
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_render_worker,
+            initargs=(self.spec, str(self.spec_path), base_url),
+        )
+        try:
+            pending = deque(
+                pool.submit(_render_endpoint_batch, batch)
+                for batch in itertools.islice(batches, workers * 2)
+            )
+            while pending:
+                rendered = pending.popleft().result()
+                batch = next(batches, None)
+                if batch is not None:
+                    pending.append(pool.submit(_render_endpoint_batch, batch))
+                yield from rendered
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def convert_chunked(self) -> Dict[str, Any]:
+        """
+        Progressive-disclosure output: returns a dict with separately
+        addressable manifest, per-tag summaries, per-endpoint blocks,
+        and per-schema definitions.
+
+        Keys:
+          manifest  - str: title, version, base URLs, auth, tag→endpoint index
+          tags      - dict[str, str]: per-tag summary markdown
+          endpoints - dict[str, str]: keyed by operationId (or METHOD_path fallback)
+          schemas   - dict[str, str]: per-component schema markdown
+        """
+        return self._assemble_chunked(self._render_fragments())
+
+    def convert_all(self) -> Tuple[str, Dict[str, Any]]:
+        """
+        Render once and return both (markdown, chunked).
+
+        Equivalent to calling convert() and convert_chunked() but formats
+        each endpoint and schema only once.
+        """
+        fragments = self._render_fragments()
+        return self._assemble_markdown(fragments), self._assemble_chunked(fragments)
 
     def generate_tool_schemas(self) -> List[Dict[str, Any]]:
         """
@@ -1182,9 +1783,9 @@ class OpenAPIToMarkdown:
 
                     param_prop: Dict[str, Any] = {}
                     if p_schema.get('type'):
-                        param_prop['type'] = p_schema['type']
+                        param_prop['type'] = _plain(p_schema['type'])
                     if p_schema.get('enum'):
-                        param_prop['enum'] = p_schema['enum']
+                        param_prop['enum'] = _plain(p_schema['enum'])
                     if desc:
                         param_prop['description'] = desc
                     if p_schema.get('format'):
@@ -1206,9 +1807,9 @@ class OpenAPIToMarkdown:
                             bp_schema = self._dereference(bp_raw_schema)
                             body_prop: Dict[str, Any] = {}
                             if bp_schema.get('type'):
-                                body_prop['type'] = bp_schema['type']
+                                body_prop['type'] = _plain(bp_schema['type'])
                             if bp_schema.get('enum'):
-                                body_prop['enum'] = bp_schema['enum']
+                                body_prop['enum'] = _plain(bp_schema['enum'])
                             if bp_schema.get('description'):
                                 body_prop['description'] = bp_schema['description']
                             if bp_schema.get('format'):
@@ -1234,13 +1835,37 @@ class OpenAPIToMarkdown:
 
         return tools
     
-    def save(self, content: str):
-        """Save markdown to file."""
+    def save(self, content: Union[str, Iterable[str]]):
+        """Save markdown to file; ``content`` may be a string or an iterable of pieces."""
         self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        chunks = [content] if isinstance(content, str) else content
+        size = 0
         with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            for chunk in chunks:
+                f.write(chunk)
+                size += len(chunk)
         print(f"✅ Generated LLM-ready markdown: {self.output_path}")
-        print(f"📊 File size: {len(content):,} characters")
+        print(f"📊 File size: {size:,} characters")
+
+
+# Converter bound to the spec a render pool worker was started with, and its base URL.
+_render_worker_state: Optional[Tuple[OpenAPIToMarkdown, str]] = None
+
+
+def _init_render_worker(spec: Dict[str, Any], spec_path: str, base_url: str) -> None:
+    """Render pool initializer: keep the shipped spec for every batch this worker renders."""
+    global _render_worker_state
+    _render_worker_state = (OpenAPIToMarkdown._from_parsed(spec, spec_path), base_url)
+
+
+def _render_endpoint_batch(batch: List[Tuple[str, str, List[str]]]) -> List[str]:
+    """Render the endpoint blocks of ``(path, method, tags)`` operations in a pool worker."""
+    converter, base_url = _render_worker_state
+    paths = converter.spec['paths']
+    return [
+        converter._format_endpoint(path, method, paths[path][method], op_tags, base_url)
+        for path, method, op_tags in batch
+    ]
 
 
 def main():
@@ -1254,6 +1879,10 @@ def main():
     parser.add_argument("output", nargs="?", default=None, help="Output file path (default: auto-generated)")
     parser.add_argument("--chunked", action="store_true", help="Output progressive-disclosure chunks as JSON")
     parser.add_argument("--tools", action="store_true", help="Output JSON Schema tool definitions for function-calling")
+    parser.add_argument(
+        "--workers", type=int, default=1,
+        help="Render the endpoints of large specs in this many processes (0: one per CPU)",
+    )
 
     args = parser.parse_args()
 
@@ -1271,8 +1900,8 @@ def main():
             Path(out_path).write_text(json.dumps(result, indent=2), encoding="utf-8")
             print(f"Tool schemas written to {out_path}")
         else:
-            markdown = converter.convert()
-            converter.save(markdown)
+            workers = args.workers if args.workers > 0 else os.cpu_count() or 1
+            converter.save(converter.iter_convert(workers=workers))
     except Exception as e:
         print(f"Error: {e}")
         import traceback
@@ -1,12 +1,69 @@
 """Shared utility helpers for backend services."""
 
-import tiktoken
+import json
+from typing import Any, Dict, List, Sequence, Tuple
 
+import token_counter
 
-def estimate_token_count(text: str, model: str = "gpt-4") -> int:
-    """Estimate token count for markdown content using tiktoken."""
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-    except KeyError:
-        encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
+
+def estimate_token_count(text: str, model: str = "gpt-4", mode: str = token_counter.EXACT) -> int:
+    """
+    Estimate token count for markdown content.
+
+    ``mode="exact"`` encodes with tiktoken; ``mode="fast"`` uses the calibrated
+    character-class estimate (see token_counter) for threshold checks and
+    previews where speed matters more than the last few percent.
+    """
+    if mode == token_counter.FAST:
+        return token_counter.estimate_tokens_fast(text)
+    if mode != token_counter.EXACT:
+        raise ValueError(f"Unknown token count mode: {mode!r}")
+    return token_counter.count_tokens(text, model)
+
+
+def estimate_token_counts(texts: Sequence[str], model: str = "gpt-4") -> List[int]:
+    """Token counts for several texts, counted in one batch."""
+    return token_counter.count_tokens_batch(texts, model)
+
+
+def token_count_stream(model: str = "gpt-4") -> token_counter.StreamingTokenCounter:
+    """An exact counter for markdown produced piece by piece."""
+    return token_counter.StreamingTokenCounter(lambda texts: estimate_token_counts(texts, model))
+
+
+def dump_json(content: Any) -> str:
+    """Serialize exactly like FastAPI's JSONResponse so stored JSON can be served verbatim."""
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":"))
+
+
+def build_spec_artifacts(converter: Any) -> Tuple[str, str]:
+    """
+    Build the stored read artifacts for a spec: (chunks_json, tools_json).
+
+    chunks_json is the convert_chunked() payload plus a ``token_counts`` map
+    of the same shape (manifest, tags, endpoints, schemas) with one count per chunk.
+    """
+    chunked: Dict[str, Any] = dict(converter.convert_chunked())
+    sections = ("tags", "endpoints", "schemas")
+    # Count every chunk in one batch, then hand the counts back out in order.
+    counts = iter(estimate_token_counts(
+        [chunked["manifest"]] + [text for section in sections for text in chunked[section].values()]
+    ))
+    chunked["token_counts"] = {
+        "manifest": next(counts),
+        **{section: {key: next(counts) for key in chunked[section]} for section in sections},
+    }
+    return dump_json(chunked), dump_json(converter.generate_tool_schemas())
+
+
+def extract_tag_names(spec: Dict[str, Any], limit: int = 5) -> List[str]:
+    """Return up to ``limit`` tag names from a spec's top-level ``tags`` list."""
+    raw_tags = spec.get("tags", [])
+    tag_names: List[str] = []
+    if isinstance(raw_tags, list):
+        for tag in raw_tags[:limit]:
+            if isinstance(tag, dict) and "name" in tag:
+                tag_names.append(tag["name"])
+            elif isinstance(tag, str):
+                tag_names.append(tag)
+    return tag_names
@@ -20,6 +20,7 @@ export default function HomeClient({ starCount }: HomeClientProps) {
   const [convertedFilename, setConvertedFilename] = useState('converted.md')
   const [convertedTokenCount, setConvertedTokenCount] = useState<number | null>(null)
   const [convertedProvider, setConvertedProvider] = useState<string | null>(null)
+  const [convertedJobId, setConvertedJobId] = useState<string | null>(null)
   const fileInputRef = useRef<HTMLInputElement>(null)
   const REQUEST_TIMEOUT_MS = 120000
 
@@ -85,6 +86,49 @@ export default function HomeClient({ starCount }: HomeClientProps) {
     throw new Error('Conversion timed out while waiting for background job')
   }
 
+  // Resolves with the completed job, rejects if it failed, and resolves null
+  // when the event stream is unavailable so the caller can fall back to polling.
+  const streamConversionJob = (apiUrl: string, jobId: string) =>
+    new Promise<any>((resolve, reject) => {
+      if (typeof EventSource === 'undefined') {
+        resolve(null)
+        return
+      }
+
+      const source = new EventSource(`${apiUrl}/api/convert/${jobId}/events`)
+      const timeout = window.setTimeout(() => {
+        source.close()
+        reject(new Error('Conversion timed out while waiting for background job'))
+      }, 10 * 60 * 1000)
+      const finish = () => {
+        window.clearTimeout(timeout)
+        source.close()
+      }
+
+      source.addEventListener('completed', (event) => {
+        finish()
+        resolve(JSON.parse((event as MessageEvent).data))
+      })
+      source.addEventListener('failed', (event) => {
+        finish()
+        const body = JSON.parse((event as MessageEvent).data)
+        reject(new Error(body?.error || 'Conversion job failed'))
+      })
+      source.addEventListener('gone', () => {
+        finish()
+        reject(new Error('Conversion job expired'))
+      })
+      source.onerror = () => {
+        finish()
+        resolve(null)
+      }
+    })
+
+  const waitForConversionJob = async (apiUrl: string, jobId: string, requestId: string) => {
+    const streamedJob = await streamConversionJob(apiUrl, jobId)
+    return streamedJob ?? pollConversionJob(apiUrl, jobId, requestId)
+  }
+
   const triggerDownload = (blob: Blob, filename: string) => {
     const url = window.URL.createObjectURL(blob)
     const a = document.createElement('a')
@@ -102,6 +146,7 @@ export default function HomeClient({ starCount }: HomeClientProps) {
     setConvertedFilename('converted.md')
     setConvertedTokenCount(null)
     setConvertedProvider(null)
+    setConvertedJobId(null)
     setShowContributeDialog(false)
 
     if (fileInputRef.current) {
@@ -172,7 +217,7 @@ export default function HomeClient({ starCount }: HomeClientProps) {
         },
       })
 
-      if (response.status !== 202) {
+      if (response.status !== 200 && response.status !== 202) {
         let message = 'Conversion failed'
         try {
           const errorData = await response.json()
@@ -189,24 +234,32 @@ export default function HomeClient({ starCount }: HomeClientProps) {
         throw new Error(message)
       }
 
-      const enqueueBody = await response.json()
-      const jobId = enqueueBody?.job_id
-      if (!jobId) {
-        throw new Error('Missing conversion job id from server')
-      }
-      toast.info('Conversion queued. Processing in background...')
-
-      const completedJob = await pollConversionJob(apiUrl, jobId, requestId)
-
-      const downloadResponse = await fetchWithTimeout(`${apiUrl}/api/convert/${jobId}/download`, {
-        method: 'GET',
-        headers: {
-          'X-Request-ID': requestId,
-        },
-      })
-      if (!downloadResponse.ok) {
-        const errorData = await downloadResponse.json()
-        throw new Error(errorData.detail || 'Failed to download converted file')
+      // Small specs come back converted right away (200); larger ones are queued (202).
+      let downloadResponse = response
+      let provider: string | null = null
+      if (response.status === 202) {
+        const enqueueBody = await response.json()
+        const jobId = enqueueBody?.job_id
+        if (!jobId) {
+          throw new Error('Missing conversion job id from server')
+        }
+        toast.info('Conversion queued. Processing in background...')
+
+        const completedJob = await waitForConversionJob(apiUrl, jobId, requestId)
+        provider = completedJob?.provider ?? null
+
+        downloadResponse = await fetchWithTimeout(`${apiUrl}/api/convert/${jobId}/download`, {
+          method: 'GET',
+          headers: {
+            'X-Request-ID': requestId,
+          },
+        })
+        if (!downloadResponse.ok) {
+          const errorData = await downloadResponse.json()
+          throw new Error(errorData.detail || 'Failed to download converted file')
+        }
+      } else {
+        provider = decodeURIComponent(response.headers.get('X-Provider') || '') || null
       }
 
       const contentDisposition = downloadResponse.headers.get('Content-Disposition')
@@ -225,7 +278,8 @@ export default function HomeClient({ starCount }: HomeClientProps) {
       setConvertedBlob(blob)
       setConvertedFilename(filename)
       setConvertedTokenCount(Number.isFinite(tokenCount) ? tokenCount : null)
-      setConvertedProvider(completedJob?.provider ?? null)
+      setConvertedProvider(provider)
+      setConvertedJobId(downloadResponse.headers.get('X-Job-Id'))
       setShowContributeDialog(true)
       toast.success('Conversion successful. Choose how to continue.')
     } catch (error) {
@@ -259,24 +313,42 @@ export default function HomeClient({ starCount }: HomeClientProps) {
     const requestId = createRequestId()
     setIsSharing(true)
     try {
-      const markdownContent = await convertedBlob.text()
-      const formData = new FormData()
-      formData.append('file', selectedFile)
-      formData.append('markdown_content', markdownContent)
-      if (convertedTokenCount !== null) {
-        formData.append('token_count', String(convertedTokenCount))
-      }
-      if (providerName) {
-        formData.append('provider_name', providerName)
+      // Share straight from the finished job; re-upload only if it has expired.
+      let response: Response | null = null
+      if (convertedJobId) {
+        const jobFormData = new FormData()
+        if (providerName) {
+          jobFormData.append('provider_name', providerName)
+        }
+        response = await fetchWithTimeout(`${apiUrl}/api/convert/${convertedJobId}/share`, {
+          method: 'POST',
+          body: jobFormData,
+          headers: {
+            'X-Request-ID': requestId,
+          },
+        })
       }
 
-      const response = await fetchWithTimeout(`${apiUrl}/api/specs/share`, {
-        method: 'POST',
-        body: formData,
-        headers: {
-          'X-Request-ID': requestId,
-        },
-      })
+      if (!response || response.status === 404) {
+        const markdownContent = await convertedBlob.text()
+        const formData = new FormData()
+        formData.append('file', selectedFile)
+        formData.append('markdown_content', markdownContent)
+        if (convertedTokenCount !== null) {
+          formData.append('token_count', String(convertedTokenCount))
+        }
+        if (providerName) {
+          formData.append('provider_name', providerName)
+        }
+
+        response = await fetchWithTimeout(`${apiUrl}/api/specs/share`, {
+          method: 'POST',
+          body: formData,
+          headers: {
+            'X-Request-ID': requestId,
+          },
+        })
+      }
 
       if (!response.ok) {
         let message = 'Failed to share with marketplace'
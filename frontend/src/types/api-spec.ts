@@ -34,6 +34,12 @@ export interface ChunkedSpec {
   tags: Record<string, string>
   endpoints: Record<string, string>
   schemas: Record<string, string>
+  token_counts?: {
+    manifest: number
+    tags: Record<string, number>
+    endpoints: Record<string, number>
+    schemas: Record<string, number>
+  }
 }
 
 export interface ToolSchema {